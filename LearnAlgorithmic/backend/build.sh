@@ -17,6 +17,9 @@ python manage.py collectstatic --noinput
 # Appliquer les migrations
 python manage.py migrate
 
+# Table du cache du contenu des cours (sans effet si elle existe ou si le cache n'utilise pas la base)
+python manage.py createcachetable
+
 # Importer les donnees initiales si la base est vide (premier deploiement)
 set +e
 python manage.py shell -c "from django.contrib.auth.models import User; exit(0 if User.objects.count() == 0 else 1)"
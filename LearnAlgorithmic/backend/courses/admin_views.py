@@ -646,3 +646,12 @@ def user_detailed_stats(request, user_id):
         'activity_timeline': activity_timeline
     })
 
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def interpreter_cache_stats(request):
+    """Compteurs du cache des programmes compilés (worker qui répond)"""
+    from .pseudo_cache import get_program_cache
+
+    return Response(get_program_cache().stats())
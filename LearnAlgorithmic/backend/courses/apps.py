@@ -5,3 +5,7 @@ class CoursesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'courses'
     verbose_name = 'Gestion des Cours'
+
+    def ready(self):
+        from .content_cache import connect_signals
+        connect_signals()
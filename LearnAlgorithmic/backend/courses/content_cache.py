@@ -0,0 +1,141 @@
+"""
+Cache des réponses du contenu des cours
+=======================================
+Le contenu (modules, leçons, concepts, exemples, simulations, quiz,
+exercices) ne change que lorsque l'équipe le modifie: pages
+d'administration (`admin_views.py`), admin Django, scripts de
+chargement. Les représentations sérialisées des modules et des leçons
+sont donc mises en cache (`cached_payload`) sous un numéro de version du
+contenu, et la progression de l'apprenant y est ajoutée ensuite, à
+chaque requête.
+
+Le numéro de version est conservé dans le même cache que les réponses
+(réglage `COURSE_CONTENT_CACHE`): les workers le partagent quand ce
+cache est partagé (fichiers, base de données). Chaque enregistrement ou
+suppression d'un objet du contenu l'incrémente (signaux post_save et
+post_delete, branchés par `CoursesConfig.ready`): les réponses de
+l'ancienne version ne sont plus lues et expirent d'elles-mêmes. Les
+écritures qui n'envoient pas de signal (`bulk_create`, `update`)
+doivent appeler `bump_content_version`.
+
+`content_etag` dérive de cette version et des lignes de progression de
+l'utilisateur un ETag fort: une réponse inchangée est remplacée par
+"304 Not Modified", sans sérialisation.
+
+Si la version disparaît du cache (éviction, redémarrage), elle repart
+de l'heure courante en millisecondes et non de 1: une réponse
+enregistrée sous une version antérieure ne peut pas être relue.
+"""
+
+import hashlib
+import time
+from typing import Any, Callable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Max
+from django.db.models.signals import post_delete, post_save
+from django.utils.http import quote_etag
+
+from .models import (
+    Concept, Example, Exercise, Lesson, LessonProgress, Module, Quiz, QuizChoice, QuizQuestion, Simulation,
+    SimulationStep, UserProgress,
+)
+
+
+# Modèles dont les réponses en cache dépendent (objets imbriqués compris)
+CONTENT_MODELS = (
+    Module, Lesson, Concept, Example, Simulation, SimulationStep, Quiz, QuizQuestion, QuizChoice, Exercise,
+)
+
+VERSION_KEY = 'course-content:version'
+
+# Format des représentations: à incrémenter quand les serializers changent, pour que ni les réponses
+# en cache ni les ETags des clients ne resservent l'ancien format (2: états de simulation complets)
+PAYLOAD_FORMAT = 2
+
+
+def _options() -> dict:
+    return getattr(settings, 'COURSE_CONTENT_CACHE', {})
+
+
+def content_cache():
+    """Cache Django des réponses du contenu (alias `COURSE_CONTENT_CACHE['ALIAS']`)"""
+    return caches[_options().get('ALIAS', 'default')]
+
+
+def _fresh_version() -> int:
+    return int(time.time() * 1000)
+
+
+def content_version() -> int:
+    """Version courante du contenu des cours"""
+    cache = content_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # `add` ne remplace pas la version créée entre-temps par un autre worker
+        cache.add(VERSION_KEY, _fresh_version(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_content_version(**kwargs):
+    """
+    Invalide toutes les réponses en cache (récepteur des signaux des
+    modèles du contenu), à la validation de la transaction en cours: une
+    requête concurrente ne peut pas remettre en cache l'ancien contenu
+    sous la nouvelle version
+    """
+    transaction.on_commit(increment_content_version)
+
+
+def increment_content_version():
+    cache = content_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # Version absente du cache
+        cache.set(VERSION_KEY, _fresh_version(), None)
+
+
+def cached_payload(name: str, build: Callable[[], Any]) -> Any:
+    """
+    Représentation `name` (ex. 'lesson:12') pour la version courante du
+    contenu; `build()` la calcule si elle n'est pas en cache. Le résultat
+    est partagé par tous les utilisateurs: il ne doit pas contenir de
+    progression.
+    """
+    options = _options()
+    if not options.get('ENABLED', True):
+        return build()
+    cache = content_cache()
+    key = f"course-content:f{PAYLOAD_FORMAT}:v{content_version()}:{name}"
+    payload = cache.get(key)
+    if payload is None:
+        payload = build()
+        cache.set(key, payload, options.get('TIMEOUT', 24 * 3600))
+    return payload
+
+
+def content_etag(user, name: str) -> str:
+    """
+    ETag fort de la réponse `name` pour `user`: format et version du
+    contenu, statut d'administrateur et, pour chaque table de progression,
+    nombre de lignes et date de la dernière modification (deux requêtes)
+    """
+    parts = [name, PAYLOAD_FORMAT, content_version(), user.pk, user.is_staff or user.is_superuser]
+    for model in (UserProgress, LessonProgress):
+        rows = model.objects.filter(user=user).aggregate(count=Count('id'), updated=Max('updated_at'))
+        parts += [rows['count'], rows['updated'].isoformat() if rows['updated'] else '']
+    digest = hashlib.sha256('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+    return quote_etag(digest[:32])
+
+
+def connect_signals():
+    """Incrémente la version à chaque enregistrement ou suppression d'un objet du contenu"""
+    for model in CONTENT_MODELS:
+        post_save.connect(bump_content_version, sender=model,
+                          dispatch_uid=f'course-content-save-{model.__name__}')
+        post_delete.connect(bump_content_version, sender=model,
+                            dispatch_uid=f'course-content-delete-{model.__name__}')
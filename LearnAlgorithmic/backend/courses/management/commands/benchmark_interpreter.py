@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from courses.pseudo_benchmarks import SCENARIOS, format_results, run_scenarios
+
+
+class Command(BaseCommand):
+    help = "Micro-benchmarks de l'interpréteur de pseudo-code (aiguillage, analyse, exécution)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('scenarios', nargs='*',
+                            help=f"Scénarios à exécuter parmi: {', '.join(SCENARIOS)} (tous par défaut)")
+
+    def handle(self, *args, **options):
+        try:
+            results = run_scenarios(options['scenarios'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(format_results(results))
@@ -0,0 +1,142 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.conf import settings
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from courses.models import (
+    Concept, Example, Exercise, Lesson, LessonProgress, Module, Quiz, QuizChoice, QuizQuestion, Simulation,
+    SimulationStep, UserProgress,
+)
+from courses.views import LessonViewSet, ModuleViewSet
+
+
+# Nombre maximal de requêtes SQL par point d'accès, quelle que soit la taille du catalogue
+# (ETag: deux requêtes sur les tables de progression; -304: client à jour, réponse non construite)
+QUERY_BUDGETS = {
+    # Progression par module, ETag, modules, leçons, leçons complétées
+    'modules-list': 6,
+    'modules-list-304': 3,
+    # Module, progression du module, ETag, progression par leçon, leçons
+    'module-lessons': 6,
+    'module-lessons-304': 4,
+    # Leçon, progression du module, ETag, concepts, exemples, simulations, étapes, quiz, questions, choix,
+    # exercices
+    'lesson-detail': 12,
+    'lesson-detail-304': 4,
+}
+
+
+def grow_catalogue(user, modules, lessons):
+    """Ajoute des modules complets (leçons, concepts, exemples, simulations, quiz, exercices) et de la progression"""
+    start = (Module.objects.order_by('-order').values_list('order', flat=True).first() or 0) + 1
+    for order in range(start, start + modules):
+        module = Module.objects.create(title=f"Module {order}", description="", order=order)
+        UserProgress.objects.create(user=user, module=module, is_unlocked=True)
+        for lesson_order in range(1, lessons + 1):
+            lesson = Lesson.objects.create(module=module, title=f"Leçon {lesson_order}",
+                                           description="", order=lesson_order)
+            Concept.objects.create(lesson=lesson, title="Concept", definition="", syntax="", order=1)
+            Example.objects.create(lesson=lesson, title="Exemple", description="", code="ECRIRE(1)",
+                                   explanation="", order=1)
+            simulation = Simulation.objects.create(lesson=lesson, title="Simulation", description="",
+                                                   algorithm_code="ECRIRE(1)", order=1)
+            for step_number in (1, 2):
+                SimulationStep.objects.create(simulation=simulation, step_number=step_number,
+                                              description="", state_data={}, visual_data={})
+            for quiz_order in (1, 2):
+                quiz = Quiz.objects.create(lesson=lesson, title=f"Quiz {quiz_order}", order=quiz_order)
+                for question_order in (1, 2, 3):
+                    question = QuizQuestion.objects.create(quiz=quiz, question_text="Question",
+                                                           question_type='single', order=question_order,
+                                                           explanation="")
+                    for choice_order in (1, 2, 3):
+                        QuizChoice.objects.create(question=question, choice_text="Choix",
+                                                  is_correct=choice_order == 1, order=choice_order)
+            Exercise.objects.create(lesson=lesson, title="Exercice", description="", problem_statement="",
+                                    expected_output="1", solution_code="ECRIRE(1)", test_cases={}, order=1)
+            LessonProgress.objects.create(user=user, lesson=lesson, is_completed=lesson_order % 2 == 0)
+
+
+class Command(BaseCommand):
+    help = ("Compte les requêtes SQL des points d'accès du catalogue, avant et après l'ajout de modules "
+            "et de leçons, et échoue si l'une des mesures dépasse le budget. Les données ajoutées sont "
+            "annulées à la fin; le cache des réponses n'est pas utilisé")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--modules', type=int, default=3,
+                            help="Modules ajoutés pour la seconde mesure (3 par défaut)")
+        parser.add_argument('--lessons', type=int, default=5,
+                            help="Leçons par module ajouté (5 par défaut)")
+
+    def handle(self, *args, **options):
+        failures = []
+        # Mesure sans le cache des réponses, la version du contenu dans un cache local (sans
+        # requête): les données ajoutées n'entrent pas dans le cache réel
+        no_cache = dict(getattr(settings, 'COURSE_CONTENT_CACHE', {}), ENABLED=False, ALIAS='query-count-check')
+        caches = dict(settings.CACHES, **{'query-count-check': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'query-count-check',
+        }})
+        with override_settings(CACHES=caches, COURSE_CONTENT_CACHE=no_cache), transaction.atomic():
+            user = User.objects.create_user(username='query-count-check', password=None)
+            UserProgress.objects.bulk_create([
+                UserProgress(user=user, module=module, is_unlocked=True) for module in Module.objects.all()
+            ])
+            first = self.measure_all(user)
+            grow_catalogue(user, options['modules'], options['lessons'])
+            second = self.measure_all(user)
+            transaction.set_rollback(True)
+
+        # Pas d'égalité exigée entre les deux mesures: les préchargements des relations vides (leçon
+        # sans quiz ni simulation dans le catalogue existant) ne font pas de requête
+        for endpoint, budget in QUERY_BUDGETS.items():
+            line = f"{endpoint}: {first[endpoint]} puis {second[endpoint]} requêtes (budget {budget})"
+            if max(first[endpoint], second[endpoint]) > budget:
+                failures.append(endpoint)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+
+        if failures:
+            raise CommandError(f"Nombre de requêtes hors budget: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("Nombre de requêtes dans le budget"))
+
+    def measure_all(self, user):
+        """Nombre de requêtes de chaque point d'accès (après une première visite)"""
+        factory = APIRequestFactory()
+        # Le dernier module et sa dernière leçon sont les plus grands après l'ajout
+        module = Module.objects.order_by('-order').first()
+        lesson = Lesson.objects.filter(module=module).order_by('-order').first()
+        if lesson is None:
+            raise CommandError("Aucune leçon: chargez d'abord le catalogue")
+        views = {
+            'modules-list': (ModuleViewSet.as_view({'get': 'list'}), '/api/modules/', {}),
+            'module-lessons': (ModuleViewSet.as_view({'get': 'lessons'}), f'/api/modules/{module.id}/lessons/',
+                               {'pk': module.id}),
+            'lesson-detail': (LessonViewSet.as_view({'get': 'retrieve'}), f'/api/lessons/{lesson.id}/',
+                              {'pk': lesson.id}),
+        }
+        counts = {}
+        for endpoint, (view, path, kwargs) in views.items():
+            request = factory.get(path)
+            force_authenticate(request, user=user)
+            # Première visite (progression du premier module, caches)
+            view(request, **kwargs)
+            request = factory.get(path)
+            force_authenticate(request, user=user)
+            with CaptureQueriesContext(connection) as queries:
+                response = view(request, **kwargs)
+            if response.status_code != 200:
+                raise CommandError(f"{endpoint}: réponse {response.status_code}")
+            counts[endpoint] = len(queries)
+
+            # Client à jour: 304 sans construire la réponse
+            request = factory.get(path, HTTP_IF_NONE_MATCH=response['ETag'])
+            force_authenticate(request, user=user)
+            with CaptureQueriesContext(connection) as queries:
+                response = view(request, **kwargs)
+            if response.status_code != 304:
+                raise CommandError(f"{endpoint}: réponse {response.status_code} au lieu de 304")
+            counts[f'{endpoint}-304'] = len(queries)
+        return counts
@@ -0,0 +1,133 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from courses.models import Example, Exercise, ExerciseSubmission, Simulation
+from courses.pseudo_arrays import PseudoArray
+from courses.pseudo_ast import PseudoCodeError
+from courses.pseudo_interpreter import PseudoInterpreter, BACKENDS
+from courses.pseudo_transpiler import TrustedInterpreter
+
+
+def comparable(variables):
+    """Variables comparables entre deux exécutions (un tableau par son type et ses valeurs)"""
+    return {
+        name: (value.type_name, list(value)) if isinstance(value, PseudoArray) else value
+        for name, value in variables.items()
+    }
+
+
+def compare_engines(code, inputs_list, trusted, timings=None, elided=None):
+    """
+    Exécute `code` avec chaque moteur (et la traduction Python si `trusted`)
+    pour chaque liste d'entrées. Retourne les différences avec le premier
+    moteur: (entrées, moteur, résultat de référence, résultat du moteur),
+    un résultat étant (succès, sortie, erreur), variables, types, nombre
+    d'itérations et, pour les moteurs de l'interpréteur, calculs évités.
+    `timings` et `elided`, par moteur, sont complétés s'ils sont fournis.
+    """
+    # Le code des apprenants n'est jamais exécuté par le moteur 'python'
+    interpreters = {backend: PseudoInterpreter(backend=backend) for backend in BACKENDS}
+    if trusted:
+        interpreters['python'] = TrustedInterpreter()
+    timings = timings if timings is not None else {engine: 0.0 for engine in interpreters}
+    elided = elided if elided is not None else {engine: 0 for engine in interpreters}
+
+    programs = {}
+    for engine, interpreter in interpreters.items():
+        start = time.perf_counter()
+        try:
+            programs[engine] = interpreter.compile(code)
+        except PseudoCodeError:
+            programs[engine] = None
+        timings[engine] += time.perf_counter() - start
+
+    differences = []
+    for inputs in inputs_list:
+        results = {}
+        for engine, interpreter in interpreters.items():
+            start = time.perf_counter()
+            if programs[engine] is None:
+                result = interpreter.execute(code, list(inputs))
+            else:
+                result = interpreter.run(programs[engine], list(inputs))
+            timings[engine] += time.perf_counter() - start
+            elided[engine] += interpreter.elided_evaluations
+            results[engine] = (result, comparable(interpreter.variables), interpreter.variable_types,
+                               interpreter.iteration_count)
+            if engine in BACKENDS:
+                # Le moteur 'python' ne mémorise pas les calculs invariants
+                results[engine] += (interpreter.elided_evaluations,)
+
+        reference = results[BACKENDS[0]]
+        for engine, outcome in results.items():
+            if outcome != reference[:len(outcome)]:
+                differences.append((inputs, engine, reference, outcome))
+    return differences
+
+
+class Command(BaseCommand):
+    help = ("Exécute le pseudo-code du contenu (solutions, simulations, exemples, soumissions) "
+            "avec chaque moteur de l'interpréteur (et la traduction Python pour le contenu de "
+            "confiance) et signale les résultats différents")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--no-submissions', action='store_true',
+                            help="Ne pas inclure le code soumis par les apprenants")
+        parser.add_argument('--limit', type=int, default=None,
+                            help="Nombre maximal de programmes à comparer")
+
+    def handle(self, *args, **options):
+        corpus = list(self.collect_corpus(include_submissions=not options['no_submissions']))
+        if options['limit']:
+            corpus = corpus[:options['limit']]
+
+        engines = list(BACKENDS) + ['python']
+        timings = {engine: 0.0 for engine in engines}
+        elided = {engine: 0 for engine in engines}
+        mismatches = 0
+        runs = 0
+
+        for label, code, inputs_list, trusted in corpus:
+            runs += len(inputs_list)
+            for inputs, engine, reference, outcome in compare_engines(code, inputs_list, trusted, timings, elided):
+                mismatches += 1
+                self.stdout.write(self.style.ERROR(
+                    f"[{label}] entrées={inputs}: '{BACKENDS[0]}' et '{engine}' diffèrent"
+                ))
+                self.stdout.write(f"  {BACKENDS[0]}: {reference[0]}")
+                self.stdout.write(f"  {engine}: {outcome[0]}")
+
+        self.stdout.write(f"{len(corpus)} programmes, {runs} exécutions")
+        for engine, elapsed in timings.items():
+            self.stdout.write(f"  {engine}: {elapsed * 1000:.1f} ms, {elided[engine]} calculs évités")
+
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f"{mismatches} différence(s)"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Aucune différence"))
+
+    def collect_corpus(self, include_submissions=True):
+        """
+        Retourne (libellé, code, liste d'entrées, contenu de confiance) pour
+        chaque programme du contenu
+        """
+        for exercise in Exercise.objects.exclude(solution_code__isnull=True).exclude(solution_code=''):
+            yield f"Exercice {exercise.id}", exercise.solution_code, self.exercise_inputs(exercise), True
+
+        for simulation in Simulation.objects.all():
+            yield f"Simulation {simulation.id}", simulation.algorithm_code, [[]], True
+
+        for example in Example.objects.all():
+            yield f"Exemple {example.id}", example.code, [[]], True
+
+        if include_submissions:
+            for submission in ExerciseSubmission.objects.select_related('exercise'):
+                yield (f"Soumission {submission.id}", submission.code_submitted,
+                       self.exercise_inputs(submission.exercise), False)
+
+    @staticmethod
+    def exercise_inputs(exercise):
+        test_cases = exercise.test_cases if isinstance(exercise.test_cases, dict) else {}
+        inputs_list = [test.get('inputs', []) for test in test_cases.get('execution_tests', [])]
+        return inputs_list or [[]]
@@ -0,0 +1,67 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from courses.content_cache import bump_content_version
+from courses.models import Simulation, SimulationStep
+from courses.pseudo_limits import get_execution_limits
+from courses.pseudo_snapshots import KEYFRAME_INTERVAL
+from courses.pseudo_tracer import TracingInterpreter, trace_to_steps
+
+
+class Command(BaseCommand):
+    help = ("Exécute le pseudo-code d'une simulation (algorithm_code) en traçant chaque instruction "
+            "et enregistre la trace comme étapes (SimulationStep)")
+
+    def add_arguments(self, parser):
+        parser.add_argument('simulation_id', type=int, help="Identifiant de la simulation")
+        parser.add_argument('--inputs', nargs='*', default=[],
+                            help="Valeurs fournies aux instructions LIRE, dans l'ordre")
+        parser.add_argument('--max-steps', type=int, default=200,
+                            help="Nombre maximal d'étapes enregistrées (200 par défaut)")
+        parser.add_argument('--keyframe-interval', type=int, default=KEYFRAME_INTERVAL,
+                            help=f"Étapes entre deux états complets des variables ({KEYFRAME_INTERVAL} par défaut)")
+        parser.add_argument('--replace', action='store_true',
+                            help="Supprimer les étapes existantes de la simulation")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Afficher les étapes en JSON sans les enregistrer")
+
+    def handle(self, *args, **options):
+        try:
+            simulation = Simulation.objects.get(id=options['simulation_id'])
+        except Simulation.DoesNotExist:
+            raise CommandError(f"Simulation {options['simulation_id']} introuvable")
+
+        interpreter = TracingInterpreter(limits=get_execution_limits('default'))
+        success, output, error = interpreter.execute(simulation.algorithm_code, options['inputs'])
+        if not success:
+            # La trace jusqu'à l'erreur reste utilisable (simulation d'une erreur d'exécution)
+            self.stdout.write(self.style.WARNING(f"Exécution interrompue: {error}"))
+
+        steps = trace_to_steps(interpreter.trace, options['keyframe_interval'])
+        if len(steps) > options['max_steps']:
+            self.stdout.write(self.style.WARNING(
+                f"{len(steps)} étapes, seules les {options['max_steps']} premières sont conservées"))
+            steps = steps[:options['max_steps']]
+        if not steps:
+            raise CommandError("Aucune instruction exécutée: rien à enregistrer")
+
+        if options['dry_run']:
+            self.stdout.write(json.dumps(steps, ensure_ascii=False, indent=2))
+            return
+
+        with transaction.atomic():
+            existing = simulation.steps.count()
+            if existing and not options['replace']:
+                raise CommandError(f"La simulation a déjà {existing} étape(s): utilisez --replace")
+            simulation.steps.all().delete()
+            SimulationStep.objects.bulk_create([
+                SimulationStep(simulation=simulation, **step) for step in steps
+            ])
+            # bulk_create n'envoie pas post_save
+            bump_content_version()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(steps)} étape(s) enregistrée(s) pour « {simulation.title} »"
+            + (f" (sortie: {output!r})" if output else "")))
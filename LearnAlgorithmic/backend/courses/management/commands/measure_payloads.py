@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from courses.models import Module
+from courses.serializers import (
+    LessonDetailSerializer, LessonListSerializer, LessonSerializer, ModuleListSerializer, ModuleSerializer,
+)
+
+
+class Command(BaseCommand):
+    help = ("Mesure la taille (JSON) des réponses du catalogue sur les données en base: représentation "
+            "complète (leçons avec concepts, exemples et simulations) et représentation des listes")
+
+    def handle(self, *args, **options):
+        modules = list(Module.objects.prefetch_related(
+            'lessons__concepts', 'lessons__examples', 'lessons__simulations__steps'
+        ))
+        lessons = [lesson for module in modules for lesson in module.lessons.all()]
+
+        rows = [
+            ("/modules/", ModuleSerializer(modules, many=True).data,
+             ModuleListSerializer(modules, many=True).data),
+        ]
+        for module in modules:
+            rows.append((f"/modules/{module.id}/lessons/", LessonSerializer(module.lessons.all(), many=True).data,
+                         LessonListSerializer(module.lessons.all(), many=True).data))
+
+        total_full = total_slim = 0
+        for label, full, slim in rows:
+            full_size, slim_size = self.size(full), self.size(slim)
+            total_full += full_size
+            total_slim += slim_size
+            self.stdout.write(f"{label:<24} {full_size / 1024:>9.1f} KiB -> {slim_size / 1024:>7.1f} KiB")
+        self.stdout.write(f"{'total':<24} {total_full / 1024:>9.1f} KiB -> {total_slim / 1024:>7.1f} KiB")
+
+        # Le contenu complet n'est plus servi que par le détail d'une leçon
+        details = [self.size(LessonDetailSerializer(lesson).data) for lesson in lessons]
+        if details:
+            self.stdout.write(f"/lessons/{{id}}/ (détail): {sum(details) / len(details) / 1024:.1f} KiB en moyenne, "
+                              f"{max(details) / 1024:.1f} KiB au plus ({len(details)} leçons)")
+
+    @staticmethod
+    def size(data):
+        """Taille en octets de la réponse JSON rendue par l'API"""
+        return len(JSONRenderer().render(data))
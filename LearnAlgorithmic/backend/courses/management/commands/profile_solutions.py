@@ -0,0 +1,93 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from courses.models import Exercise
+from courses.pseudo_interpreter import BACKENDS, case_inputs
+from courses.pseudo_limits import get_execution_limits
+from courses.pseudo_profiler import Profile, ProfilingInterpreter
+
+
+class Command(BaseCommand):
+    help = ("Profile la solution (solution_code) de chaque exercice sur les entrées de ses cas de test "
+            "et classe les plus lentes, avec leurs lignes les plus coûteuses")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--backend', choices=BACKENDS, default=None,
+                            help="Moteur de l'interpréteur (PSEUDO_INTERPRETER_BACKEND par défaut)")
+        parser.add_argument('--top', type=int, default=10,
+                            help="Nombre de solutions affichées (10 par défaut)")
+        parser.add_argument('--lines', type=int, default=3,
+                            help="Lignes les plus coûteuses affichées par solution (3 par défaut)")
+        parser.add_argument('--repeat', type=int, default=3,
+                            help="Exécutions par cas de test, la plus rapide est retenue (3 par défaut)")
+        parser.add_argument('--json', action='store_true',
+                            help="Afficher le classement complet en JSON")
+
+    def handle(self, *args, **options):
+        backend = options['backend'] or settings.PSEUDO_INTERPRETER_BACKEND
+        limits = get_execution_limits('grading')
+        exercises = Exercise.objects.exclude(solution_code__isnull=True).exclude(solution_code='')
+
+        ranking = []
+        for exercise in exercises:
+            ranking.append(self.profile_exercise(exercise, backend, limits, max(1, options['repeat'])))
+        ranking.sort(key=lambda entry: entry['total_ms'], reverse=True)
+
+        if options['json']:
+            self.stdout.write(json.dumps(ranking, ensure_ascii=False, indent=2))
+            return
+
+        self.stdout.write(f"{len(ranking)} solution(s) profilée(s) (moteur '{backend}')")
+        for rank, entry in enumerate(ranking[:options['top']], 1):
+            line = (f"{rank:>3}. Exercice {entry['exercise_id']} « {entry['title']} »: "
+                    f"{entry['total_ms']:.2f} ms, {entry['passes']} passages, {entry['cases']} cas")
+            self.stdout.write(self.style.ERROR(line) if entry['errors'] else line)
+            for hot in entry['lines'][:options['lines']]:
+                self.stdout.write(f"       ligne {hot['line']:>3} ({hot['count']} passages, "
+                                  f"{hot['time_ms']:.2f} ms): {hot['code']}")
+            if entry['builtins']:
+                self.stdout.write("       fonctions: " + ", ".join(
+                    f"{call['name']} x{call['count']} ({call['time_ms']:.2f} ms)" for call in entry['builtins']))
+            for error in entry['errors'][:1]:
+                self.stdout.write(self.style.WARNING(f"       erreur: {error}"))
+
+    def profile_exercise(self, exercise, backend, limits, repeat):
+        """Profil cumulé des cas de test de l'exercice (meilleure de `repeat` exécutions par cas)"""
+        test_cases = exercise.test_cases if isinstance(exercise.test_cases, dict) else {}
+        inputs_list = case_inputs(test_cases.get('execution_tests', [])) or [[]]
+
+        total = Profile()
+        source_lines = []
+        errors = []
+        for inputs in inputs_list:
+            best = None
+            for _ in range(repeat):
+                interpreter = ProfilingInterpreter(backend=backend, limits=limits)
+                success, _, error = interpreter.execute(exercise.solution_code, list(inputs))
+                if best is None or interpreter.profile.total < best.profile.total:
+                    best = interpreter
+            if not success:
+                errors.append(error)
+            source_lines = best.source_lines
+            profile = best.profile
+            total.total += profile.total
+            for line, count in profile.line_counts.items():
+                total.line_counts[line] = total.line_counts.get(line, 0) + count
+                total.line_times[line] = total.line_times.get(line, 0.0) + profile.line_times.get(line, 0.0)
+            for name, count in profile.call_counts.items():
+                total.call_counts[name] = total.call_counts.get(name, 0) + count
+                total.call_times[name] = total.call_times.get(name, 0.0) + profile.call_times[name]
+
+        data = total.as_dict(source_lines)
+        return {
+            'exercise_id': exercise.id,
+            'title': exercise.title,
+            'cases': len(inputs_list),
+            'total_ms': data['total_ms'],
+            'passes': sum(line['count'] for line in data['lines']),
+            'lines': sorted(data['lines'], key=lambda line: line['time_ms'], reverse=True),
+            'builtins': data['builtins'],
+            'errors': errors,
+        }
@@ -0,0 +1,63 @@
+from django.core.management.base import BaseCommand
+
+from courses.models import Exercise
+from courses.pseudo_ast import PseudoCodeError
+from courses.pseudo_interpreter import case_inputs
+from courses.pseudo_limits import get_execution_limits
+from courses.pseudo_transpiler import TrustedInterpreter
+
+
+class Command(BaseCommand):
+    help = ("Recalcule la sortie attendue (expected_output) des cas de test de chaque exercice "
+            "en exécutant sa solution (solution_code) traduite en Python, et signale les écarts")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--exercise', type=int, action='append', default=None,
+                            help="Identifiant d'un exercice (répétable; tous par défaut)")
+        parser.add_argument('--write', action='store_true',
+                            help="Enregistrer les sorties recalculées (sinon, seulement les afficher)")
+
+    def handle(self, *args, **options):
+        exercises = Exercise.objects.exclude(solution_code__isnull=True).exclude(solution_code='')
+        if options['exercise']:
+            exercises = exercises.filter(id__in=options['exercise'])
+
+        # Solutions écrites par l'équipe: seul contenu exécuté par TrustedInterpreter
+        interpreter = TrustedInterpreter(limits=get_execution_limits('grading'))
+        changed = failed = 0
+        for exercise in exercises:
+            test_cases = exercise.test_cases if isinstance(exercise.test_cases, dict) else {}
+            tests = test_cases.get('execution_tests', [])
+            if not tests:
+                continue
+            try:
+                compiled = interpreter.compile(exercise.solution_code)
+            except PseudoCodeError as e:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f"Exercice {exercise.id}: solution invalide - {e}"))
+                continue
+
+            updated = False
+            for index, (test, inputs) in enumerate(zip(tests, case_inputs(tests))):
+                success, output, error = interpreter.run(compiled, list(inputs))
+                if not success:
+                    failed += 1
+                    self.stdout.write(self.style.ERROR(
+                        f"Exercice {exercise.id}, test {index + 1}: erreur d'exécution - {error}"))
+                    continue
+                expected = str(test.get('expected_output', '')).strip()
+                if output.strip() != expected:
+                    changed += 1
+                    updated = True
+                    self.stdout.write(f"Exercice {exercise.id}, test {index + 1}: "
+                                      f"{expected!r} -> {output.strip()!r}")
+                    test['expected_output'] = output.strip()
+
+            if updated and options['write']:
+                exercise.test_cases = test_cases
+                exercise.save(update_fields=['test_cases'])
+
+        summary = f"{changed} sortie(s) différente(s), {failed} erreur(s)"
+        if changed and not options['write']:
+            summary += " (non enregistrées: utilisez --write)"
+        self.stdout.write(self.style.ERROR(summary) if failed else self.style.SUCCESS(summary))
@@ -80,6 +80,34 @@ class Simulation(models.Model):
     def __str__(self):
         return f"{self.lesson.title} - Simulation: {self.title}"
 
+    def state_at(self, step_number):
+        """
+        État complet des variables à l'étape `step_number`.
+
+        Les étapes générées ne stockent que les variables modifiées
+        (`pseudo_snapshots`): seules les étapes depuis l'image clé
+        précédente sont lues.
+        """
+        from .pseudo_snapshots import apply_delta, is_keyframe
+
+        rows = (self.steps.filter(step_number__lte=step_number)
+                .order_by('-step_number').values_list('step_number', 'state_data'))
+        states = []
+        for number, state in rows.iterator(chunk_size=32):
+            if not states and number != step_number:
+                break
+            states.append(state)
+            if is_keyframe(state):
+                break
+        if not states:
+            raise SimulationStep.DoesNotExist(f"Étape {step_number} introuvable")
+
+        variables = {}
+        for state in reversed(states):
+            apply_delta(variables, state)
+        current_line = states[0].get('current_line') if isinstance(states[0], dict) else None
+        return {'step_number': step_number, 'current_line': current_line, 'variables': variables}
+
 
 class SimulationStep(models.Model):
     """Étapes d'une simulation"""
@@ -182,6 +210,8 @@ class UserProgress(models.Model):
     is_unlocked = models.BooleanField(default=False)
     is_completed = models.BooleanField(default=False)
     completion_date = models.DateTimeField(null=True, blank=True)
+    # Dernière modification (ETag des réponses du catalogue); vide pour les lignes importées
+    updated_at = models.DateTimeField(auto_now=True, null=True)
     
     class Meta:
         unique_together = ['user', 'module']
@@ -199,6 +229,8 @@ class LessonProgress(models.Model):
     exercise_score = models.IntegerField(default=0, validators=[MinValueValidator(0), MaxValueValidator(100)])
     combined_score = models.IntegerField(default=0, validators=[MinValueValidator(0), MaxValueValidator(100)])
     completion_date = models.DateTimeField(null=True, blank=True)
+    # Dernière modification (ETag des réponses du catalogue); vide pour les lignes importées
+    updated_at = models.DateTimeField(auto_now=True, null=True)
     
     class Meta:
         unique_together = ['user', 'lesson']
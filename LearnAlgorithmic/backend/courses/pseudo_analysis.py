@@ -0,0 +1,221 @@
+"""
+Analyse statique du pseudo-code
+===============================
+Passe exécutée sur l'arbre analysé, avant les optimisations
+(`PseudoInterpreter.lower`), et diagnostics affichables sans exécuter
+le programme (`analyze_code`).
+
+Une boucle TANT QUE dont aucune variable de la condition n'est modifiée
+dans le corps ne s'arrête plus une fois entrée: la condition garde sa
+valeur. Auparavant, une telle boucle épuisait tout le budget de
+passages (`max_iterations`), une fois par cas de test. `LoopChecker`
+remplace son corps par l'erreur "Boucle infinie" et le nom des
+variables en cause: l'erreur est levée dès l'entrée dans la boucle, en
+quelques microsecondes. De même, une boucle REPETER dont la condition
+ne change pas est signalée à la fin du premier tour si elle doit en
+faire un second.
+
+L'erreur n'est levée qu'à l'entrée: une boucle dont la condition est
+fausse au départ ne fait rien, et une boucle jamais atteinte ne change
+rien au programme. Une condition qui lit un tableau ou appelle une
+FONCTION peut changer sans affectation; une boucle qui contient
+RETOURNER ou une ligne invalide peut s'arrêter autrement: ces boucles
+ne sont pas signalées.
+
+Les diagnostics (`analyze`) sont calculés une fois par programme, à la
+compilation (`PseudoInterpreter.lower`), et conservés avec le programme
+compilé dans le cache: le code des apprenants n'est analysé que dans le
+processus isolé qui l'exécute (`pseudo_sandbox`). Un programme trop
+imbriqué pour l'analyse récursive donne un diagnostic d'erreur au lieu
+d'une exception.
+
+Les blocs déséquilibrés sont refusés par l'analyse elle-même
+(`pseudo_parser.match_blocks`). Une variable non déclarée reste
+utilisable (le langage ne l'exige pas et de nombreux programmes s'en
+passent): elle fait l'objet d'un avertissement de `analyze_code`, pas
+d'un refus.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from .pseudo_ast import (
+    Assign, Declare, DeclareArray, Expr, Fail, For, Function, FunctionCall, If, Index, Lookup,
+    Not, Program, PseudoCodeError, Read, Repeat, Return, Stmt, Var, While,
+)
+from .pseudo_optimizer import array_names, assigned_names, children, map_stmt
+from .pseudo_parser import PseudoParser
+
+
+LOOP_KEYWORDS = {While: 'TANT QUE', Repeat: 'REPETER'}
+
+
+def condition_names(node: Expr, names: Dict[str, str]) -> bool:
+    """
+    Ajoute à `names` les variables lues par la condition (nom -> texte
+    écrit); False si la condition lit un tableau ou appelle une FONCTION.
+    """
+    kind = node.__class__
+    if kind is Index or kind is FunctionCall:
+        return False
+    if kind is Var:
+        names.setdefault(node.name, node.text)
+    elif kind is Lookup:
+        names.setdefault(node.name, node.name)
+    return all(condition_names(child, names) for child in children(node))
+
+
+def can_exit(body: List[Stmt]) -> bool:
+    """Le bloc contient-il RETOURNER ou une ligne invalide (blocs imbriqués compris)?"""
+    for stmt in body:
+        kind = stmt.__class__
+        if kind is Return or kind is Fail:
+            return True
+        if kind is If:
+            if can_exit(stmt.then_body) or can_exit(stmt.else_body):
+                return True
+        elif kind is For or kind is While or kind is Repeat:
+            if can_exit(stmt.body):
+                return True
+    return False
+
+
+def stuck_loop(stmt: Stmt, arrays: set) -> Optional[str]:
+    """Message d'erreur si la condition de la boucle TANT QUE / REPETER ne peut pas changer, sinon None"""
+    names: Dict[str, str] = {}
+    if not condition_names(stmt.cond, names) or can_exit(stmt.body):
+        return None
+    if any(name in arrays for name in names) or not assigned_names(stmt.body).isdisjoint(names):
+        return None
+
+    keyword = LOOP_KEYWORDS[stmt.__class__]
+    texts = sorted(names.values())
+    if not texts:
+        return f"Boucle infinie: la condition de la boucle {keyword} ne dépend d'aucune variable"
+    if len(texts) == 1:
+        return f"Boucle infinie: la variable {texts[0]} de la condition n'est jamais modifiée dans la boucle {keyword}"
+    return (f"Boucle infinie: aucune des variables {', '.join(texts)} de la condition "
+            f"n'est modifiée dans la boucle {keyword}")
+
+
+class LoopChecker:
+    """Remplace les boucles qui ne peuvent pas s'arrêter par l'erreur "Boucle infinie" """
+
+    def __init__(self):
+        # Boucles signalées
+        self.rejected = 0
+        self.arrays: set = set()
+
+    def check(self, program: Program) -> Program:
+        self.rejected = 0
+        self.arrays = array_names(program)
+        functions = {
+            name: Function(function.name, function.procedure, function.params, function.return_type,
+                           self.block(function.body), function.line, function.end_line)
+            for name, function in program.functions.items()
+        }
+        return Program(self.block(program.body), program.lines, functions)
+
+    def block(self, body: List[Stmt]) -> List[Stmt]:
+        result = []
+        for stmt in body:
+            kind = stmt.__class__
+            message = stuck_loop(stmt, self.arrays) if kind is While or kind is Repeat else None
+            if message is None:
+                result.append(map_stmt(stmt, lambda node: node, self.block))
+                continue
+
+            self.rejected += 1
+            stop = [Fail(stmt.line, message)]
+            if kind is While:
+                # Condition vraie à l'entrée: elle le restera
+                result.append(While(stmt.line, stmt.cond, stop))
+            else:
+                # Un premier tour, puis l'erreur si la condition d'arrêt est fausse
+                result.extend(self.block(stmt.body))
+                result.append(While(stmt.line, Not(stmt.cond), stop))
+        return result
+
+
+def walk(body: List[Stmt]):
+    """Instructions du bloc et des blocs imbriqués, dans l'ordre du texte"""
+    for stmt in body:
+        yield stmt
+        if stmt.__class__ is If:
+            yield from walk(stmt.then_body)
+            yield from walk(stmt.else_body)
+        elif stmt.__class__ in (For, While, Repeat):
+            yield from walk(stmt.body)
+
+
+def undeclared(body: List[Stmt], declared: set) -> Dict[str, int]:
+    """Variables affectées, lues ou parcourues sans déclaration: nom -> première ligne"""
+    statements = list(walk(body))
+    declared = declared | {entry[0] for stmt in statements if stmt.__class__ in (Declare, DeclareArray)
+                           for entry in stmt.entries}
+    found: Dict[str, int] = {}
+    for stmt in statements:
+        kind = stmt.__class__
+        if kind is Assign or kind is Read:
+            name = stmt.name
+        elif kind is For:
+            name = stmt.var
+        else:
+            continue
+        if name not in declared:
+            found.setdefault(name, stmt.line)
+    return found
+
+
+def analyze(program: Program) -> List[Dict[str, Any]]:
+    """
+    Diagnostics d'un programme analysé, triés par ligne: boucles infinies
+    ('error', levée si la boucle est atteinte) et variables non
+    déclarées ('warning').
+    """
+    diagnostics = []
+    arrays = array_names(program)
+    scopes = [(program.body, set(), None)] + [
+        (function.body, {name for name, _ in function.params}, function)
+        for function in program.functions.values()
+    ]
+    for body, declared, function in scopes:
+        for stmt in walk(body):
+            if stmt.__class__ in LOOP_KEYWORDS:
+                message = stuck_loop(stmt, arrays)
+                if message is not None:
+                    diagnostics.append({'line': stmt.line, 'severity': 'error', 'kind': 'infinite_loop',
+                                        'message': message})
+        where = f" dans {function.kind} {function.name}" if function is not None else ""
+        for name, line in undeclared(body, declared).items():
+            diagnostics.append({'line': line, 'severity': 'warning', 'kind': 'undeclared',
+                                'message': f"Variable {name} utilisée sans déclaration{where}"})
+    diagnostics.sort(key=lambda diagnostic: diagnostic['line'])
+    return diagnostics
+
+
+TOO_DEEP = "Programme trop imbriqué pour être analysé"
+
+
+def error_diagnostic(error: BaseException) -> Dict[str, Any]:
+    """Diagnostic d'un programme refusé par l'analyse (syntaxe, imbrication trop profonde)"""
+    if isinstance(error, PseudoCodeError):
+        return {'line': error.line, 'severity': 'error', 'kind': 'syntax', 'message': error.message}
+    message = TOO_DEEP if isinstance(error, (RecursionError, MemoryError)) else str(error)
+    return {'line': 0, 'severity': 'error', 'kind': 'syntax', 'message': message}
+
+
+def analyze_program(program: Program) -> List[Dict[str, Any]]:
+    """`analyze`, sans exception pour un programme trop imbriqué"""
+    try:
+        return analyze(program)
+    except (RecursionError, MemoryError) as e:
+        return [error_diagnostic(e)]
+
+
+def analyze_code(code: str) -> List[Dict[str, Any]]:
+    """Diagnostics du code source, sans l'exécuter (blocs déséquilibrés compris)"""
+    try:
+        program = PseudoParser().parse(code)
+    except (PseudoCodeError, RecursionError, MemoryError) as e:
+        return [error_diagnostic(e)]
+    return analyze_program(program)
@@ -0,0 +1,156 @@
+"""
+Tableaux du pseudo-code
+=======================
+`notes: TABLEAU[1..10] DE REEL` déclare un tableau dont les indices vont
+de la borne basse à la borne haute, incluses (`TABLEAU t[10] : ENTIER`
+équivaut à `TABLEAU[1..10]`). Les bornes sont des expressions évaluées
+à la déclaration.
+
+- Les éléments ENTIER et REEL sont rangés dans un tampon du module
+  `array` ('q': entiers de 64 bits, 'd': réels double précision), soit
+  8 octets par élément au lieu d'une référence vers un objet Python par
+  élément. Les autres types (CHAINE, BOOLEEN, ...) restent dans une
+  liste.
+- Un ENTIER rangé dans un tableau de REEL devient un réel. Une valeur
+  que le tampon ne sait pas représenter (entier de plus de 64 bits,
+  réel dans un tableau d'ENTIER, texte, booléen) fait passer le tableau
+  en liste, une fois pour toutes: il garde alors les valeurs telles
+  quelles, comme une variable ordinaire.
+- Le contrôle des indices est une comparaison enchaînée sur les bornes
+  entières: aucune allocation à chaque accès. Un indice réel entier
+  (`n / 2` avec n pair) ou un texte numérique est accepté.
+
+La taille d'un tableau est bornée par `ExecutionLimits.max_array_length`.
+"""
+
+from array import array
+from typing import Any, Iterator, Optional
+
+from .pseudo_ast import PseudoCodeError
+from .pseudo_limits import ExecutionBudgetExceeded, ExecutionLimits
+
+# Types d'éléments rangés dans un tampon `array`, et valeurs qu'il accepte telles quelles
+TYPECODES = {'ENTIER': 'q', 'REEL': 'd'}
+ACCEPTED = {'ENTIER': (int,), 'REEL': (float, int)}
+
+# Valeur initiale des éléments selon leur type
+ELEMENT_DEFAULTS = {'ENTIER': 0, 'REEL': 0.0, 'CHAINE': "", 'CARACTERE': "", 'BOOLEEN': False}
+
+
+class PseudoArray:
+    """Tableau à bornes quelconques (indices de `low` à `high`)"""
+    __slots__ = ('name', 'element_type', 'low', 'high', 'items', 'accepted')
+
+    def __init__(self, name: str, element_type: str, low: int, high: int):
+        self.name = name
+        self.element_type = element_type
+        self.low = low
+        self.high = high
+        size = high - low + 1
+        typecode = TYPECODES.get(element_type)
+        if typecode is not None:
+            # Tampon rempli de zéros sans passer par des objets Python
+            self.items = array(typecode, bytes(8 * size))
+        else:
+            self.items = [ELEMENT_DEFAULTS.get(element_type)] * size
+        # Classes rangées directement dans le tampon (None: liste)
+        self.accepted = ACCEPTED.get(element_type)
+
+    @property
+    def type_name(self) -> str:
+        return f"TABLEAU[{self.low}..{self.high}] DE {self.element_type}"
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.items)
+
+    def __str__(self) -> str:
+        return "[" + ", ".join([str(item) for item in self.items]) + "]"
+
+    def __repr__(self) -> str:
+        return f"PseudoArray({self.name!r}, {self.type_name!r})"
+
+    def check(self, index: Any) -> int:
+        """Indice entier compris entre les bornes, sinon PseudoCodeError"""
+        if index.__class__ is not int:
+            index = self.convert_index(index)
+        if not self.low <= index <= self.high:
+            raise self.out_of_bounds(index)
+        return index
+
+    def get(self, index: Any) -> Any:
+        if index.__class__ is not int:
+            index = self.convert_index(index)
+        if not self.low <= index <= self.high:
+            raise self.out_of_bounds(index)
+        return self.items[index - self.low]
+
+    def set(self, index: Any, value: Any):
+        if index.__class__ is not int:
+            index = self.convert_index(index)
+        if not self.low <= index <= self.high:
+            raise self.out_of_bounds(index)
+        accepted = self.accepted
+        if accepted is None:
+            self.items[index - self.low] = value
+            return
+        if value.__class__ in accepted:
+            try:
+                self.items[index - self.low] = value
+                return
+            except OverflowError:
+                pass
+        # Valeur hors du tampon: le tableau passe en liste
+        self.accepted = None
+        self.items = list(self.items)
+        self.items[index - self.low] = value
+
+    def convert_index(self, index: Any) -> int:
+        """Indice non entier: réel sans partie décimale ou texte numérique"""
+        value = index
+        if isinstance(value, str):
+            try:
+                value = float(value.strip())
+            except ValueError:
+                pass
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        if value.__class__ is int:
+            return value
+        raise PseudoCodeError(f"Indice invalide pour le tableau {self.name}: {index}")
+
+    def out_of_bounds(self, index: int) -> PseudoCodeError:
+        return PseudoCodeError(
+            f"Indice {index} hors limites pour le tableau {self.name} (indices de {self.low} à {self.high})")
+
+
+def new_array(name: str, element_type: str, low: Any, high: Any,
+              limits: Optional[ExecutionLimits] = None) -> PseudoArray:
+    """Tableau déclaré avec les bornes évaluées `low` et `high`"""
+    bounds = []
+    for bound in (low, high):
+        if isinstance(bound, float) and bound.is_integer():
+            bound = int(bound)
+        elif isinstance(bound, str):
+            try:
+                bound = int(float(bound.strip()))
+            except ValueError:
+                pass
+        if bound.__class__ is not int:
+            raise PseudoCodeError(f"Bornes invalides pour le tableau {name}: {low}..{high}")
+        bounds.append(bound)
+    low, high = bounds
+    size = high - low + 1
+    if size < 1:
+        raise PseudoCodeError(f"Bornes invalides pour le tableau {name}: {low}..{high} (aucun élément)")
+    limit = limits.max_array_length if limits is not None else None
+    if limit is not None and size > limit:
+        raise ExecutionBudgetExceeded(
+            'max_array_length', f"Tableau trop grand ({size} éléments, limite de {limit})")
+    return PseudoArray(name, element_type, low, high)
+
+
+def not_an_array(name: str) -> PseudoCodeError:
+    return PseudoCodeError(f"{name} n'est pas un tableau (déclarez-le avec TABLEAU)")
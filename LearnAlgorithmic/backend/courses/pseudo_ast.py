@@ -0,0 +1,419 @@
+"""
+Arbre syntaxique du pseudo-code
+===============================
+Noeuds produits par `pseudo_parser.PseudoParser` et parcourus par
+`PseudoInterpreter`. Chaque instruction garde son numéro de ligne
+(ligne du code prétraité) pour les messages de `PseudoCodeError`.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class PseudoCodeError(Exception):
+    """Exception pour les erreurs d'exécution du pseudo-code"""
+    def __init__(self, message: str, line: int = None):
+        self.line = line
+        self.message = message
+        super().__init__(f"Ligne {line}: {message}" if line else message)
+
+    def with_line(self, line: int) -> 'PseudoCodeError':
+        """Copie de l'erreur rattachée à la ligne `line` (même classe)"""
+        error = self.__class__.__new__(self.__class__)
+        error.__dict__.update(self.__dict__)
+        error.line = line
+        error.args = (f"Ligne {line}: {self.message}" if line else self.message,)
+        return error
+
+
+class InputRequired(Exception):
+    """
+    LIRE sans valeur disponible dans une exécution interactive: la
+    machine virtuelle joint à l'exception son état (`state`) pour
+    reprendre sur cette instruction (voir `pseudo_session`). `var_type`
+    est le type attendu pour un élément de tableau.
+    """
+    def __init__(self, name: str, line: int = None, var_type: Optional[str] = None):
+        self.name = name
+        self.line = line
+        self.var_type = var_type
+        self.state = None
+        super().__init__(f"Ligne {line}: valeur attendue pour {name}" if line else f"Valeur attendue pour {name}")
+
+
+class Node:
+    """Classe de base des noeuds de l'arbre"""
+    __slots__ = ()
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{self.__class__.__name__}({fields})"
+
+
+# ---------------------------------------------------------------------------
+# Expressions
+# ---------------------------------------------------------------------------
+
+class Expr(Node):
+    """Expression"""
+    __slots__ = ()
+
+
+class Const(Expr):
+    """Valeur littérale (nombre, chaîne, booléen)"""
+    __slots__ = ('value',)
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class Var(Expr):
+    """Lecture de variable; une variable jamais affectée vaut son propre texte"""
+    __slots__ = ('name', 'text')
+
+    def __init__(self, name: str, text: str):
+        self.name = name
+        self.text = text
+
+
+class Lookup(Expr):
+    """Lecture de variable si elle existe, sinon évaluation de `fallback`"""
+    __slots__ = ('name', 'fallback')
+
+    def __init__(self, name: str, fallback: Expr):
+        self.name = name
+        self.fallback = fallback
+
+
+class Or(Expr):
+    """Disjonction évaluée en court-circuit (OU)"""
+    __slots__ = ('operands',)
+
+    def __init__(self, operands: List[Expr]):
+        self.operands = operands
+
+
+class And(Expr):
+    """Conjonction évaluée en court-circuit (ET)"""
+    __slots__ = ('operands',)
+
+    def __init__(self, operands: List[Expr]):
+        self.operands = operands
+
+
+class Not(Expr):
+    """Négation logique (NON)"""
+    __slots__ = ('operand',)
+
+    def __init__(self, operand: Expr):
+        self.operand = operand
+
+
+class Compare(Expr):
+    """Comparaison: =, ==, <>, !=, <, >, <=, >="""
+    __slots__ = ('op', 'left', 'right')
+
+    def __init__(self, op: str, left: Expr, right: Expr):
+        self.op = op
+        self.left = left
+        self.right = right
+
+
+class BinOp(Expr):
+    """Opération arithmétique: +, -, *, /, MOD, DIV
+
+    `source` = (lexèmes, début, position de l'opérateur, fin) permet de
+    reconstituer le texte des opérandes pour les messages d'erreur; la
+    liste des lexèmes est partagée par tous les noeuds d'une expression.
+    """
+    __slots__ = ('op', 'left', 'right', 'source')
+
+    def __init__(self, op: str, left: Expr, right: Expr,
+                 source: Optional[Tuple[List[str], int, int, int]] = None):
+        self.op = op
+        self.left = left
+        self.right = right
+        self.source = source
+
+    @property
+    def left_text(self) -> str:
+        if self.source is None:
+            return ""
+        tokens, start, split, _ = self.source
+        return ' '.join(tokens[start:split])
+
+    @property
+    def right_text(self) -> str:
+        if self.source is None:
+            return ""
+        tokens, _, split, end = self.source
+        return ' '.join(tokens[split + 1:end])
+
+
+class Index(Expr):
+    """Élément de tableau: nom[indice]"""
+    __slots__ = ('name', 'index')
+
+    def __init__(self, name: str, index: Expr):
+        self.name = name
+        self.index = index
+
+
+class Call(Expr):
+    """Appel de fonction prédéfinie (RACINE, PUISSANCE, ...)
+
+    Pour un nom inconnu, les arguments sont évalués puis `fallback`
+    donne la valeur de l'expression. `function` est la fonction Python
+    résolue par `pseudo_optimizer`.
+    """
+    __slots__ = ('name', 'args', 'fallback', 'function')
+
+    def __init__(self, name: str, args: List[Expr], fallback: Optional[Expr] = None,
+                 function: Optional[Callable[[list], Any]] = None):
+        self.name = name
+        self.args = args
+        self.fallback = fallback
+        self.function = function
+
+
+class Reuse(Expr):
+    """Sous-expression dont la valeur est mémorisée (`pseudo_optimizer.InvariantHoister`)
+
+    La valeur est rangée sous `slot` dans le cadre d'exécution courant
+    (programme principal ou appel de sous-programme). Avec `store`, elle
+    est toujours calculée (première occurrence d'une sous-expression
+    commune); sinon elle n'est calculée que si elle n'est pas encore
+    connue. Une boucle oublie à chaque entrée les valeurs de ses
+    invariants (`invariants` de For, While et Repeat).
+    """
+    __slots__ = ('slot', 'expr', 'store')
+
+    def __init__(self, slot: int, expr: Expr, store: bool = False):
+        self.slot = slot
+        self.expr = expr
+        self.store = store
+
+
+class FunctionCall(Expr):
+    """Appel d'une FONCTION du programme: nom(arguments)"""
+    __slots__ = ('name', 'args')
+
+    def __init__(self, name: str, args: List[Expr]):
+        self.name = name
+        self.args = args
+
+
+# ---------------------------------------------------------------------------
+# Instructions
+# ---------------------------------------------------------------------------
+
+class Stmt(Node):
+    """Instruction, rattachée à une ligne du code prétraité"""
+    __slots__ = ()
+
+
+class Nop(Stmt):
+    """Ligne sans effet (DEBUT, FIN, ligne non reconnue, ...)"""
+    __slots__ = ('line',)
+
+    def __init__(self, line: int):
+        self.line = line
+
+
+class Fail(Stmt):
+    """Ligne invalide: l'erreur est levée quand l'exécution l'atteint"""
+    __slots__ = ('line', 'message', 'error_line')
+
+    def __init__(self, line: int, message: str, error_line: int = None):
+        self.line = line
+        self.message = message
+        self.error_line = error_line if error_line is not None else line
+
+
+class Declare(Stmt):
+    """Déclaration de variables: `entries` contient (nom, expression initiale ou None)"""
+    __slots__ = ('line', 'var_type', 'entries')
+
+    def __init__(self, line: int, var_type: str, entries: List[Tuple[str, Optional[Expr]]]):
+        self.line = line
+        self.var_type = var_type
+        self.entries = entries
+
+
+class DeclareArray(Stmt):
+    """Déclaration de tableaux: `entries` contient (nom, borne basse, borne haute)"""
+    __slots__ = ('line', 'element_type', 'entries')
+
+    def __init__(self, line: int, element_type: str, entries: List[Tuple[str, Expr, Expr]]):
+        self.line = line
+        self.element_type = element_type
+        self.entries = entries
+
+
+class Assign(Stmt):
+    """Affectation: nom ← expression"""
+    __slots__ = ('line', 'name', 'expr')
+
+    def __init__(self, line: int, name: str, expr: Expr):
+        self.line = line
+        self.name = name
+        self.expr = expr
+
+
+class StoreItem(Stmt):
+    """Affectation d'un élément de tableau: nom[indice] ← expression"""
+    __slots__ = ('line', 'name', 'index', 'expr')
+
+    def __init__(self, line: int, name: str, index: Expr, expr: Expr):
+        self.line = line
+        self.name = name
+        self.index = index
+        self.expr = expr
+
+
+class Write(Stmt):
+    """ECRIRE / AFFICHER: les valeurs sont séparées par un espace"""
+    __slots__ = ('line', 'args')
+
+    def __init__(self, line: int, args: List[Expr]):
+        self.line = line
+        self.args = args
+
+
+class Read(Stmt):
+    """LIRE(nom)"""
+    __slots__ = ('line', 'name')
+
+    def __init__(self, line: int, name: str):
+        self.line = line
+        self.name = name
+
+
+class ReadItem(Stmt):
+    """LIRE(nom[indice])"""
+    __slots__ = ('line', 'name', 'index')
+
+    def __init__(self, line: int, name: str, index: Expr):
+        self.line = line
+        self.name = name
+        self.index = index
+
+
+class If(Stmt):
+    """SI ... ALORS ... SINON ... FINSI"""
+    __slots__ = ('line', 'cond', 'then_body', 'else_body')
+
+    def __init__(self, line: int, cond: Expr, then_body: List[Stmt], else_body: List[Stmt]):
+        self.line = line
+        self.cond = cond
+        self.then_body = then_body
+        self.else_body = else_body
+
+
+class For(Stmt):
+    """POUR var DE debut A fin [PAS n] FAIRE ... FINPOUR
+
+    `step` vaut None quand le pas n'est pas écrit: il est alors déduit des
+    bornes à l'exécution. `invariants`: emplacements des `Reuse` de la
+    boucle, oubliés à chaque entrée (de même pour While et Repeat).
+    """
+    __slots__ = ('line', 'var', 'start', 'end', 'step', 'body', 'invariants')
+
+    def __init__(self, line: int, var: str, start: Expr, end: Expr, step: Optional[int],
+                 body: List[Stmt], invariants: Tuple[int, ...] = ()):
+        self.line = line
+        self.var = var
+        self.start = start
+        self.end = end
+        self.step = step
+        self.body = body
+        self.invariants = invariants
+
+
+class While(Stmt):
+    """TANT QUE condition FAIRE ... FINTANTQUE"""
+    __slots__ = ('line', 'cond', 'body', 'invariants')
+
+    def __init__(self, line: int, cond: Expr, body: List[Stmt], invariants: Tuple[int, ...] = ()):
+        self.line = line
+        self.cond = cond
+        self.body = body
+        self.invariants = invariants
+
+
+class Repeat(Stmt):
+    """REPETER ... JUSQU'A condition"""
+    __slots__ = ('line', 'body', 'cond', 'invariants')
+
+    def __init__(self, line: int, body: List[Stmt], cond: Expr, invariants: Tuple[int, ...] = ()):
+        self.line = line
+        self.body = body
+        self.cond = cond
+        self.invariants = invariants
+
+
+class CallStmt(Stmt):
+    """Appel d'une PROCEDURE (ou d'une FONCTION dont le résultat est ignoré)"""
+    __slots__ = ('line', 'name', 'args')
+
+    def __init__(self, line: int, name: str, args: List[Expr]):
+        self.line = line
+        self.name = name
+        self.args = args
+
+
+class Return(Stmt):
+    """RETOURNER expression (sans expression: fin d'une PROCEDURE)"""
+    __slots__ = ('line', 'expr')
+
+    def __init__(self, line: int, expr: Optional[Expr]):
+        self.line = line
+        self.expr = expr
+
+
+class Function(Node):
+    """FONCTION ou PROCEDURE: paramètres (nom, type ou None) et corps
+
+    `line` est la ligne de l'en-tête, `end_line` celle du FIN.
+    """
+    __slots__ = ('name', 'procedure', 'params', 'return_type', 'body', 'line', 'end_line')
+
+    def __init__(self, name: str, procedure: bool, params: List[Tuple[str, Optional[str]]],
+                 return_type: Optional[str], body: List[Stmt], line: int, end_line: int):
+        self.name = name
+        self.procedure = procedure
+        self.params = params
+        self.return_type = return_type
+        self.body = body
+        self.line = line
+        self.end_line = end_line
+
+    @property
+    def kind(self) -> str:
+        return 'PROCEDURE' if self.procedure else 'FONCTION'
+
+    def local_types(self) -> Dict[str, str]:
+        """Types des paramètres au début d'un appel (un tableau garde le type de l'argument)"""
+        return {name: kind for name, kind in self.params if kind is not None and kind != 'TABLEAU'}
+
+    def check_call(self, count: int, needs_value: bool, line: int = None):
+        """Lève une erreur si l'appel ne convient pas (nombre d'arguments, PROCEDURE dans une expression)"""
+        if count != len(self.params):
+            raise PseudoCodeError(
+                f"{self.kind} {self.name}: {len(self.params)} argument(s) attendu(s), {count} reçu(s)", line)
+        if needs_value and self.procedure:
+            raise PseudoCodeError(f"La PROCEDURE {self.name} ne retourne pas de valeur", line)
+
+
+class Program(Node):
+    """
+    Programme compilé: instructions de premier niveau, lignes prétraitées,
+    sous-programmes et diagnostics de l'analyse statique (`pseudo_analysis`)
+    """
+    __slots__ = ('body', 'lines', 'functions', 'diagnostics')
+
+    def __init__(self, body: List[Stmt], lines: List[str], functions: Optional[Dict[str, Function]] = None,
+                 diagnostics: Optional[List[Dict[str, Any]]] = None):
+        self.body = body
+        self.lines = lines
+        self.functions = functions or {}
+        self.diagnostics = diagnostics or []
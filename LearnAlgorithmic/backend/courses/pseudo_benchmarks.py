@@ -0,0 +1,393 @@
+"""
+Micro-benchmarks de l'interpréteur de pseudo-code
+=================================================
+Scénarios mesurés par `python manage.py benchmark_interpreter` (ou
+`python -m courses.pseudo_benchmarks`). Chaque scénario retourne des
+lignes (libellé, valeur, unité); les temps sont le meilleur de plusieurs
+répétitions.
+"""
+
+import json
+import sys
+import time
+from array import array
+from typing import Callable, Dict, List, Tuple
+
+from .pseudo_cache import ProgramCache
+from .pseudo_interpreter import BACKENDS, PseudoInterpreter
+from .pseudo_limits import ExecutionLimits
+from .pseudo_parser import PseudoParser, preprocess
+from .pseudo_transpiler import TrustedInterpreter
+
+
+Result = Tuple[str, float, str]
+
+REPEAT = 5
+
+# Programme représentatif des exercices (déclarations, lecture, boucle, condition)
+SAMPLE_PROGRAM = """
+ALGORITHME Exemple
+VARIABLES: n, i, somme : entier
+DEBUT
+    somme ← 0
+    LIRE(n)
+    POUR i DE 1 A n FAIRE
+        SI i MOD 2 = 0 ALORS
+            somme ← somme + i
+        SINON
+            ECRIRE("impair", i)
+        FINSI
+    FINPOUR
+    TANT QUE somme > 10 FAIRE
+        somme ← somme - 10
+    FINTANTQUE
+    ECRIRE(somme)
+FIN
+"""
+
+# Tri à bulles d'un tableau rempli dans le désordre (permutation de 0..n-1). Les bornes
+# "n-1" et "n-i" sont écrites sans espaces: POUR lit "A n - i" comme "A n"
+BUBBLE_SORT_PROGRAM = """
+VARIABLES: i, j, n, temp : entier
+tab : TABLEAU[1..{size}] DE ENTIER
+DEBUT
+    n ← {size}
+    POUR i DE 1 A n FAIRE
+        tab[i] ← (i * 7919) MOD n
+    FINPOUR
+    POUR i DE 1 A n-1 FAIRE
+        POUR j DE 1 A n-i FAIRE
+            SI tab[j] > tab[j + 1] ALORS
+                temp ← tab[j]
+                tab[j] ← tab[j + 1]
+                tab[j + 1] ← temp
+            FINSI
+        FINPOUR
+    FINPOUR
+    ECRIRE(tab[1], tab[n DIV 2], tab[n])
+FIN
+"""
+
+
+# Erreur fréquente: la variable de la condition n'est jamais modifiée dans la boucle
+STUCK_LOOP_PROGRAM = """
+VARIABLES: n, i, somme : entier
+DEBUT
+    LIRE(n)
+    somme ← 0
+    i ← 1
+    TANT QUE i <= n FAIRE
+        somme ← somme + i
+    FINTANTQUE
+    ECRIRE(somme)
+FIN
+"""
+
+
+# Récursion naïve: fib(n) fait 2 * fib(n + 1) - 1 appels
+RECURSION_PROGRAM = """
+FONCTION fib(n: ENTIER): ENTIER
+DEBUT
+    SI n < 2 ALORS
+        RETOURNER n
+    FINSI
+    RETOURNER fib(n - 1) + fib(n - 2)
+FIN
+FONCTION fact(n: ENTIER): ENTIER
+DEBUT
+    SI n <= 1 ALORS
+        RETOURNER 1
+    FINSI
+    RETOURNER n * fact(n - 1)
+FIN
+DEBUT
+    ECRIRE(fib({n}), fact({depth}) MOD 1000007)
+FIN
+"""
+
+
+# Calculs qui ne changent pas dans la boucle: n * n, RACINE(n), LONGUEUR(mot)
+INVARIANT_PROGRAM = """
+VARIABLES: n, i, somme : entier
+mot : chaine
+DEBUT
+    n ← {size}
+    mot ← "algorithme"
+    somme ← 0
+    POUR i DE 1 A n FAIRE
+        SI i * 2 < n * n ALORS
+            somme ← somme + (i MOD 7) * (i MOD 7) + ENT(RACINE(n)) + LONGUEUR(mot)
+        FINSI
+    FINPOUR
+    ECRIRE(somme)
+FIN
+"""
+
+
+def best_time(func: Callable[[], object], number: int = 1, repeat: int = REPEAT) -> float:
+    """Meilleur temps (secondes) d'un appel de `func` sur `repeat` séries de `number` appels"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def per_statement(body: str, iterations: int = 1000) -> Dict[str, float]:
+    """Temps par passage sur une instruction de `body`, répétée dans une boucle POUR"""
+    statements = len(preprocess(body))
+    code = f"x ← 0\nPOUR k DE 1 A {iterations} FAIRE\n{body}\nFINPOUR"
+    visits = iterations * statements
+    timings = {}
+    for backend in BACKENDS:
+        interpreter = PseudoInterpreter(backend=backend)
+        compiled = interpreter.compile(code)
+        timings[backend] = best_time(lambda: interpreter.run(compiled)) / visits
+    return timings
+
+
+def bench_dispatch() -> List[Result]:
+    """Coût d'aiguillage: classification d'une ligne à l'analyse, instruction à l'exécution"""
+    lines = preprocess(SAMPLE_PROGRAM)
+    classify = PseudoParser.classify
+    results = [
+        ("analyse: classification d'une ligne",
+         best_time(lambda: [classify(line) for line in lines], 200) / len(lines) * 1e9, 'ns'),
+        ("analyse: programme d'exemple complet",
+         best_time(lambda: PseudoParser().parse(SAMPLE_PROGRAM), 50) * 1e6, 'us'),
+    ]
+    for label, body in (("instruction vide", "DEBUT\n" * 8),
+                        ("affectation x ← x + 1", "x ← x + 1\n" * 8)):
+        for backend, seconds in per_statement(body).items():
+            results.append((f"exécution ({backend}): {label}", seconds * 1e9, 'ns'))
+    return results
+
+
+def bench_expressions() -> List[Result]:
+    """Analyse de sommes longues: le coût par terme doit rester constant"""
+    names = {f"x{i}" for i in range(7)}
+    results = []
+    for terms in (50, 100, 200, 400):
+        expr = " + ".join(f"x{i % 7}" for i in range(terms))
+        for label, method in (("une passe", 'expression'), ("découpage historique", 'split_expression')):
+            def parse():
+                parser = PseudoParser()
+                parser.names = names
+                getattr(parser, method)(expr)
+            seconds = best_time(parse, 5)
+            results.append((f"{label}: somme de {terms} termes", seconds * 1e6, 'us'))
+            results.append((f"{label}: par terme", seconds / terms * 1e9, 'ns'))
+    return results
+
+
+def bench_constants() -> List[Result]:
+    """Sous-expressions constantes et concaténation de texte, par passage"""
+    results = []
+    for label, body in (("x ← x + 2 * 3 - 10 DIV 4", "x ← x + 2 * 3 - 10 DIV 4\n" * 8),
+                        ('s ← "total: " + x', 's ← "total: " + x\n' * 8)):
+        for backend, seconds in per_statement(body).items():
+            results.append((f"exécution ({backend}): {label}", seconds * 1e9, 'ns'))
+    return results
+
+
+def bench_sandbox() -> List[Result]:
+    """Coût de l'exécution isolée: démarrage du pool, aller-retour par tube"""
+    from .pseudo_sandbox import SandboxPool
+
+    start = time.perf_counter()
+    pool = SandboxPool(size=1)
+    started = time.perf_counter() - start
+    try:
+        pool.execute(SAMPLE_PROGRAM, ["20"])
+        # Le processus isolé garde ses programmes compilés: même chose ici
+        interpreter = PseudoInterpreter(cache=ProgramCache())
+        return [
+            ("démarrage du pool (1 processus)", started * 1e3, 'ms'),
+            ("programme d'exemple, dans le processus",
+             best_time(lambda: interpreter.execute(SAMPLE_PROGRAM, ["20"]), 20) * 1e6, 'us'),
+            ("programme d'exemple, processus isolé",
+             best_time(lambda: pool.execute(SAMPLE_PROGRAM, ["20"]), 20) * 1e6, 'us'),
+        ]
+    finally:
+        pool.close()
+
+
+def bench_snapshots() -> List[Result]:
+    """Taille des états d'une simulation de boucle: états complets ou différences"""
+    from .pseudo_snapshots import materialize, reconstruct
+    from .pseudo_tracer import TracingInterpreter, trace_to_steps
+
+    interpreter = TracingInterpreter()
+    interpreter.execute(SAMPLE_PROGRAM, ["200"])
+    states = [step['state_data'] for step in trace_to_steps(interpreter.trace)]
+    full = [{'variables': variables, 'current_line': state.get('current_line')}
+            for variables, state in zip(materialize(states), states)]
+    middle = len(states) // 2
+    return [
+        ("étapes de la trace", len(states), ''),
+        ("états complets (JSON)", len(json.dumps(full)) / 1024, 'KiB'),
+        ("différences + images clés (JSON)", len(json.dumps(states)) / 1024, 'KiB'),
+        ("état à l'étape N (reconstruction)", best_time(lambda: reconstruct(states, middle), 200) * 1e6, 'us'),
+    ]
+
+
+def bench_arrays(size: int = 1000) -> List[Result]:
+    """Tri à bulles de `size` entiers: temps par moteur et place occupée par le tableau"""
+    code = BUBBLE_SORT_PROGRAM.format(size=size)
+    comparisons = size * (size - 1) // 2
+    # Environ 3 passages par comparaison: le budget ordinaire n'y suffirait pas
+    limits = ExecutionLimits(max_iterations=10 * comparisons + 10 * size, wall_time=None, cpu_time=None)
+    results = []
+    for backend in BACKENDS:
+        interpreter = PseudoInterpreter(backend=backend, limits=limits)
+        compiled = interpreter.compile(code)
+        success, output, error = interpreter.run(compiled)
+        if not success or output != f"0 {size // 2 - 1} {size - 1}":
+            raise RuntimeError(f"Tri à bulles incorrect ({backend}): {error or output}")
+        seconds = best_time(lambda: interpreter.run(compiled), repeat=2)
+        results.append((f"tri à bulles de {size} entiers ({backend})", seconds * 1e3, 'ms'))
+        results.append((f"  par comparaison ({backend})", seconds / comparisons * 1e9, 'ns'))
+
+    # Entiers hors du cache des petits entiers de Python: un objet chacun dans une liste
+    values = list(range(1000, 1000 + size))
+    buffer = array('q', values)
+    results.append((f"tableau de {size} ENTIER (tampon 'q')", buffer.buffer_info()[1] * buffer.itemsize / 1024, 'KiB'))
+    results.append(("liste Python équivalente",
+                    (sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values)) / 1024, 'KiB'))
+    return results
+
+
+def bench_recursion(n: int = 18, depth: int = 900) -> List[Result]:
+    """Appels de FONCTION: fib(n) naïf (coût par appel) et factorielle à `depth` appels imbriqués"""
+    code = RECURSION_PROGRAM.format(n=n, depth=depth)
+    fib = [0, 1]
+    for _ in range(n):
+        fib.append(fib[-1] + fib[-2])
+    calls = 2 * fib[n + 1] - 1
+    fact = 1
+    for i in range(2, depth + 1):
+        fact *= i
+    expected = f"{fib[n]} {fact % 1000007}"
+    limits = ExecutionLimits(max_iterations=10 * calls + 10 * depth, wall_time=None, cpu_time=None)
+    results = []
+    for backend in BACKENDS:
+        interpreter = PseudoInterpreter(backend=backend, limits=limits)
+        compiled = interpreter.compile(code)
+        success, output, error = interpreter.run(compiled)
+        if not success or output != expected:
+            raise RuntimeError(f"Récursion incorrecte ({backend}): {error or output}")
+        seconds = best_time(lambda: interpreter.run(compiled), repeat=3)
+        results.append((f"fib({n}) + fact({depth}) ({backend})", seconds * 1e3, 'ms'))
+        results.append((f"  par appel ({backend})", seconds / (calls + depth) * 1e6, 'us'))
+    return results
+
+
+def bench_invariants(size: int = 20000) -> List[Result]:
+    """Boucle aux calculs invariants, avec et sans valeurs mémorisées"""
+    code = INVARIANT_PROGRAM.format(size=size)
+    limits = ExecutionLimits(max_iterations=10 * size, wall_time=None, cpu_time=None)
+    results = []
+    for backend in BACKENDS:
+        outputs = {}
+        for hoist in (False, True):
+            interpreter = PseudoInterpreter(backend=backend, limits=limits)
+            interpreter.hoist_invariants = hoist
+            compiled = interpreter.compile(code)
+            success, outputs[hoist], error = interpreter.run(compiled)
+            if not success:
+                raise RuntimeError(f"Boucle invariante en échec ({backend}): {error}")
+            label = "mémorisés" if hoist else "recalculés"
+            seconds = best_time(lambda: interpreter.run(compiled), repeat=3)
+            results.append((f"{size} tours, invariants {label} ({backend})", seconds * 1e3, 'ms'))
+        if outputs[False] != outputs[True]:
+            raise RuntimeError(f"Résultats différents avec les valeurs mémorisées ({backend})")
+        results.append((f"  calculs évités ({backend})", interpreter.elided_evaluations, ''))
+    return results
+
+
+def bench_stuck_loops(cases: int = 10) -> List[Result]:
+    """Correction d'une soumission dont la boucle TANT QUE ne s'arrête pas, avec et sans `LoopChecker`"""
+    test_cases = [{'inputs': [str(n)], 'expected_output': str(n * (n + 1) // 2)} for n in range(1, cases + 1)]
+    results = []
+    for backend in BACKENDS:
+        for check in (False, True):
+            interpreter = PseudoInterpreter(backend=backend)
+            interpreter.check_loops = check
+            compiled = interpreter.compile(STUCK_LOOP_PROGRAM)
+
+            def grade():
+                for case in test_cases:
+                    interpreter.run(compiled, case['inputs'])
+
+            success, _, error = interpreter.run(compiled, test_cases[0]['inputs'])
+            if success or "Boucle infinie" not in error:
+                raise RuntimeError(f"Boucle sans fin non arrêtée ({backend}): {error}")
+            label = "arrêtée à l'entrée" if check else "budget épuisé"
+            seconds = best_time(grade, repeat=3)
+            results.append((f"{cases} cas de test, {label} ({backend})", seconds * 1e3, 'ms'))
+    return results
+
+
+def bench_transpiler(size: int = 150, n: int = 16) -> List[Result]:
+    """Contenu de confiance (solutions): programme précompilé exécuté par chaque moteur et par sa traduction Python"""
+    programs = (
+        (f"tri à bulles de {size} ENTIER", BUBBLE_SORT_PROGRAM.format(size=size)),
+        (f"fib({n})", RECURSION_PROGRAM.format(n=n, depth=10)),
+        (f"boucle de {size * 20} tours", INVARIANT_PROGRAM.format(size=size * 20)),
+    )
+    limits = ExecutionLimits(max_iterations=10 ** 7, wall_time=None, cpu_time=None)
+    results = []
+    for label, code in programs:
+        interpreters = [PseudoInterpreter(backend=backend, limits=limits) for backend in BACKENDS]
+        interpreters.append(TrustedInterpreter(limits=limits))
+        expected = None
+        for interpreter in interpreters:
+            compiled = interpreter.compile(code)
+            outcome = interpreter.run(compiled)
+            if expected is None:
+                expected = outcome
+            elif outcome != expected:
+                raise RuntimeError(f"Résultats différents ({label}, {interpreter.backend}): {outcome}")
+            seconds = best_time(lambda: interpreter.run(compiled), repeat=3)
+            results.append((f"{label} ({interpreter.backend})", seconds * 1e3, 'ms'))
+        seconds = best_time(lambda: interpreters[-1].lower(PseudoParser().parse(code)), repeat=3)
+        results.append((f"  traduction et compile() ({label})", seconds * 1e3, 'ms'))
+    return results
+
+
+SCENARIOS: Dict[str, Callable[[], List[Result]]] = {
+    'dispatch': bench_dispatch,
+    'expressions': bench_expressions,
+    'constants': bench_constants,
+    'sandbox': bench_sandbox,
+    'snapshots': bench_snapshots,
+    'arrays': bench_arrays,
+    'recursion': bench_recursion,
+    'invariants': bench_invariants,
+    'stuck_loops': bench_stuck_loops,
+    'transpiler': bench_transpiler,
+}
+
+
+def run_scenarios(names: List[str] = None) -> Dict[str, List[Result]]:
+    """Exécute les scénarios demandés (tous par défaut)"""
+    names = names or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"Scénario inconnu: {', '.join(unknown)}")
+    return {name: SCENARIOS[name]() for name in names}
+
+
+def format_results(results: Dict[str, List[Result]]) -> str:
+    lines = []
+    for name, rows in results.items():
+        lines.append(f"[{name}]")
+        for label, value, unit in rows:
+            lines.append(f"  {label:<50} {value:>12.1f} {unit}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    print(format_results(run_scenarios(sys.argv[1:])))
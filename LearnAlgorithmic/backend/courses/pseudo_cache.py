@@ -0,0 +1,177 @@
+"""
+Cache des programmes compilés
+=============================
+Un même code est souvent exécuté plusieurs fois: une fois par cas de test
+dans `validate_pseudo_code`, et à chaque clic sur "Exécuter" quand
+l'apprenant relance un code inchangé. Le cache évite de refaire le
+prétraitement et l'analyse: les programmes sont indexés par l'empreinte
+SHA-256 du code source.
+
+- Cache local au processus: LRU borné en nombre d'entrées et en octets
+  (taille du programme sérialisé).
+- Cache partagé optionnel: n'importe quel objet offrant `get`/`set` comme
+  le framework de cache de Django. Il contient l'arbre sérialisé, de sorte
+  que les workers gunicorn profitent des analyses des autres; l'abaissement
+  vers la machine virtuelle reste local (les instructions contiennent des
+  fonctions Python, non sérialisables).
+
+Les programmes dont les blocs sont déséquilibrés ne sont pas mis en cache:
+l'erreur est levée à chaque appel.
+"""
+
+import hashlib
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+from .pseudo_parser import PseudoParser
+
+
+# À incrémenter quand la structure de l'arbre (pseudo_ast) change: les
+# entrées sérialisées par une version précédente sont alors ignorées.
+CACHE_FORMAT_VERSION = 7
+
+
+class ProgramCache:
+    """Cache LRU des programmes compilés, indexé par l'empreinte du code"""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 8 * 1024 * 1024,
+                 shared: Any = None, timeout: Optional[int] = 3600, key_prefix: str = 'pseudo-program'):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self.timeout = timeout
+        self.key_prefix = f"{key_prefix}:v{CACHE_FORMAT_VERSION}"
+        self._entries: 'OrderedDict[tuple, tuple]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def fingerprint(code: str) -> str:
+        """Empreinte SHA-256 du code source"""
+        return hashlib.sha256(code.encode('utf-8')).hexdigest()
+
+    def get_or_compile(self, code: str, backend: str, lower: Callable) -> Any:
+        """
+        Retourne le programme compilé pour `backend`.
+
+        En cas d'absence, le code est analysé (ou relu depuis le cache
+        partagé), puis `lower(program)` le prépare pour le moteur.
+        """
+        digest = self.fingerprint(code)
+        local_key = (backend, digest)
+
+        with self._lock:
+            entry = self._entries.get(local_key)
+            if entry is not None:
+                self._entries.move_to_end(local_key)
+                self.hits += 1
+                return entry[0]
+
+        program = None
+        data = None
+        if self.shared is not None:
+            program, data = self._load_shared(digest)
+
+        if program is None:
+            program = PseudoParser().parse(code)
+            data = pickle.dumps(program, pickle.HIGHEST_PROTOCOL)
+            if self.shared is not None:
+                self.shared.set(f"{self.key_prefix}:{digest}", data, self.timeout)
+            with self._lock:
+                self.misses += 1
+        else:
+            with self._lock:
+                self.shared_hits += 1
+
+        compiled = lower(program)
+        self._store(local_key, compiled, len(data))
+        return compiled
+
+    def _load_shared(self, digest: str):
+        """Relit un arbre depuis le cache partagé: (programme, données) ou (None, None)"""
+        data = self.shared.get(f"{self.key_prefix}:{digest}")
+        if data is None:
+            return None, None
+        try:
+            return pickle.loads(data), data
+        except Exception:
+            # Entrée illisible (version du code différente): on la recalcule
+            return None, None
+
+    def _store(self, key: tuple, compiled: Any, size: int):
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (compiled, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def clear(self):
+        """Vide le cache local et remet les compteurs à zéro"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = self.shared_hits = self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Compteurs du cache local"""
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'shared_hits': self.shared_hits,
+                'misses': self.misses,
+                'hit_rate': round((self.hits + self.shared_hits) / lookups, 3) if lookups else 0.0,
+                'shared': self.shared is not None,
+            }
+
+
+_program_cache: Optional[ProgramCache] = None
+
+
+def get_program_cache() -> ProgramCache:
+    """
+    Cache du processus, configuré par `settings.PSEUDO_PROGRAM_CACHE`.
+
+    Hors de Django (script, tests), un cache local avec les valeurs par
+    défaut est utilisé.
+    """
+    global _program_cache
+    if _program_cache is None:
+        options = {}
+        shared = None
+        try:
+            from django.conf import settings
+            from django.core.exceptions import ImproperlyConfigured
+        except ImportError:
+            settings = None
+        if settings is not None:
+            try:
+                options = getattr(settings, 'PSEUDO_PROGRAM_CACHE', {})
+            except ImproperlyConfigured:
+                options = {}
+            alias = options.get('SHARED_CACHE_ALIAS')
+            if alias:
+                from django.core.cache import caches
+                shared = caches[alias]
+        _program_cache = ProgramCache(
+            max_entries=options.get('MAX_ENTRIES', 256),
+            max_bytes=options.get('MAX_BYTES', 8 * 1024 * 1024),
+            shared=shared,
+            timeout=options.get('TIMEOUT', 3600),
+        )
+    return _program_cache
@@ -4,8 +4,30 @@ Interpréteur de Pseudo-Code Algorithmique
 Ce module permet d'exécuter du pseudo-code algorithmique et de valider
 les résultats par rapport aux sorties attendues.
 
+Le code est d'abord analysé une seule fois en arbre syntaxique
+(`pseudo_parser`), puis l'interpréteur parcourt cet arbre: les boucles
+ne ré-analysent plus le texte à chaque itération. Les expressions
+constantes sont calculées une fois pour toutes (`pseudo_optimizer`)
+avant l'exécution, une boucle dont la condition ne peut pas changer est
+arrêtée dès son entrée (`pseudo_analysis`), et les invariants de boucle comme les
+sous-expressions répétées ne sont calculés qu'une fois
+(`elided_evaluations` compte les calculs évités). Avec `backend='vm'`, l'arbre est abaissé en
+instructions pour la machine virtuelle de `pseudo_vm`; les deux moteurs
+produisent le même résultat. Chaque exécution est bornée par les
+budgets de `pseudo_limits` (temps, taille de la sortie et des valeurs,
+profondeur des appels).
+
+Un appel de FONCTION ou de PROCEDURE s'exécute dans ses propres
+variables: ses paramètres et ses variables locales. Les variables du
+programme principal n'y sont pas visibles; un tableau passé en argument
+est partagé (passage par référence), les autres valeurs sont copiées.
+Le moteur 'tree' exécute les appels par récursion Python (la limite de
+récursion de Python est relevée en conséquence); la machine virtuelle
+empile ses propres cadres.
+
 Syntaxe supportée:
 - Déclarations: entier x, reel y, chaine nom, booleen actif
+- Tableaux: tab: TABLEAU[1..10] DE ENTIER, tab[i] ← 5, LIRE(tab[i])
 - Affectation: x ← 5 ou x <- 5
 - Opérations: +, -, *, /, MOD, DIV
 - Comparaisons: =, <>, <, >, <=, >=
@@ -14,33 +36,215 @@ Syntaxe supportée:
 - Boucles: POUR ... DE ... A ... FAIRE ... FINPOUR
 - Boucles: TANT QUE ... FAIRE ... FINTANTQUE
 - Entrées/Sorties: LIRE(x), ECRIRE(x), AFFICHER(x)
+- Sous-programmes: FONCTION f(a, b: ENTIER): ENTIER ... RETOURNER a + b ... FIN,
+  PROCEDURE p(t: TABLEAU DE ENTIER) ... FIN, appel: p(tab) ou APPELER p(tab)
 """
 
 import re
 import math
-from typing import Dict, List, Tuple, Any, Optional
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache
+from typing import Callable, Dict, List, Tuple, Any, Optional
+
+from .pseudo_analysis import TOO_DEEP, LoopChecker, analyze_program, error_diagnostic
+from .pseudo_arrays import ELEMENT_DEFAULTS, PseudoArray, new_array, not_an_array
+from .pseudo_ast import (
+    And, Assign, BinOp, Call, CallStmt, Compare, Const, Declare, DeclareArray, Expr, Fail, For, Function,
+    FunctionCall, If, Index, InputRequired, Lookup, Nop, Not, Or, Program, Read, ReadItem, Repeat, Return,
+    Reuse, Stmt, StoreItem, Var, While, Write, PseudoCodeError,
+)
+from .pseudo_cache import ProgramCache
+from .pseudo_limits import (
+    TIME_CHECK_INTERVAL, ExecutionBudgetExceeded, ExecutionClock, ExecutionLimits,
+    activate, call_depth_exceeded, check_value, deactivate, format_text, power, value_too_large,
+)
+from .pseudo_optimizer import ConstantFolder, InvariantHoister
+from .pseudo_parser import PseudoParser
+from .pseudo_vm import Bytecode, BytecodeCompiler, PseudoVM
+
+
+# Fonctions mathématiques prédéfinies
+BUILTINS = {
+    'ABS': lambda args: abs(args[0]),
+    'RACINE': lambda args: math.sqrt(args[0]),
+    'SQRT': lambda args: math.sqrt(args[0]),
+    'CARRE': lambda args: args[0] ** 2,
+    'SQR': lambda args: args[0] ** 2,
+    'PUISSANCE': lambda args: power(args[0], args[1]),
+    'POW': lambda args: power(args[0], args[1]),
+    'ENT': lambda args: int(args[0]),
+    'INT': lambda args: int(args[0]),
+    'ARRONDI': lambda args: round(args[0]),
+    'ROUND': lambda args: round(args[0]),
+    'LONGUEUR': lambda args: len(str(args[0])),
+    'LEN': lambda args: len(str(args[0])),
+}
+
+COMPARISONS = {
+    '<>': lambda a, b: a != b,
+    '!=': lambda a, b: a != b,
+    '<=': lambda a, b: a <= b,
+    '>=': lambda a, b: a >= b,
+    '<': lambda a, b: a < b,
+    '>': lambda a, b: a > b,
+    '==': lambda a, b: a == b,
+    '=': lambda a, b: a == b,
+}
+
+BACKENDS = ('tree', 'vm')
+
+# Nombres d'une sortie (comparaison tolérante dans `_outputs_match`)
+NUMBER_RE = re.compile(r'-?\d+\.?\d*')
+
+_MISSING = object()
+
+# Cadres Python par appel imbriqué du moteur 'tree' (appel, blocs,
+# instructions et expressions entre deux appels), avec de la marge
+PYTHON_FRAMES_PER_CALL = 25
+_recursion_lock = threading.Lock()
+
+
+def reserve_python_stack(depth: Optional[int]):
+    """
+    Relève la limite de récursion de Python pour que `depth` appels
+    imbriqués du moteur 'tree' tiennent dans la pile (elle n'est jamais
+    abaissée: d'autres exécutions peuvent être en cours).
+    """
+    if depth is None:
+        return
+    needed = depth * PYTHON_FRAMES_PER_CALL + 1000
+    with _recursion_lock:
+        if sys.getrecursionlimit() < needed:
+            sys.setrecursionlimit(needed)
+
+
+class FunctionReturn(Exception):
+    """RETOURNER dans le moteur 'tree': remonte jusqu'à l'appel du sous-programme"""
 
+    def __init__(self, value: Any):
+        self.value = value
 
-class PseudoCodeError(Exception):
-    """Exception pour les erreurs d'exécution du pseudo-code"""
-    def __init__(self, message: str, line: int = None):
-        self.line = line
-        self.message = message
-        super().__init__(f"Ligne {line}: {message}" if line else message)
+
+# Premiers caractères possibles d'un nombre pour int() ou float() (en plus
+# des chiffres): signe, point décimal, "inf"/"infinity" et "nan"
+NUMBER_START = set('+-.iInN')
+
+
+def _to_number(value: Any) -> Any:
+    """Convertit une valeur en nombre si possible"""
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        return _string_to_number(value)
+    return value
+
+
+def _string_to_number(value: str) -> Any:
+    """Nombre représenté par une chaîne, sinon la chaîne elle-même"""
+    text = value.strip()
+    # Un texte qui ne peut pas commencer un nombre est rejeté sans exception
+    if not text or not (text[0].isdigit() or text[0] in NUMBER_START):
+        return value
+    if len(value) > 64:
+        return _parse_number(value)
+    return _cached_number(value)
+
+
+def _parse_number(value: str) -> Any:
+    # Essayer de convertir en entier
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    # Essayer de convertir en réel
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+# Les mêmes chaînes reviennent à chaque tour de boucle: une seule conversion
+_cached_number = lru_cache(maxsize=4096)(_parse_number)
 
 
 class PseudoInterpreter:
-    """Interpréteur de pseudo-code algorithmique"""
+    """Interpréteur de pseudo-code algorithmique
 
-    def __init__(self):
+    `backend` choisit le moteur d'exécution: 'tree' parcourt l'arbre
+    syntaxique, 'vm' exécute les instructions de `pseudo_vm`. Avec un
+    `cache` (`pseudo_cache.ProgramCache`), un code déjà compilé n'est pas
+    analysé de nouveau. `limits` (`pseudo_limits.ExecutionLimits`) fixe le
+    budget de chaque exécution.
+    """
+
+    # Fonctions prédéfinies liées aux appels à la compilation
+    builtins: Dict[str, Callable[[list], Any]] = BUILTINS
+    # Mémorisation des invariants de boucle et sous-expressions communes (`InvariantHoister`)
+    hoist_invariants: bool = True
+    # Boucles sans fin arrêtées dès leur entrée (`pseudo_analysis.LoopChecker`)
+    check_loops: bool = True
+
+    def __init__(self, backend: str = 'tree', cache: Optional[ProgramCache] = None,
+                 limits: Optional[ExecutionLimits] = None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Moteur inconnu: {backend}")
+        self.backend = backend
+        self.cache = cache
+        self.limits = limits or ExecutionLimits()
         self.variables: Dict[str, Any] = {}
         self.variable_types: Dict[str, str] = {}
         self.output: List[str] = []
         self.input_values: List[str] = []
         self.input_index: int = 0
         self.current_line: int = 0
-        self.max_iterations: int = 10000  # Protection contre boucles infinies
+        self.max_iterations: int = self.limits.max_iterations  # Protection contre boucles infinies
         self.iteration_count: int = 0
+        self.output_bytes: int = 0
+        self.clock: Optional[ExecutionClock] = None
+        # Passage au-delà duquel `checkpoint` vérifie les itérations et les horloges
+        self.next_checkpoint: int = self.max_iterations
+        # Sous-programmes du programme en cours et nombre d'appels en cours
+        self.functions: Dict[str, Function] = {}
+        self.call_depth: int = 0
+        # Valeurs des `Reuse` du cadre courant, et calculs évités grâce à elles
+        self.reused: Dict[int, Any] = {}
+        self.elided_evaluations: int = 0
+        # Diagnostics de l'analyse statique du dernier programme exécuté (`execute`)
+        self.diagnostics: List[Dict[str, Any]] = []
+
+        self._executors = {
+            Nop: self.exec_nop,
+            Fail: self.exec_fail,
+            Declare: self.exec_declare,
+            DeclareArray: self.exec_declare_array,
+            Assign: self.exec_assign,
+            StoreItem: self.exec_store_item,
+            Write: self.exec_write,
+            Read: self.exec_read,
+            ReadItem: self.exec_read_item,
+            If: self.exec_if,
+            For: self.exec_for,
+            While: self.exec_while,
+            Repeat: self.exec_repeat,
+            CallStmt: self.exec_call,
+            Return: self.exec_return,
+        }
+        self._evaluators = {
+            Const: self.eval_const,
+            Var: self.eval_var,
+            Lookup: self.eval_lookup,
+            Index: self.eval_index,
+            Or: self.eval_or,
+            And: self.eval_and,
+            Not: self.eval_not,
+            Compare: self.eval_compare,
+            BinOp: self.eval_binop,
+            Call: self.eval_call,
+            FunctionCall: self.eval_function_call,
+            Reuse: self.eval_reuse,
+        }
 
     def reset(self):
         """Réinitialise l'interpréteur"""
@@ -50,6 +254,13 @@ class PseudoInterpreter:
         self.input_index = 0
         self.current_line = 0
         self.iteration_count = 0
+        self.output_bytes = 0
+        self.call_depth = 0
+        self.reused = {}
+        self.elided_evaluations = 0
+        self.clock = ExecutionClock(self.limits)
+        self.next_checkpoint = (min(TIME_CHECK_INTERVAL, self.max_iterations) if self.clock.enabled
+                                else self.max_iterations)
 
     def set_inputs(self, inputs: List[str]):
         """Définit les valeurs d'entrée pour LIRE()"""
@@ -60,841 +271,468 @@ class PseudoInterpreter:
         """Retourne la sortie sous forme de chaîne"""
         return "\n".join(str(o) for o in self.output)
 
-    def _to_number(self, value: Any) -> Any:
-        """Convertit une valeur en nombre si possible"""
-        if isinstance(value, (int, float)):
-            return value
-        if isinstance(value, str):
-            # Essayer de convertir en entier
-            try:
-                return int(value)
-            except ValueError:
-                pass
-            # Essayer de convertir en réel
-            try:
-                return float(value)
-            except ValueError:
-                pass
-        return value
+    def describe_variables(self) -> Dict[str, Dict[str, str]]:
+        """Variables après exécution, sous forme affichable: {nom: {'value', 'type'}}"""
+        return {
+            name: {'value': str(value), 'type': self.variable_types.get(name, 'inconnu')}
+            for name, value in self.variables.items()
+        }
+
+    def compile(self, code: str):
+        """Compile le code source pour le moteur choisi (Program ou Bytecode)"""
+        if self.cache is not None:
+            return self.cache.get_or_compile(code, self.backend, self.lower)
+        return self.lower(PseudoParser().parse(code))
+
+    def lower(self, program: Program):
+        """
+        Prépare un programme analysé pour le moteur choisi (boucles sans fin,
+        constantes, invariants), avec les diagnostics de l'analyse statique
+        """
+        diagnostics = analyze_program(program)
+        compiled = self.lower_program(program)
+        compiled.diagnostics = diagnostics
+        return compiled
+
+    def lower_program(self, program: Program):
+        if self.check_loops:
+            program = LoopChecker().check(program)
+        program = ConstantFolder(self.evaluate, self.builtins, _to_number).fold(program)
+        if self.hoist_invariants:
+            program = InvariantHoister().hoist(program)
+        if self.backend == 'vm':
+            return BytecodeCompiler(self.builtins, COMPARISONS, _to_number).compile(program)
+        return program
 
     def execute(self, code: str, inputs: List[str] = None) -> Tuple[bool, str, str]:
         """
         Exécute le pseudo-code et retourne (success, output, error_message)
         """
+        try:
+            compiled = self.compile(code)
+        except PseudoCodeError as e:
+            # Blocs déséquilibrés: signalés avant toute exécution
+            self.reset()
+            self.diagnostics = [error_diagnostic(e)]
+            return False, "", str(e)
+        except (RecursionError, MemoryError) as e:
+            # Imbrication trop profonde pour l'analyseur (pile Python épuisée)
+            self.reset()
+            self.diagnostics = [error_diagnostic(e)]
+            return False, "", TOO_DEEP
+        except Exception as e:
+            self.reset()
+            self.diagnostics = [error_diagnostic(e)]
+            return False, "", f"Erreur inattendue: {str(e)}"
+        self.diagnostics = compiled.diagnostics
+        return self.run(compiled, inputs)
+
+    def run(self, compiled, inputs: List[str] = None) -> Tuple[bool, str, str]:
+        """
+        Exécute un programme déjà compilé et retourne (success, output, error_message)
+        """
         self.reset()
         if inputs:
             self.set_inputs(inputs)
 
+        token = activate(self.limits)
         try:
-            # Prétraitement du code
-            lines = self.preprocess(code)
-
-            # Exécution
-            self.execute_block(lines, 0, len(lines))
-
+            self.run_compiled(compiled)
             return True, self.get_output(), ""
 
+        except InputRequired:
+            # Exécution interactive suspendue sur LIRE (pseudo_session)
+            raise
+
         except PseudoCodeError as e:
+            # Puissance, formatage ou indice refusés dans une expression: ligne courante
+            if e.line is None:
+                e = e.with_line(self.current_line)
             return False, self.get_output(), str(e)
+        except RecursionError:
+            # Pile Python épuisée avant `max_call_depth` (limite désactivée)
+            return False, self.get_output(), f"Ligne {self.current_line}: Récursion trop profonde"
         except Exception as e:
             return False, self.get_output(), f"Erreur inattendue: {str(e)}"
+        finally:
+            deactivate(token)
 
-    def preprocess(self, code: str) -> List[str]:
-        """Prétraite le code: supprime commentaires, normalise"""
-        lines = []
-        for line in code.split('\n'):
-            # Supprimer les commentaires
-            line = re.sub(r'//.*$', '', line)
-            line = re.sub(r'#.*$', '', line)
-
-            # Normaliser les espaces
-            line = line.strip()
-
-            # Supprimer le point-virgule en fin de ligne (style C/Pascal)
-            if line.endswith(';'):
-                line = line[:-1].strip()
-
-            # Ignorer les lignes vides
-            if line:
-                # Normaliser les flèches d'affectation
-                line = line.replace('<-', '←')
-                line = line.replace(':=', '←')
-
-                # Convertir = en ← pour les affectations (pas les comparaisons)
-                # Une affectation: variable = expression (pas dans SI, pas ==, pas <=, >=, <>)
-                line_upper = line.upper()
-                if '=' in line and '←' not in line:
-                    # Ne pas convertir si c'est une comparaison
-                    if not any(op in line for op in ['==', '<=', '>=', '<>', '!=']):
-                        # Ne pas convertir si c'est dans une condition SI ou TANT QUE
-                        if not line_upper.startswith('SI ') and not line_upper.startswith('TANT QUE'):
-                            # Convertir le premier = en ←
-                            line = line.replace('=', '←', 1)
-
-                lines.append(line)
-
-        return lines
-
-    def execute_block(self, lines: List[str], start: int, end: int) -> int:
-        """Exécute un bloc de code de start à end"""
-        i = start
-        while i < end:
-            self.current_line = i + 1
-            self.iteration_count += 1
-
-            if self.iteration_count > self.max_iterations:
-                raise PseudoCodeError("Boucle infinie détectée (trop d'itérations)", i + 1)
-
-            line = lines[i].upper()
-            original_line = lines[i]
-
-            # Ignorer lignes de structure vides
-            if line in ['DEBUT', 'FIN', 'ALGORITHME', 'PROGRAMME', 'VARIABLES', 'VAR']:
-                i += 1
-                continue
-
-            # Déclaration de variable
-            if self.is_declaration(line):
-                self.handle_declaration(original_line)
-                i += 1
-
-            # Affectation
-            elif '←' in original_line:
-                self.handle_assignment(original_line)
-                i += 1
-
-            # ECRIRE / AFFICHER
-            elif line.startswith('ECRIRE') or line.startswith('AFFICHER'):
-                self.handle_output(original_line)
-                i += 1
-
-            # LIRE
-            elif line.startswith('LIRE'):
-                self.handle_input(original_line)
-                i += 1
-
-            # SI ... ALORS
-            elif line.startswith('SI '):
-                i = self.handle_if(lines, i, end)
-
-            # POUR ... FAIRE
-            elif line.startswith('POUR '):
-                i = self.handle_for(lines, i, end)
-
-            # TANT QUE ... FAIRE
-            elif line.startswith('TANT QUE') or line.startswith('TANTQUE'):
-                i = self.handle_while(lines, i, end)
+    def run_compiled(self, compiled):
+        """Exécute le programme avec le moteur qui l'a compilé (arbre ou Bytecode)"""
+        if isinstance(compiled, Bytecode):
+            self.run_bytecode(compiled)
+        else:
+            self.functions = compiled.functions
+            if compiled.functions:
+                reserve_python_stack(self.limits.max_call_depth)
+            self.execute_block(compiled.body)
 
-            # REPETER ... JUSQU'A
-            elif line.startswith('REPETER') or line.startswith('RÉPÉTER'):
-                i = self.handle_repeat(lines, i, end)
+    def run_bytecode(self, bytecode: Bytecode):
+        PseudoVM(self).run(bytecode)
 
-            # Ligne non reconnue - peut être une expression ou affectation implicite
-            else:
-                # Essayer comme affectation sans flèche (format: var = valeur)
-                if '=' in original_line and '==' not in original_line and '<=' not in original_line and '>=' not in original_line and '<>' not in original_line:
-                    self.handle_assignment(original_line.replace('=', '←', 1))
-                i += 1
+    # ------------------------------------------------------------------
+    # Budget d'exécution
+    # ------------------------------------------------------------------
 
-        return i
+    def checkpoint(self, count: int, line: int) -> int:
+        """
+        Appelé quand le nombre de passages dépasse `next_checkpoint`:
+        vérifie la limite d'itérations et les horloges, puis retourne le
+        prochain point de contrôle.
+        """
+        if count > self.max_iterations:
+            raise PseudoCodeError("Boucle infinie détectée (trop d'itérations)", line)
+        self.clock.check(line)
+        self.next_checkpoint = min(count + TIME_CHECK_INTERVAL, self.max_iterations)
+        return self.next_checkpoint
+
+    def count_output(self, text: str, line: int):
+        """Ajoute une ligne de sortie au budget (octets UTF-8, retour à la ligne compris)"""
+        size = len(text) + 1 if text.isascii() else len(text.encode('utf-8')) + 1
+        self.output_bytes += size
+        limit = self.limits.max_output_bytes
+        if limit is not None and self.output_bytes > limit:
+            raise ExecutionBudgetExceeded(
+                'max_output_bytes', f"Sortie trop volumineuse (limite de {limit} octets)", line)
+
+    # ------------------------------------------------------------------
+    # Instructions
+    # ------------------------------------------------------------------
+
+    def execute_block(self, body: List[Stmt]):
+        """Exécute une suite d'instructions"""
+        executors = self._executors
+        for stmt in body:
+            self.current_line = stmt.line
+            self.iteration_count += 1
 
-    def is_declaration(self, line: str) -> bool:
-        """Vérifie si la ligne est une déclaration de variable"""
-        upper = line.upper()
-        types = ['ENTIER', 'REEL', 'RÉEL', 'CHAINE', 'CHAÎNE', 'BOOLEEN', 'BOOLÉEN', 'CARACTERE', 'CARACTÈRE']
+            if self.iteration_count > self.next_checkpoint:
+                self.checkpoint(self.iteration_count, stmt.line)
 
-        # Format 1: TYPE var1, var2 (ex: entier x, y)
-        if any(upper.startswith(t + ' ') or upper.startswith(t + ':') for t in types):
-            return True
+            executors[stmt.__class__](stmt)
 
-        # Format 2: var1, var2 : TYPE (ex: x, y : entier  ou  variables: x, y : entier)
-        if ':' in upper:
-            after_colon = upper.split(':')[-1].strip()
-            if any(after_colon.startswith(t) for t in types):
-                return True
+    def exec_nop(self, stmt: Nop):
+        pass
 
-        # Format 3: VARIABLES: var1, var2 : TYPE (ex: variables: annee, age : entier)
-        if upper.startswith('VARIABLES'):
-            # Enlever "VARIABLES" et ":" du début
-            rest = upper.replace('VARIABLES', '', 1).strip()
-            if rest.startswith(':'):
-                rest = rest[1:].strip()
-            # Vérifier si ça contient un type à la fin
-            if ':' in rest:
-                after_last_colon = rest.split(':')[-1].strip()
-                if any(after_last_colon.startswith(t) for t in types):
-                    return True
+    def exec_fail(self, stmt: Fail):
+        raise PseudoCodeError(stmt.message, stmt.error_line)
 
-        return False
-
-    def handle_declaration(self, line: str):
+    def exec_declare(self, stmt: Declare):
         """Traite une déclaration de variable"""
-        upper = line.upper()
-        types_list = ['ENTIER', 'REEL', 'RÉEL', 'CHAINE', 'CHAÎNE', 'BOOLEEN', 'BOOLÉEN', 'CARACTERE', 'CARACTÈRE']
-
-        var_type = None
-        var_names_str = ""
-
-        # Nettoyer la ligne si elle commence par "VARIABLES:" ou "VARIABLES :"
-        working_line = line
-        if upper.startswith('VARIABLES'):
-            working_line = line[len('VARIABLES'):].strip()
-            if working_line.startswith(':'):
-                working_line = working_line[1:].strip()
-        upper = working_line.upper()
-
-        # Format 1: TYPE var1, var2 (ex: entier x, y)
-        for t in types_list:
-            if upper.startswith(t):
-                var_type = t.replace('É', 'E').replace('Î', 'I')
-                var_names_str = working_line[len(t):].strip().lstrip(':').strip()
-                break
-
-        # Format 2: var1, var2 : TYPE (ex: x, y : entier  ou  annee, age, anneeac : entier)
-        if var_type is None and ':' in working_line:
-            parts = working_line.split(':')
-            if len(parts) >= 2:
-                potential_type = parts[-1].strip().upper()
-                for t in types_list:
-                    if potential_type.startswith(t):
-                        var_type = t.replace('É', 'E').replace('Î', 'I')
-                        # Les noms sont tout ce qui précède le dernier ":"
-                        var_names_str = ':'.join(parts[:-1]).strip()
-                        break
-
-        if not var_type:
-            return
-
-        # Extraire les noms de variables
-        var_names = [v.strip() for v in var_names_str.split(',')]
-
-        for var_name in var_names:
-            # Gérer l'initialisation inline: entier x ← 5
-            if '←' in var_name:
-                parts = var_name.split('←')
-                var_name = parts[0].strip()
-                init_value = parts[1].strip()
-                self.variable_types[var_name.lower()] = var_type
-                self.variables[var_name.lower()] = self.evaluate_expression(init_value)
+        var_type = stmt.var_type
+        for name, init in stmt.entries:
+            self.variable_types[name] = var_type
+            if init is not None:
+                value = self.evaluate(init)
+                check_value(value, self.limits, stmt.line)
+                self.variables[name] = value
             else:
-                var_name = var_name.strip()
-                if var_name:
-                    self.variable_types[var_name.lower()] = var_type
-                    # Valeur par défaut selon le type
-                    if var_type in ['ENTIER']:
-                        self.variables[var_name.lower()] = 0
-                    elif var_type in ['REEL']:
-                        self.variables[var_name.lower()] = 0.0
-                    elif var_type in ['CHAINE']:
-                        self.variables[var_name.lower()] = ""
-                    elif var_type in ['BOOLEEN']:
-                        self.variables[var_name.lower()] = False
-                    else:
-                        self.variables[var_name.lower()] = None
-
-    def handle_assignment(self, line: str):
-        """Traite une affectation"""
-        parts = line.split('←')
-        if len(parts) != 2:
-            raise PseudoCodeError(f"Affectation invalide: {line}", self.current_line)
-
-        var_name = parts[0].strip().lower()
-        expression = parts[1].strip()
-
-        value = self.evaluate_expression(expression)
-        self.variables[var_name] = value
+                self.variables[name] = self.default_value(var_type)
+
+    @staticmethod
+    def default_value(var_type: str) -> Any:
+        """Valeur par défaut selon le type"""
+        if var_type == 'ENTIER':
+            return 0
+        if var_type == 'REEL':
+            return 0.0
+        if var_type == 'CHAINE':
+            return ""
+        if var_type == 'BOOLEEN':
+            return False
+        return None
 
-    def handle_output(self, line: str):
+    def exec_assign(self, stmt: Assign):
+        """Traite une affectation"""
+        value = self.evaluate(stmt.expr)
+        kind = value.__class__
+        if kind is str:
+            if len(value) > self.limits.string_ceiling:
+                raise value_too_large(value, self.limits, stmt.line)
+        elif kind is int:
+            if value.bit_length() > self.limits.integer_bits_ceiling:
+                raise value_too_large(value, self.limits, stmt.line)
+        self.variables[stmt.name] = value
+
+    def exec_declare_array(self, stmt: DeclareArray):
+        """Traite une déclaration de tableaux"""
+        for name, low, high in stmt.entries:
+            array = new_array(name, stmt.element_type, self.evaluate(low), self.evaluate(high), self.limits)
+            self.variable_types[name] = array.type_name
+            self.variables[name] = array
+
+    def array(self, name: str) -> PseudoArray:
+        array = self.variables.get(name)
+        if array.__class__ is not PseudoArray:
+            raise not_an_array(name)
+        return array
+
+    def exec_store_item(self, stmt: StoreItem):
+        """Traite l'affectation d'un élément de tableau"""
+        array = self.array(stmt.name)
+        index = self.evaluate(stmt.index)
+        value = self.evaluate(stmt.expr)
+        check_value(value, self.limits, stmt.line)
+        array.set(index, value)
+
+    def exec_write(self, stmt: Write):
         """Traite ECRIRE ou AFFICHER"""
-        # Extraire le contenu entre parenthèses
-        match = re.search(r'\((.*)\)', line, re.IGNORECASE)
-        if match:
-            content = match.group(1)
-            # Évaluer chaque argument séparé par des virgules
-            args = self.split_arguments(content)
-            output_parts = []
-            for arg in args:
-                value = self.evaluate_expression(arg.strip())
-                output_parts.append(str(value))
-            self.output.append(" ".join(output_parts))
-        else:
-            # Format sans parenthèses: ECRIRE x
-            content = re.sub(r'^(ECRIRE|AFFICHER)\s*', '', line, flags=re.IGNORECASE)
-            value = self.evaluate_expression(content.strip())
-            self.output.append(str(value))
+        text = " ".join([str(self.evaluate(arg)) for arg in stmt.args])
+        self.count_output(text, self.current_line)
+        self.output.append(text)
 
-    def handle_input(self, line: str):
+    def exec_read(self, stmt: Read):
         """Traite LIRE"""
-        match = re.search(r'LIRE\s*\(([^)]+)\)', line, re.IGNORECASE)
-        if match:
-            var_name = match.group(1).strip().lower()
-        else:
-            var_name = re.sub(r'^LIRE\s*', '', line, flags=re.IGNORECASE).strip().lower()
+        self.variables[stmt.name] = self.read_input(stmt.name)
+
+    def exec_read_item(self, stmt: ReadItem):
+        """Traite LIRE sur un élément de tableau"""
+        array = self.array(stmt.name)
+        index = array.check(self.evaluate(stmt.index))
+        array.set(index, self.read_input(f"{stmt.name}[{index}]", array.element_type))
 
+    def read_input(self, var_name: str, var_type: Optional[str] = None) -> Any:
+        """
+        Consomme la prochaine entrée pour LIRE et retourne la valeur
+        convertie. `var_type` est le type attendu pour un élément de
+        tableau; sinon le type déclaré de la variable s'applique.
+        """
         if self.input_index < len(self.input_values):
             value_str = self.input_values[self.input_index]
             self.input_index += 1
 
             # Convertir selon le type attendu
-            var_type = self.variable_types.get(var_name, 'CHAINE')
+            if var_type is None:
+                var_type = self.variable_types.get(var_name, 'CHAINE')
             try:
                 if var_type == 'ENTIER':
-                    value = int(float(value_str))
+                    return int(float(value_str))
                 elif var_type == 'REEL':
-                    value = float(value_str)
+                    return float(value_str)
                 elif var_type == 'BOOLEEN':
-                    value = value_str.lower() in ['vrai', 'true', '1', 'oui']
+                    return value_str.lower() in ['vrai', 'true', '1', 'oui']
                 else:
-                    value = value_str
+                    return value_str
             except ValueError:
-                value = value_str
-
-            self.variables[var_name] = value
-        else:
-            # Si pas d'entrée fournie, utiliser une valeur par défaut selon le type
-            var_type = self.variable_types.get(var_name, None)
-
-            # Si le type n'est pas déclaré, deviner selon le nom de la variable
-            if var_type is None:
-                var_lower = var_name.lower()
-                # Noms typiques de variables numériques
-                if any(hint in var_lower for hint in ['annee', 'age', 'nombre', 'nb', 'num', 'compteur', 'i', 'j', 'k', 'n', 'somme', 'total', 'quantite', 'prix', 'note', 'score', 'taille', 'longueur']):
-                    var_type = 'ENTIER'
-                elif any(hint in var_lower for hint in ['moyenne', 'pourcentage', 'taux', 'ratio']):
-                    var_type = 'REEL'
-                elif any(hint in var_lower for hint in ['est', 'has', 'is', 'peut', 'actif', 'valide']):
-                    var_type = 'BOOLEEN'
-                else:
-                    var_type = 'ENTIER'  # Par défaut entier pour les calculs
-
-            if var_type == 'ENTIER':
-                self.variables[var_name] = 0
-                self.variable_types[var_name] = 'ENTIER'
-            elif var_type == 'REEL':
-                self.variables[var_name] = 0.0
-                self.variable_types[var_name] = 'REEL'
-            elif var_type == 'BOOLEEN':
-                self.variables[var_name] = False
-                self.variable_types[var_name] = 'BOOLEEN'
+                return value_str
+
+        # Si pas d'entrée fournie, utiliser une valeur par défaut selon le type
+        if var_type is not None:
+            return ELEMENT_DEFAULTS[var_type]
+        var_type = self.variable_types.get(var_name, None)
+
+        # Si le type n'est pas déclaré, deviner selon le nom de la variable
+        if var_type is None:
+            var_lower = var_name.lower()
+            # Noms typiques de variables numériques
+            if any(hint in var_lower for hint in ['annee', 'age', 'nombre', 'nb', 'num', 'compteur', 'i', 'j', 'k', 'n', 'somme', 'total', 'quantite', 'prix', 'note', 'score', 'taille', 'longueur']):
+                var_type = 'ENTIER'
+            elif any(hint in var_lower for hint in ['moyenne', 'pourcentage', 'taux', 'ratio']):
+                var_type = 'REEL'
+            elif any(hint in var_lower for hint in ['est', 'has', 'is', 'peut', 'actif', 'valide']):
+                var_type = 'BOOLEEN'
             else:
-                self.variables[var_name] = ""
-                self.variable_types[var_name] = 'CHAINE'
-            # Note: on ne lève plus d'erreur, on utilise une valeur par défaut
+                var_type = 'ENTIER'  # Par défaut entier pour les calculs
+
+        # Note: on ne lève plus d'erreur, on utilise une valeur par défaut
+        if var_type not in ('ENTIER', 'REEL', 'BOOLEEN'):
+            var_type = 'CHAINE'
+        self.variable_types[var_name] = var_type
+        return self.default_value(var_type)
 
-    def handle_if(self, lines: List[str], start: int, end: int) -> int:
+    def exec_if(self, stmt: If):
         """Traite une structure SI ... ALORS ... SINON ... FINSI"""
-        line = lines[start]
-
-        # Extraire la condition
-        match = re.search(r'SI\s+(.+?)\s+ALORS', line, re.IGNORECASE)
-        if not match:
-            raise PseudoCodeError(f"Structure SI invalide: {line}", start + 1)
-
-        condition = match.group(1)
-        condition_result = self.evaluate_condition(condition)
-
-        # Trouver SINON et FINSI
-        sinon_index = -1
-        finsi_index = -1
-        depth = 1
-        i = start + 1
-
-        while i < end and depth > 0:
-            upper = lines[i].upper().strip()
-            if upper.startswith('SI '):
-                depth += 1
-            elif upper == 'FINSI' or upper == 'FIN SI':
-                depth -= 1
-                if depth == 0:
-                    finsi_index = i
-            elif upper == 'SINON' and depth == 1:
-                sinon_index = i
-            i += 1
-
-        if finsi_index == -1:
-            raise PseudoCodeError("FINSI manquant", start + 1)
-
-        # Exécuter le bloc approprié
-        if condition_result:
-            if sinon_index != -1:
-                self.execute_block(lines, start + 1, sinon_index)
-            else:
-                self.execute_block(lines, start + 1, finsi_index)
+        if self.evaluate(stmt.cond):
+            self.execute_block(stmt.then_body)
         else:
-            if sinon_index != -1:
-                self.execute_block(lines, sinon_index + 1, finsi_index)
-
-        return finsi_index + 1
+            self.execute_block(stmt.else_body)
 
-    def handle_for(self, lines: List[str], start: int, end: int) -> int:
+    def exec_for(self, stmt: For):
         """Traite une boucle POUR"""
-        line = lines[start]
-
-        # Format: POUR var DE debut A fin FAIRE
-        match = re.search(r'POUR\s+(\w+)\s+(?:DE|ALLANT DE)\s+(.+?)\s+(?:A|À|JUSQU\'?A|JUSQUA)\s+(.+?)\s+(?:FAIRE|PAS)?', line, re.IGNORECASE)
-        if not match:
-            # Format alternatif: POUR var ← debut A fin FAIRE
-            match = re.search(r'POUR\s+(\w+)\s*←\s*(.+?)\s+(?:A|À)\s+(.+?)\s+FAIRE', line, re.IGNORECASE)
-
-        if not match:
-            raise PseudoCodeError(f"Structure POUR invalide: {line}", start + 1)
-
-        var_name = match.group(1).lower()
-        start_val = int(self.evaluate_expression(match.group(2)))
-        end_val = int(self.evaluate_expression(match.group(3)))
-
-        # Extraire le pas si présent
-        step = 1
-        step_match = re.search(r'PAS\s+(-?\d+)', line, re.IGNORECASE)
-        if step_match:
-            step = int(step_match.group(1))
-        elif start_val > end_val:
-            step = -1
-
-        # Trouver FINPOUR
-        finpour_index = -1
-        depth = 1
-        i = start + 1
-
-        while i < end and depth > 0:
-            upper = lines[i].upper().strip()
-            if upper.startswith('POUR '):
-                depth += 1
-            elif upper == 'FINPOUR' or upper == 'FIN POUR':
-                depth -= 1
-                if depth == 0:
-                    finpour_index = i
-            i += 1
-
-        if finpour_index == -1:
-            raise PseudoCodeError("FINPOUR manquant", start + 1)
-
-        # Exécuter la boucle
+        if stmt.invariants:
+            self.forget(stmt.invariants)
+        start_val = int(self.evaluate(stmt.start))
+        end_val = int(self.evaluate(stmt.end))
+
+        step = stmt.step
+        if step is None:
+            step = -1 if start_val > end_val else 1
+
+        variables = self.variables
+        var_name = stmt.var
+        body = stmt.body
+        val = start_val
         if step > 0:
-            val = start_val
             while val <= end_val:
-                self.variables[var_name] = val
-                self.execute_block(lines, start + 1, finpour_index)
+                variables[var_name] = val
+                self.execute_block(body)
                 val += step
         else:
-            val = start_val
             while val >= end_val:
-                self.variables[var_name] = val
-                self.execute_block(lines, start + 1, finpour_index)
+                variables[var_name] = val
+                self.execute_block(body)
                 val += step
 
-        return finpour_index + 1
-
-    def handle_while(self, lines: List[str], start: int, end: int) -> int:
+    def exec_while(self, stmt: While):
         """Traite une boucle TANT QUE"""
-        line = lines[start]
-
-        # Extraire la condition
-        match = re.search(r'TANT\s*QUE\s+(.+?)\s+FAIRE', line, re.IGNORECASE)
-        if not match:
-            raise PseudoCodeError(f"Structure TANT QUE invalide: {line}", start + 1)
-
-        condition = match.group(1)
-
-        # Trouver FINTANTQUE
-        fintq_index = -1
-        depth = 1
-        i = start + 1
-
-        while i < end and depth > 0:
-            upper = lines[i].upper().strip()
-            if upper.startswith('TANT QUE') or upper.startswith('TANTQUE'):
-                depth += 1
-            elif upper == 'FINTANTQUE' or upper == 'FIN TANT QUE' or upper == 'FINTQ':
-                depth -= 1
-                if depth == 0:
-                    fintq_index = i
-            i += 1
+        if stmt.invariants:
+            self.forget(stmt.invariants)
+        while self.evaluate(stmt.cond):
+            self.execute_block(stmt.body)
 
-        if fintq_index == -1:
-            raise PseudoCodeError("FINTANTQUE manquant", start + 1)
-
-        # Exécuter la boucle
-        while self.evaluate_condition(condition):
-            self.execute_block(lines, start + 1, fintq_index)
-
-        return fintq_index + 1
-
-    def handle_repeat(self, lines: List[str], start: int, end: int) -> int:
+    def exec_repeat(self, stmt: Repeat):
         """Traite une boucle REPETER ... JUSQU'A"""
-        # Trouver JUSQU'A
-        jusqua_index = -1
-        depth = 1
-        i = start + 1
-
-        while i < end and depth > 0:
-            upper = lines[i].upper().strip()
-            if upper.startswith('REPETER') or upper.startswith('RÉPÉTER'):
-                depth += 1
-            elif upper.startswith('JUSQU') or upper.startswith("JUSQU'"):
-                depth -= 1
-                if depth == 0:
-                    jusqua_index = i
-            i += 1
-
-        if jusqua_index == -1:
-            raise PseudoCodeError("JUSQU'A manquant", start + 1)
-
-        # Extraire la condition
-        condition_line = lines[jusqua_index]
-        match = re.search(r"JUSQU'?\s*[AÀ]\s+(.+)", condition_line, re.IGNORECASE)
-        if not match:
-            raise PseudoCodeError(f"Condition JUSQU'A invalide: {condition_line}", jusqua_index + 1)
-
-        condition = match.group(1)
-
+        if stmt.invariants:
+            self.forget(stmt.invariants)
         # Exécuter la boucle (au moins une fois)
         while True:
-            self.execute_block(lines, start + 1, jusqua_index)
-            if self.evaluate_condition(condition):
+            self.execute_block(stmt.body)
+            if self.evaluate(stmt.cond):
                 break
 
-        return jusqua_index + 1
-
-    def split_arguments(self, content: str) -> List[str]:
-        """Sépare les arguments en tenant compte des chaînes"""
-        args = []
-        current = ""
-        in_string = False
-        string_char = None
-        depth = 0
-
-        for char in content:
-            if char in '"\'':
-                if not in_string:
-                    in_string = True
-                    string_char = char
-                elif char == string_char:
-                    in_string = False
-                current += char
-            elif char == '(' and not in_string:
-                depth += 1
-                current += char
-            elif char == ')' and not in_string:
-                depth -= 1
-                current += char
-            elif char == ',' and not in_string and depth == 0:
-                args.append(current.strip())
-                current = ""
-            else:
-                current += char
-
-        if current.strip():
-            args.append(current.strip())
-
-        return args
-
-    def evaluate_expression(self, expr: str) -> Any:
-        """Évalue une expression et retourne sa valeur"""
-        expr = expr.strip()
-
-        # Chaîne de caractères
-        if (expr.startswith('"') and expr.endswith('"')) or (expr.startswith("'") and expr.endswith("'")):
-            return expr[1:-1]
-
-        # Booléens
-        if expr.upper() in ['VRAI', 'TRUE']:
-            return True
-        if expr.upper() in ['FAUX', 'FALSE']:
-            return False
-
-        # Nombre entier
+    def forget(self, slots: Tuple[int, ...]):
+        """Entrée dans une boucle: les valeurs de ses invariants sont à recalculer"""
+        reused = self.reused
+        for slot in slots:
+            reused.pop(slot, None)
+
+    def exec_call(self, stmt: CallStmt):
+        """Traite l'appel d'une PROCEDURE (le résultat d'une FONCTION est ignoré)"""
+        self.call_function(stmt.name, stmt.args, stmt.line, False)
+
+    def exec_return(self, stmt: Return):
+        """Traite RETOURNER"""
+        raise FunctionReturn(self.evaluate(stmt.expr) if stmt.expr is not None else None)
+
+    def call_function(self, name: str, args: List[Expr], line: int, needs_value: bool) -> Any:
+        """Exécute un sous-programme avec ses propres variables et retourne son résultat"""
+        function = self.functions[name]
+        values = [self.evaluate(arg) for arg in args]
+        function.check_call(len(values), needs_value, line)
+        limit = self.limits.max_call_depth
+        if limit is not None and self.call_depth >= limit:
+            raise call_depth_exceeded(self.limits, line)
+        return self.invoke(function, values, line)
+
+    def invoke(self, function: Function, values: List[Any], line: int) -> Any:
+        """Exécute le corps de `function`, les paramètres recevant `values`"""
+        variables, variable_types, reused = self.variables, self.variable_types, self.reused
+        self.variables = {param: value for (param, _), value in zip(function.params, values)}
+        self.variable_types = function.local_types()
+        self.reused = {}
+        self.call_depth += 1
         try:
-            return int(expr)
-        except ValueError:
-            pass
+            self.execute_block(function.body)
+            if not function.procedure:
+                raise PseudoCodeError(f"FONCTION {function.name} terminée sans RETOURNER", function.end_line)
+            result = None
+        except FunctionReturn as signal:
+            result = signal.value
+        finally:
+            # Après une erreur aussi: les variables redeviennent celles de l'appelant
+            self.call_depth -= 1
+            self.variables = variables
+            self.variable_types = variable_types
+            self.reused = reused
+        self.current_line = line
+        return result
+
+    # ------------------------------------------------------------------
+    # Expressions
+    # ------------------------------------------------------------------
+
+    def evaluate(self, node: Expr) -> Any:
+        """Évalue une expression de l'arbre et retourne sa valeur"""
+        return self._evaluators[node.__class__](node)
+
+    def evaluate_condition(self, node: Expr) -> bool:
+        """Évalue une condition booléenne"""
+        return bool(self.evaluate(node))
+
+    def eval_const(self, node: Const) -> Any:
+        return node.value
+
+    def eval_var(self, node: Var) -> Any:
+        value = self.variables.get(node.name, _MISSING)
+        # Une variable jamais affectée vaut son propre nom
+        return node.text if value is _MISSING else value
+
+    def eval_reuse(self, node: Reuse) -> Any:
+        if not node.store:
+            value = self.reused.get(node.slot, _MISSING)
+            if value is not _MISSING:
+                self.elided_evaluations += 1
+                return value
+        value = self.reused[node.slot] = self.evaluate(node.expr)
+        return value
 
-        # Nombre réel
-        try:
-            return float(expr)
-        except ValueError:
-            pass
-
-        # Variable
-        if expr.lower() in self.variables:
-            return self.variables[expr.lower()]
-
-        # Expression complexe - évaluer
-        return self.evaluate_complex_expression(expr)
-
-    def tokenize_expression(self, expr: str) -> List[str]:
-        """Tokenize une expression en identifiants, nombres, opérateurs et chaînes"""
-        tokens = []
-        i = 0
-        while i < len(expr):
-            char = expr[i]
-
-            # Ignorer les espaces
-            if char.isspace():
-                i += 1
-                continue
-
-            # Chaîne de caractères
-            if char in '"\'':
-                end_char = char
-                j = i + 1
-                while j < len(expr) and expr[j] != end_char:
-                    j += 1
-                tokens.append(expr[i:j+1])
-                i = j + 1
-                continue
-
-            # Nombre
-            if char.isdigit() or (char == '-' and i + 1 < len(expr) and expr[i+1].isdigit() and (not tokens or tokens[-1] in ['+', '-', '*', '/', '(', ','])):
-                j = i
-                if char == '-':
-                    j += 1
-                while j < len(expr) and (expr[j].isdigit() or expr[j] == '.'):
-                    j += 1
-                tokens.append(expr[i:j])
-                i = j
-                continue
-
-            # Identifiant (variable ou mot-clé)
-            if char.isalpha() or char == '_':
-                j = i
-                while j < len(expr) and (expr[j].isalnum() or expr[j] == '_'):
-                    j += 1
-                tokens.append(expr[i:j])
-                i = j
-                continue
-
-            # Opérateurs multi-caractères
-            if i + 1 < len(expr):
-                two_char = expr[i:i+2]
-                if two_char in ['<=', '>=', '<>', '!=', '==']:
-                    tokens.append(two_char)
-                    i += 2
-                    continue
-
-            # Opérateur simple ou parenthèse
-            tokens.append(char)
-            i += 1
-
-        return tokens
-
-    def evaluate_complex_expression(self, expr: str) -> Any:
-        """Évalue une expression complexe avec opérateurs"""
-        expr = expr.strip()
-
-        # Gérer les parenthèses
-        if expr.startswith('(') and expr.endswith(')'):
-            # Vérifier que les parenthèses correspondent
-            depth = 0
-            for i, c in enumerate(expr):
-                if c == '(':
-                    depth += 1
-                elif c == ')':
-                    depth -= 1
-                if depth == 0 and i < len(expr) - 1:
-                    break
-            else:
-                return self.evaluate_complex_expression(expr[1:-1])
-
-        # Tokenizer l'expression pour un parsing plus précis
-        tokens = self.tokenize_expression(expr)
-
-        # Opérateurs par priorité (du moins prioritaire au plus prioritaire)
-        # Opérateurs logiques
-        for op in [' OU ', ' OR ']:
-            parts = self.split_by_operator(expr, op)
-            if len(parts) > 1:
-                result = self.evaluate_condition(parts[0])
-                for part in parts[1:]:
-                    result = result or self.evaluate_condition(part)
-                return result
-
-        for op in [' ET ', ' AND ']:
-            parts = self.split_by_operator(expr, op)
-            if len(parts) > 1:
-                result = self.evaluate_condition(parts[0])
-                for part in parts[1:]:
-                    result = result and self.evaluate_condition(part)
-                return result
-
-        # NON
-        if expr.upper().startswith('NON ') or expr.upper().startswith('NOT '):
-            return not self.evaluate_condition(expr[4:])
-
-        # Opérateurs de comparaison
-        for op, func in [('<>', lambda a, b: a != b), ('!=', lambda a, b: a != b),
-                         ('<=', lambda a, b: a <= b), ('>=', lambda a, b: a >= b),
-                         ('<', lambda a, b: a < b), ('>', lambda a, b: a > b),
-                         ('==', lambda a, b: a == b), ('=', lambda a, b: a == b)]:
-            parts = self.split_by_operator(expr, op)
-            if len(parts) == 2:
-                left = self.evaluate_expression(parts[0])
-                right = self.evaluate_expression(parts[1])
-                return func(left, right)
-
-        # Opérateurs arithmétiques - utiliser les tokens pour éviter les erreurs
-        # Chercher + ou - depuis la droite (hors parenthèses et hors chaînes)
-        depth = 0
-        in_string = False
-        for i in range(len(tokens) - 1, -1, -1):
-            tok = tokens[i]
-            if tok in ['"', "'"]:
-                in_string = not in_string
-            elif tok == ')':
-                depth += 1
-            elif tok == '(':
-                depth -= 1
-            elif depth == 0 and not in_string and tok in ['+', '-']:
-                # Vérifier que ce n'est pas un signe unaire (au début ou après un opérateur)
-                if i > 0 and tokens[i-1] not in ['+', '-', '*', '/', '(', ',']:
-                    left_expr = ' '.join(tokens[:i])
-                    right_expr = ' '.join(tokens[i+1:])
-                    left = self.evaluate_expression(left_expr)
-                    right = self.evaluate_expression(right_expr)
-                    left = self._to_number(left)
-                    right = self._to_number(right)
-                    if tok == '+':
-                        if isinstance(left, str) or isinstance(right, str):
-                            return str(left) + str(right)
-                        return left + right
-                    else:
-                        if isinstance(left, str) or isinstance(right, str):
-                            raise PseudoCodeError(f"Impossible de soustraire: '{left_expr.strip()}' et '{right_expr.strip()}' doivent etre des nombres", self.current_line)
-                        return left - right
-
-        # Chercher * ou / depuis la droite
-        depth = 0
-        in_string = False
-        for i in range(len(tokens) - 1, -1, -1):
-            tok = tokens[i]
-            if tok in ['"', "'"]:
-                in_string = not in_string
-            elif tok == ')':
-                depth += 1
-            elif tok == '(':
-                depth -= 1
-            elif depth == 0 and not in_string and tok in ['*', '/']:
-                left_expr = ' '.join(tokens[:i])
-                right_expr = ' '.join(tokens[i+1:])
-                left = self.evaluate_expression(left_expr)
-                right = self.evaluate_expression(right_expr)
-                left = self._to_number(left)
-                right = self._to_number(right)
-                if isinstance(left, str) or isinstance(right, str):
-                    raise PseudoCodeError(f"Impossible d'effectuer l'operation: les deux operandes doivent etre des nombres", self.current_line)
-                if tok == '*':
-                    return left * right
-                else:
-                    if right == 0:
-                        raise PseudoCodeError("Division par zero", self.current_line)
-                    return left / right
-
-        # MOD et DIV
-        for op in [' MOD ', ' DIV ']:
-            parts = self.split_by_operator(expr.upper(), op)
-            if len(parts) == 2:
-                left = self.evaluate_expression(parts[0])
-                right = self.evaluate_expression(parts[1])
-                if op == ' MOD ':
-                    return left % right
-                else:
-                    return left // right
-
-        # Fonctions mathématiques
-        func_match = re.match(r'(\w+)\s*\((.+)\)', expr, re.IGNORECASE)
-        if func_match:
-            func_name = func_match.group(1).upper()
-            args_str = func_match.group(2)
-            args = [self.evaluate_expression(a.strip()) for a in self.split_arguments(args_str)]
-
-            if func_name == 'ABS':
-                return abs(args[0])
-            elif func_name == 'RACINE' or func_name == 'SQRT':
-                return math.sqrt(args[0])
-            elif func_name == 'CARRE' or func_name == 'SQR':
-                return args[0] ** 2
-            elif func_name == 'PUISSANCE' or func_name == 'POW':
-                return args[0] ** args[1]
-            elif func_name == 'ENT' or func_name == 'INT':
-                return int(args[0])
-            elif func_name == 'ARRONDI' or func_name == 'ROUND':
-                return round(args[0])
-            elif func_name == 'LONGUEUR' or func_name == 'LEN':
-                return len(str(args[0]))
-
-        # Variable simple
-        if expr.lower() in self.variables:
-            return self.variables[expr.lower()]
-
-        # Si rien ne correspond, retourner tel quel
-        return expr
-
-    def split_by_operator(self, expr: str, op: str, from_right: bool = False) -> List[str]:
-        """Sépare une expression par un opérateur en respectant les parenthèses"""
-        parts = []
-        current = ""
-        depth = 0
-        in_string = False
-        string_char = None
-        i = len(expr) - 1 if from_right else 0
-
-        while (i >= 0 if from_right else i < len(expr)):
-            char = expr[i]
-
-            if char in '"\'':
-                if not in_string:
-                    in_string = True
-                    string_char = char
-                elif char == string_char:
-                    in_string = False
-                current = char + current if from_right else current + char
-            elif char == '(' and not in_string:
-                depth += 1 if from_right else -1
-                current = char + current if from_right else current + char
-            elif char == ')' and not in_string:
-                depth += -1 if from_right else 1
-                current = char + current if from_right else current + char
-            elif depth == 0 and not in_string:
-                # Vérifier si on a trouvé l'opérateur
-                if from_right:
-                    test_str = expr[max(0, i - len(op) + 1):i + 1]
-                else:
-                    test_str = expr[i:i + len(op)]
-
-                if test_str.upper() == op.upper():
-                    if from_right:
-                        parts.insert(0, current)
-                        current = ""
-                        i -= len(op)
-                    else:
-                        parts.append(current)
-                        current = ""
-                        i += len(op) - 1
-                else:
-                    current = char + current if from_right else current + char
-            else:
-                current = char + current if from_right else current + char
+    def eval_lookup(self, node: Lookup) -> Any:
+        value = self.variables.get(node.name, _MISSING)
+        return self.evaluate(node.fallback) if value is _MISSING else value
 
-            i += -1 if from_right else 1
+    def eval_index(self, node: Index) -> Any:
+        return self.array(node.name).get(self.evaluate(node.index))
 
-        if current:
-            if from_right:
-                parts.insert(0, current)
-            else:
-                parts.append(current)
+    def eval_or(self, node: Or) -> bool:
+        for operand in node.operands:
+            if self.evaluate(operand):
+                return True
+        return False
 
-        return parts
+    def eval_and(self, node: And) -> bool:
+        for operand in node.operands:
+            if not self.evaluate(operand):
+                return False
+        return True
 
-    def evaluate_condition(self, condition: str) -> bool:
-        """Évalue une condition booléenne"""
-        result = self.evaluate_expression(condition)
-        if isinstance(result, bool):
-            return result
-        if isinstance(result, (int, float)):
-            return result != 0
-        if isinstance(result, str):
-            return len(result) > 0
-        return bool(result)
+    def eval_not(self, node: Not) -> bool:
+        return not self.evaluate(node.operand)
+
+    def eval_compare(self, node: Compare) -> Any:
+        left = self.evaluate(node.left)
+        right = self.evaluate(node.right)
+        return COMPARISONS[node.op](left, right)
+
+    def eval_binop(self, node: BinOp) -> Any:
+        op = node.op
+        left = self.evaluate(node.left)
+        right = self.evaluate(node.right)
+
+        if op == 'MOD':
+            if isinstance(left, str):
+                return format_text(left, right)
+            return left % right
+        if op == 'DIV':
+            return left // right
+
+        left = _to_number(left)
+        right = _to_number(right)
+        if op == '+':
+            if isinstance(left, str) or isinstance(right, str):
+                return str(left) + str(right)
+            return left + right
+        if op == '-':
+            if isinstance(left, str) or isinstance(right, str):
+                raise PseudoCodeError(f"Impossible de soustraire: '{node.left_text}' et '{node.right_text}' doivent etre des nombres", self.current_line)
+            return left - right
+
+        if isinstance(left, str) or isinstance(right, str):
+            raise PseudoCodeError(f"Impossible d'effectuer l'operation: les deux operandes doivent etre des nombres", self.current_line)
+        if op == '*':
+            return left * right
+        if right == 0:
+            raise PseudoCodeError("Division par zero", self.current_line)
+        return left / right
+
+    def eval_call(self, node: Call) -> Any:
+        args = [self.evaluate(arg) for arg in node.args]
+        if node.fallback is not None:
+            # Fonction inconnue: l'expression vaut la variable ou le texte
+            return self.evaluate(node.fallback)
+        return (node.function or BUILTINS[node.name])(args)
+
+    def eval_function_call(self, node: FunctionCall) -> Any:
+        return self.call_function(node.name, node.args, self.current_line, True)
 
 
 def _outputs_match(actual: str, expected: str) -> bool:
@@ -918,8 +756,8 @@ def _outputs_match(actual: str, expected: str) -> bool:
         return True
 
     # 4. Comparaison par valeurs numeriques
-    actual_numbers = re.findall(r'-?\d+\.?\d*', actual)
-    expected_numbers = re.findall(r'-?\d+\.?\d*', expected)
+    actual_numbers = NUMBER_RE.findall(actual)
+    expected_numbers = NUMBER_RE.findall(expected)
 
     if expected_numbers and actual_numbers:
         # Verifier si tous les nombres attendus apparaissent dans la sortie
@@ -950,44 +788,150 @@ def _outputs_match(actual: str, expected: str) -> bool:
     return False
 
 
-def validate_pseudo_code(code: str, test_cases: List[Dict]) -> Tuple[bool, int, List[str]]:
+CaseResult = Tuple[bool, str, str]
+
+
+def grade_test_case(index: int, test_case: Dict, result: CaseResult) -> Tuple[bool, str]:
+    """Compare le résultat (success, output, error) d'un cas de test à l'attendu: (réussi, feedback)"""
+    success, output, error = result
+    expected = str(test_case.get('expected_output', '')).strip()
+    output = output.strip()
+
+    if not success:
+        return False, f"Test {index + 1}: Erreur d'execution - {error}"
+    if _outputs_match(output, expected):
+        return True, f"Test {index + 1}: Correct"
+    return False, f"Test {index + 1}: Sortie incorrecte - attendu: {expected}, obtenu: {output}"
+
+
+def case_inputs(test_cases: List[Dict]) -> List[List[str]]:
+    """
+    Entrées effectives de chaque cas de test.
+
+    Les cas étaient exécutés à la suite par un même interpréteur, et
+    `run` ne remplace les entrées que si elles ne sont pas vides: un cas
+    sans entrées relit celles du dernier cas qui en avait. Calculées
+    d'avance, elles ne dépendent plus de l'ordre d'exécution.
+    """
+    effective = []
+    current: List[str] = []
+    for test_case in test_cases:
+        inputs = test_case.get('inputs', [])
+        if inputs:
+            current = inputs
+        effective.append(current)
+    return effective
+
+
+def run_test_cases(run_case: Callable[[List[str]], CaseResult], test_cases: List[Dict], workers: int = 1,
+                   stop_early: bool = False) -> Tuple[bool, int, List[str]]:
+    """
+    Exécute les cas de test avec `run_case(entrées)` et calcule (success, score, feedback).
+
+    Avec `workers` > 1, les cas sont répartis sur un pool de fils
+    d'exécution; le feedback garde l'ordre des cas. Avec `stop_early`, les
+    cas restants ne sont pas exécutés dès que le seuil de 50% ne peut plus
+    être atteint (ils comptent comme échoués).
+    """
+    total = len(test_cases)
+    inputs = case_inputs(test_cases)
+    outcomes: List[Optional[Tuple[bool, str]]] = [None] * total
+    failed = 0
+
+    def threshold_lost() -> bool:
+        return stop_early and (total - failed) * 2 < total
+
+    if workers <= 1 or total <= 1:
+        for i, test_case in enumerate(test_cases):
+            outcomes[i] = grade_test_case(i, test_case, run_case(inputs[i]))
+            if not outcomes[i][0]:
+                failed += 1
+                if threshold_lost():
+                    break
+    else:
+        with ThreadPoolExecutor(max_workers=min(workers, total)) as executor:
+            futures = {executor.submit(run_case, inputs[i]): i for i in range(total)}
+            for future in as_completed(futures):
+                i = futures[future]
+                outcomes[i] = grade_test_case(i, test_cases[i], future.result())
+                if not outcomes[i][0]:
+                    failed += 1
+                    if threshold_lost():
+                        # Les cas déjà commencés se terminent, les autres sont abandonnés
+                        for pending in futures:
+                            pending.cancel()
+                        break
+
+    feedback = []
+    passed_tests = 0
+    for i, outcome in enumerate(outcomes):
+        if outcome is None:
+            feedback.append(f"Test {i + 1}: Non execute - le seuil de 50% ne peut plus etre atteint")
+            continue
+        passed, message = outcome
+        passed_tests += passed
+        feedback.append(message)
+
+    score = int((passed_tests / total) * 100)
+    is_correct = score >= 50
+
+    return is_correct, score, feedback
+
+
+def validate_pseudo_code(code: str, test_cases: List[Dict], backend: str = 'tree',
+                         cache: Optional[ProgramCache] = None,
+                         limits: Optional[ExecutionLimits] = None, workers: int = 1,
+                         stop_early: bool = False) -> Tuple[bool, int, List[str]]:
     """
     Valide du pseudo-code avec des cas de test.
 
+    Le programme est compilé une seule fois puis exécuté pour chaque cas.
+    Le programme compilé ne dépend d'aucune exécution: avec `workers` > 1,
+    les cas s'exécutent en parallèle, chacun avec son interpréteur. Dans un
+    même processus, les fils d'exécution se partagent le GIL; le gain est
+    réel avec `SandboxPool.validate`, qui répartit les cas sur ses
+    processus.
+
     Args:
         code: Le pseudo-code à exécuter
         test_cases: Liste de dicts avec 'inputs' et 'expected_output'
+        backend: Moteur d'exécution ('tree' ou 'vm')
+        cache: Cache des programmes compilés (optionnel)
+        limits: Budget de chaque cas de test (optionnel)
+        workers: Nombre de cas exécutés en parallèle
+        stop_early: Arrêter dès que le seuil de 50% ne peut plus être atteint
 
     Returns:
         (success, score, feedback_list)
     """
-    interpreter = PseudoInterpreter()
-    feedback = []
-    passed_tests = 0
-    total_tests = len(test_cases)
+    interpreter = PseudoInterpreter(backend=backend, cache=cache, limits=limits)
 
-    if total_tests == 0:
+    if len(test_cases) == 0:
         return True, 100, ["Aucun cas de test défini"]
 
-    for i, test_case in enumerate(test_cases):
-        inputs = test_case.get('inputs', [])
-        expected = str(test_case.get('expected_output', '')).strip()
-
-        success, output, error = interpreter.execute(code, inputs)
-        output = output.strip()
-
-        if not success:
-            feedback.append(f"Test {i + 1}: Erreur d'execution - {error}")
-        elif _outputs_match(output, expected):
-            passed_tests += 1
-            feedback.append(f"Test {i + 1}: Correct")
-        else:
-            feedback.append(f"Test {i + 1}: Sortie incorrecte - attendu: {expected}, obtenu: {output}")
-
-    score = int((passed_tests / total_tests) * 100)
-    is_correct = score >= 50
-
-    return is_correct, score, feedback
+    try:
+        compiled = interpreter.compile(code)
+        compile_error = None
+    except PseudoCodeError as e:
+        compiled = None
+        compile_error = str(e)
+    except (RecursionError, MemoryError):
+        compiled = None
+        compile_error = TOO_DEEP
+    except Exception as e:
+        compiled = None
+        compile_error = f"Erreur inattendue: {str(e)}"
+
+    def run_case(inputs: List[str]) -> CaseResult:
+        if compiled is None:
+            return False, "", compile_error
+        runner = interpreter
+        if workers > 1:
+            # Un interpréteur par cas: l'état d'exécution n'est pas partagé entre fils
+            runner = PseudoInterpreter(backend=backend, limits=limits)
+        return runner.run(compiled, inputs)
+
+    return run_test_cases(run_case, test_cases, workers, stop_early)
 
 
 # Test rapide
@@ -0,0 +1,239 @@
+"""
+Budgets d'exécution du pseudo-code
+==================================
+Le compteur de passages (`max_iterations`) ne suffit pas: une seule
+instruction peut construire un texte énorme ou calculer
+`PUISSANCE(10, 100000000)` et bloquer le worker. Chaque exécution
+dispose donc d'un budget:
+
+- temps écoulé (`wall_time`) et temps de calcul du thread (`cpu_time`),
+  vérifiés tous les `TIME_CHECK_INTERVAL` passages sur une instruction;
+- taille de la sortie (`max_output_bytes`, octets UTF-8 de `output`);
+- taille des valeurs (`max_string_length` caractères, `max_integer_digits`
+  chiffres) vérifiée à chaque affectation, et avant les calculs qui
+  peuvent produire une valeur démesurée en une opération (puissance
+  entière, formatage `"texte" MOD n`);
+- nombre d'éléments d'un tableau (`max_array_length`), vérifié à sa
+  déclaration;
+- profondeur des appels de FONCTION et PROCEDURE (`max_call_depth`),
+  vérifiée à chaque appel. La machine virtuelle empile ses propres
+  cadres; le moteur 'tree' relève `sys.setrecursionlimit()` selon cette
+  limite: dans les deux cas, elle ne dépend pas de la pile Python.
+
+Chaque dépassement lève `ExecutionBudgetExceeded` (une `PseudoCodeError`)
+avec son propre message. Les budgets sont configurés par point d'entrée
+dans `settings.PSEUDO_EXECUTION_LIMITS` (voir `get_execution_limits`).
+"""
+
+import math
+import re
+import sys
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+from .pseudo_ast import PseudoCodeError
+
+
+# Passages sur une instruction entre deux lectures des horloges
+TIME_CHECK_INTERVAL = 32
+
+# Au-delà de 4300 chiffres, Python refuse de convertir un entier en texte
+DEFAULT_LIMITS = {
+    'MAX_ITERATIONS': 10000,
+    'WALL_TIME': 2.0,
+    'CPU_TIME': 2.0,
+    'MAX_OUTPUT_BYTES': 1024 * 1024,
+    'MAX_STRING_LENGTH': 100000,
+    'MAX_INTEGER_DIGITS': 4300,
+    'MAX_ARRAY_LENGTH': 100000,
+    'MAX_CALL_DEPTH': 1000,
+}
+
+# Largeur et précision des directives de formatage ("%05d", "%.3f", ...)
+FORMAT_WIDTH_RE = re.compile(r'%[-#0 +]*(\d*)(?:\.(\d*))?')
+
+LOG2_10 = math.log2(10)
+
+
+class ExecutionBudgetExceeded(PseudoCodeError):
+    """Dépassement d'un budget d'exécution; `budget` nomme la limite atteinte"""
+
+    def __init__(self, budget: str, message: str, line: int = None):
+        self.budget = budget
+        super().__init__(message, line)
+
+
+class ExecutionLimits:
+    """Limites d'une exécution (None: pas de limite)"""
+    __slots__ = ('max_iterations', 'wall_time', 'cpu_time', 'max_output_bytes',
+                 'max_string_length', 'max_integer_digits', 'max_array_length',
+                 'max_call_depth', 'string_ceiling', 'integer_bits_ceiling')
+
+    def __init__(self, max_iterations: int = 10000, wall_time: Optional[float] = 2.0,
+                 cpu_time: Optional[float] = 2.0, max_output_bytes: Optional[int] = 1024 * 1024,
+                 max_string_length: Optional[int] = 100000, max_integer_digits: Optional[int] = 4300,
+                 max_array_length: Optional[int] = 100000, max_call_depth: Optional[int] = 1000):
+        self.max_iterations = max_iterations
+        self.wall_time = wall_time
+        self.cpu_time = cpu_time
+        self.max_output_bytes = max_output_bytes
+        self.max_string_length = max_string_length
+        self.max_integer_digits = max_integer_digits
+        self.max_array_length = max_array_length
+        self.max_call_depth = max_call_depth
+        # Seuils directement comparables dans les boucles d'exécution
+        self.string_ceiling = sys.maxsize if max_string_length is None else max_string_length
+        self.integer_bits_ceiling = (sys.maxsize if max_integer_digits is None
+                                     else math.ceil(max_integer_digits * LOG2_10))
+
+    @classmethod
+    def from_options(cls, options: Dict[str, Any]) -> 'ExecutionLimits':
+        """Construit les limites depuis un dictionnaire au format de `DEFAULT_LIMITS`"""
+        options = {**DEFAULT_LIMITS, **options}
+        return cls(
+            max_iterations=options['MAX_ITERATIONS'],
+            wall_time=options['WALL_TIME'],
+            cpu_time=options['CPU_TIME'],
+            max_output_bytes=options['MAX_OUTPUT_BYTES'],
+            max_string_length=options['MAX_STRING_LENGTH'],
+            max_integer_digits=options['MAX_INTEGER_DIGITS'],
+            max_array_length=options['MAX_ARRAY_LENGTH'],
+            max_call_depth=options['MAX_CALL_DEPTH'],
+        )
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            'max_iterations': self.max_iterations,
+            'wall_time': self.wall_time,
+            'cpu_time': self.cpu_time,
+            'max_output_bytes': self.max_output_bytes,
+            'max_string_length': self.max_string_length,
+            'max_integer_digits': self.max_integer_digits,
+            'max_array_length': self.max_array_length,
+            'max_call_depth': self.max_call_depth,
+        }
+
+    def __repr__(self):
+        options = ", ".join(f"{key}={value!r}" for key, value in self.as_dict().items())
+        return f"ExecutionLimits({options})"
+
+
+class ExecutionClock:
+    """Échéances en temps écoulé et en temps de calcul d'une exécution"""
+    __slots__ = ('limits', 'wall_deadline', 'cpu_deadline')
+
+    def __init__(self, limits: ExecutionLimits):
+        self.limits = limits
+        self.wall_deadline = None if limits.wall_time is None else time.perf_counter() + limits.wall_time
+        self.cpu_deadline = None if limits.cpu_time is None else time.thread_time() + limits.cpu_time
+
+    @property
+    def enabled(self) -> bool:
+        return self.wall_deadline is not None or self.cpu_deadline is not None
+
+    def check(self, line: int = None):
+        if self.wall_deadline is not None and time.perf_counter() > self.wall_deadline:
+            raise ExecutionBudgetExceeded(
+                'wall_time', f"Temps d'exécution dépassé (limite de {self.limits.wall_time:g} s)", line)
+        if self.cpu_deadline is not None and time.thread_time() > self.cpu_deadline:
+            raise ExecutionBudgetExceeded(
+                'cpu_time', f"Temps de calcul dépassé (limite de {self.limits.cpu_time:g} s de CPU)", line)
+
+
+# ----------------------------------------------------------------------
+# Taille des valeurs
+# ----------------------------------------------------------------------
+
+# Limites de l'exécution en cours, pour les calculs qui n'ont pas accès à
+# l'interpréteur (fonctions prédéfinies, expressions compilées de la VM)
+_active_limits: ContextVar[Optional[ExecutionLimits]] = ContextVar('pseudo_execution_limits', default=None)
+
+
+def activate(limits: ExecutionLimits):
+    """Rend `limits` visibles des calculs; retourne le jeton à passer à `deactivate`"""
+    return _active_limits.set(limits)
+
+
+def deactivate(token):
+    _active_limits.reset(token)
+
+
+def value_too_large(value: Any, limits: ExecutionLimits, line: int = None) -> ExecutionBudgetExceeded:
+    """Erreur à lever pour une valeur qui dépasse les limites de taille"""
+    if isinstance(value, str):
+        return ExecutionBudgetExceeded(
+            'max_string_length',
+            f"Texte trop long ({len(value)} caractères, limite de {limits.max_string_length})", line)
+    return ExecutionBudgetExceeded(
+        'max_integer_digits', f"Nombre trop grand (plus de {limits.max_integer_digits} chiffres)", line)
+
+
+def call_depth_exceeded(limits: ExecutionLimits, line: int = None) -> ExecutionBudgetExceeded:
+    """Erreur à lever pour un appel au-delà de `max_call_depth` appels imbriqués"""
+    return ExecutionBudgetExceeded(
+        'max_call_depth', f"Récursion trop profonde (limite de {limits.max_call_depth} appels imbriqués)", line)
+
+
+def check_value(value: Any, limits: ExecutionLimits, line: int = None):
+    """Lève une erreur si un texte ou un entier dépasse les limites de taille"""
+    kind = value.__class__
+    if kind is str:
+        if len(value) > limits.string_ceiling:
+            raise value_too_large(value, limits, line)
+    elif kind is int:
+        if value.bit_length() > limits.integer_bits_ceiling:
+            raise value_too_large(value, limits, line)
+
+
+def power(base: Any, exponent: Any) -> Any:
+    """`base ** exponent`, refusé d'avance si l'entier obtenu dépasserait la limite"""
+    limits = _active_limits.get()
+    if (limits is not None and isinstance(base, int) and isinstance(exponent, int)
+            and exponent > 1 and abs(base) > 1):
+        # Minorant du nombre de bits du résultat: aucun refus à tort
+        bits = (abs(base).bit_length() - 1) * exponent + 1
+        if bits > limits.integer_bits_ceiling:
+            raise ExecutionBudgetExceeded(
+                'max_integer_digits', f"Nombre trop grand (plus de {limits.max_integer_digits} chiffres)")
+    return base ** exponent
+
+
+def format_text(text: str, argument: Any) -> Any:
+    """`text % argument`, refusé d'avance si une largeur dépasse la longueur maximale des textes"""
+    limits = _active_limits.get()
+    if limits is not None and '%' in text:
+        for width, precision in FORMAT_WIDTH_RE.findall(text):
+            size = max(int(width or 0), int(precision or 0))
+            if size > limits.string_ceiling:
+                raise ExecutionBudgetExceeded(
+                    'max_string_length',
+                    f"Texte trop long ({size} caractères, limite de {limits.max_string_length})")
+    return text % argument
+
+
+# ----------------------------------------------------------------------
+# Configuration
+# ----------------------------------------------------------------------
+
+def get_execution_limits(endpoint: str = 'default') -> ExecutionLimits:
+    """
+    Limites d'un point d'entrée ('execute', 'grading', ...), configurées
+    par `settings.PSEUDO_EXECUTION_LIMITS`.
+
+    Les valeurs de l'entrée `endpoint` complètent celles de 'default'.
+    Hors de Django (script, tests), les valeurs de `DEFAULT_LIMITS` sont
+    utilisées.
+    """
+    options = {}
+    try:
+        from django.conf import settings
+        from django.core.exceptions import ImproperlyConfigured
+    except ImportError:
+        settings = None
+    if settings is not None:
+        try:
+            options = getattr(settings, 'PSEUDO_EXECUTION_LIMITS', {})
+        except ImproperlyConfigured:
+            options = {}
+    return ExecutionLimits.from_options({**options.get('default', {}), **options.get(endpoint, {})})
@@ -0,0 +1,503 @@
+"""
+Optimisation de l'arbre du pseudo-code
+======================================
+Passe exécutée une fois après l'analyse (`PseudoInterpreter.lower`),
+avant l'un ou l'autre moteur d'exécution:
+
+- les sous-expressions constantes sont calculées d'avance (`2 * 3 + 1`
+  devient `7`, `NON VRAI` devient `FAUX`). Le calcul passe par
+  l'évaluateur de l'interpréteur, le résultat est donc celui de
+  l'exécution. Une expression dont le calcul échoue (division par zéro,
+  texte soustrait, ...) est conservée: l'erreur est levée à l'exécution,
+  à sa ligne, seulement si la ligne est atteinte;
+- les littéraux textuels opérandes de + - * / sont convertis d'avance
+  en nombre quand ils en représentent un (`(5) + x`);
+- les appels de fonctions prédéfinies reçoivent directement la fonction
+  Python à appeler.
+
+Les corps des FONCTION et PROCEDURE passent par les mêmes règles; un
+appel de sous-programme n'est jamais calculé d'avance.
+
+L'arbre d'origine n'est pas modifié (le cache des programmes le
+conserve); un sous-arbre partagé reste partagé dans le résultat.
+
+Une seconde passe (`InvariantHoister`) évite les calculs répétés:
+
+- dans une boucle, une sous-expression dont aucune variable n'est
+  affectée par la boucle (`n * n`, `RACINE(n)`, `LONGUEUR(s)`) n'est
+  calculée qu'au premier passage, puis relue jusqu'à la sortie de la
+  boucle;
+- dans une expression, une sous-expression répétée
+  (`(a + b) * (a + b)`) n'est calculée qu'une fois.
+
+La valeur est mémorisée au moment où l'expression d'origine l'aurait
+calculée: une erreur (division par zéro, ...) est levée au même endroit,
+et une branche de ET / OU non évaluée ne calcule rien. Les tableaux et
+les appels de sous-programmes ne sont jamais mémorisés (leur valeur peut
+changer sans affectation). Les moteurs comptent les calculs évités
+(`PseudoInterpreter.elided_evaluations`).
+"""
+
+from typing import Any, Callable, Dict, FrozenSet, Hashable, List, Set, Tuple
+
+from .pseudo_ast import (
+    And, Assign, BinOp, Call, CallStmt, Compare, Const, Declare, DeclareArray, Expr, For, Function,
+    FunctionCall, If, Index, Lookup, Not, Or, Program, Read, ReadItem, Repeat, Return, Reuse, Stmt,
+    StoreItem, Var, While, Write,
+)
+
+
+# Puissances (exposant fixe ou second argument): un calcul d'avance sur
+# des entiers n'est fait que si le résultat reste de taille raisonnable,
+# pour qu'une ligne jamais exécutée ne bloque pas la compilation
+POWER_FUNCTIONS = {'PUISSANCE': None, 'POW': None, 'CARRE': 2, 'SQR': 2}
+MAX_FOLDED_BITS = 1 << 16
+
+
+class ConstantFolder:
+    """Calcule d'avance les expressions constantes d'un programme"""
+
+    def __init__(self, evaluate: Callable[[Expr], Any], builtins: Dict[str, Callable],
+                 to_number: Callable[[Any], Any]):
+        self.evaluate = evaluate
+        self.builtins = builtins
+        self.to_number = to_number
+        self.folded = 0
+        self._done: Dict[int, Expr] = {}
+
+    def fold(self, program: Program) -> Program:
+        self.folded = 0
+        self._done = {}
+        functions = {
+            name: Function(function.name, function.procedure, function.params, function.return_type,
+                           self.block(function.body), function.line, function.end_line)
+            for name, function in program.functions.items()
+        }
+        return Program(self.block(program.body), program.lines, functions)
+
+    # ------------------------------------------------------------------
+    # Instructions
+    # ------------------------------------------------------------------
+
+    def block(self, body: List[Stmt]) -> List[Stmt]:
+        return [self.stmt(stmt) for stmt in body]
+
+    def stmt(self, stmt: Stmt) -> Stmt:
+        return map_stmt(stmt, self.expr, self.block)
+
+    # ------------------------------------------------------------------
+    # Expressions
+    # ------------------------------------------------------------------
+
+    def expr(self, node: Expr) -> Expr:
+        key = id(node)
+        done = self._done.get(key)
+        if done is None:
+            done = self._done[key] = self._fold(node)
+        return done
+
+    def _fold(self, node: Expr) -> Expr:
+        kind = node.__class__
+
+        if kind is Const or kind is Var:
+            return node
+        if kind is Lookup:
+            return Lookup(node.name, self.expr(node.fallback))
+        if kind is Index:
+            # Le contenu du tableau n'est connu qu'à l'exécution
+            return Index(node.name, self.expr(node.index))
+        if kind is FunctionCall:
+            # Le résultat d'un sous-programme n'est connu qu'à l'exécution
+            return FunctionCall(node.name, [self.expr(arg) for arg in node.args])
+
+        if kind is Not:
+            node = Not(self.expr(node.operand))
+            operands = [node.operand]
+        elif kind is And or kind is Or:
+            node = kind([self.expr(operand) for operand in node.operands])
+            operands = node.operands
+        elif kind is Compare:
+            node = Compare(node.op, self.expr(node.left), self.expr(node.right))
+            operands = [node.left, node.right]
+        elif kind is BinOp:
+            left = self.expr(node.left)
+            right = self.expr(node.right)
+            if node.op not in ('MOD', 'DIV'):
+                left = self.numeric(left)
+                right = self.numeric(right)
+            elif isinstance(left, Const) and isinstance(left.value, str):
+                # "texte" MOD n est un formatage de chaîne: laissé à l'exécution
+                return BinOp(node.op, left, right, node.source)
+            node = BinOp(node.op, left, right, node.source)
+            operands = [left, right]
+        elif kind is Call:
+            args = [self.expr(arg) for arg in node.args]
+            if node.fallback is not None:
+                fallback = self.expr(node.fallback)
+                if all(isinstance(arg, Const) for arg in args):
+                    # Fonction inconnue: des arguments constants ne peuvent pas échouer
+                    return fallback
+                return Call(node.name, args, fallback)
+            node = Call(node.name, args, function=self.builtins[node.name])
+            operands = args
+            if self.oversized(node):
+                return node
+        else:
+            return node
+
+        if not all(isinstance(operand, Const) for operand in operands):
+            return node
+        try:
+            value = self.evaluate(node)
+        except Exception:
+            # L'erreur sera levée à l'exécution, si la ligne est atteinte
+            return node
+        self.folded += 1
+        return Const(value)
+
+    def numeric(self, node: Expr) -> Expr:
+        """Littéral textuel opérande de + - * /: converti comme à l'exécution"""
+        if isinstance(node, Const) and isinstance(node.value, str):
+            value = self.to_number(node.value)
+            if not isinstance(value, str):
+                return Const(value)
+        return node
+
+    @staticmethod
+    def oversized(call: Call) -> bool:
+        """Puissance entière dont le résultat dépasserait MAX_FOLDED_BITS"""
+        if call.name not in POWER_FUNCTIONS or not all(isinstance(arg, Const) for arg in call.args):
+            return False
+        values = [arg.value for arg in call.args]
+        exponent = POWER_FUNCTIONS[call.name]
+        if exponent is None:
+            if len(values) < 2:
+                return False
+            exponent = values[1]
+        base = values[0]
+        if not isinstance(base, int) or not isinstance(exponent, int) or exponent <= 0:
+            return False
+        return max(abs(base).bit_length(), 1) * exponent > MAX_FOLDED_BITS
+
+
+def map_stmt(stmt: Stmt, expr: Callable[[Expr], Expr],
+             block: Callable[[List[Stmt]], List[Stmt]]) -> Stmt:
+    """Copie de l'instruction: `expr` appliquée à ses expressions, `block` à ses blocs"""
+    kind = stmt.__class__
+    line = stmt.line
+
+    if kind is Assign:
+        return Assign(line, stmt.name, expr(stmt.expr))
+    if kind is Write:
+        return Write(line, [expr(arg) for arg in stmt.args])
+    if kind is Declare:
+        return Declare(line, stmt.var_type, [(name, expr(init) if init is not None else None)
+                                             for name, init in stmt.entries])
+    if kind is StoreItem:
+        return StoreItem(line, stmt.name, expr(stmt.index), expr(stmt.expr))
+    if kind is ReadItem:
+        return ReadItem(line, stmt.name, expr(stmt.index))
+    if kind is DeclareArray:
+        return DeclareArray(line, stmt.element_type, [(name, expr(low), expr(high))
+                                                      for name, low, high in stmt.entries])
+    if kind is If:
+        return If(line, expr(stmt.cond), block(stmt.then_body), block(stmt.else_body))
+    if kind is For:
+        return For(line, stmt.var, expr(stmt.start), expr(stmt.end), stmt.step, block(stmt.body),
+                   stmt.invariants)
+    if kind is While:
+        return While(line, expr(stmt.cond), block(stmt.body), stmt.invariants)
+    if kind is Repeat:
+        return Repeat(line, block(stmt.body), expr(stmt.cond), stmt.invariants)
+    if kind is Return:
+        return Return(line, expr(stmt.expr) if stmt.expr is not None else None)
+    if kind is CallStmt:
+        return CallStmt(line, stmt.name, [expr(arg) for arg in stmt.args])
+    # Nop, Fail, Read: rien à transformer
+    return stmt
+
+
+def map_children(node: Expr, expr: Callable[[Expr], Expr]) -> Expr:
+    """Copie du noeud, `expr` appliquée à ses sous-expressions (dans l'ordre d'évaluation)"""
+    kind = node.__class__
+    if kind is BinOp:
+        return BinOp(node.op, expr(node.left), expr(node.right), node.source)
+    if kind is Compare:
+        return Compare(node.op, expr(node.left), expr(node.right))
+    if kind is Not:
+        return Not(expr(node.operand))
+    if kind is And or kind is Or:
+        return kind([expr(operand) for operand in node.operands])
+    if kind is Call:
+        args = [expr(arg) for arg in node.args]
+        return Call(node.name, args, expr(node.fallback) if node.fallback is not None else None, node.function)
+    if kind is Lookup:
+        return Lookup(node.name, expr(node.fallback))
+    if kind is Index:
+        return Index(node.name, expr(node.index))
+    if kind is FunctionCall:
+        return FunctionCall(node.name, [expr(arg) for arg in node.args])
+    # Const, Var, Reuse: rien en dessous (une valeur mémorisée n'est pas découpée)
+    return node
+
+
+def children(node: Expr) -> List[Expr]:
+    """Sous-expressions du noeud, dans l'ordre d'évaluation"""
+    kind = node.__class__
+    if kind is BinOp or kind is Compare:
+        return [node.left, node.right]
+    if kind is Not:
+        return [node.operand]
+    if kind is And or kind is Or:
+        return node.operands
+    if kind is Call:
+        return node.args + [node.fallback] if node.fallback is not None else node.args
+    if kind is Lookup:
+        return [node.fallback]
+    if kind is Index:
+        return [node.index]
+    if kind is FunctionCall:
+        return node.args
+    return []
+
+
+def expr_key(node: Expr) -> Hashable:
+    """Clé de comparaison structurelle: deux expressions de même clé ont la même valeur"""
+    kind = node.__class__
+    if kind is Const:
+        return ('Const', node.value.__class__, node.value)
+    if kind is Var:
+        # Le texte compte: c'est la valeur d'une variable jamais affectée
+        return ('Var', node.name, node.text)
+    if kind is Reuse:
+        return ('Reuse', node.slot)
+    if kind is BinOp:
+        # Les textes des opérandes apparaissent dans les messages d'erreur
+        return ('BinOp', node.op, expr_key(node.left), expr_key(node.right), node.left_text, node.right_text)
+    if kind is Compare:
+        return ('Compare', node.op, expr_key(node.left), expr_key(node.right))
+    if kind is Call:
+        return ('Call', node.name, id(node.function), tuple(expr_key(child) for child in children(node)),
+                node.fallback is not None)
+    return (kind.__name__, getattr(node, 'name', None), tuple(expr_key(child) for child in children(node)))
+
+
+def assigned_names(body: List[Stmt]) -> Set[str]:
+    """Variables affectées (ou déclarées, lues, parcourues) par un bloc, blocs imbriqués compris"""
+    names = set()
+    for stmt in body:
+        kind = stmt.__class__
+        if kind is Assign or kind is Read or kind is ReadItem or kind is StoreItem:
+            names.add(stmt.name)
+        elif kind is Declare or kind is DeclareArray:
+            names.update(entry[0] for entry in stmt.entries)
+        elif kind is If:
+            names |= assigned_names(stmt.then_body)
+            names |= assigned_names(stmt.else_body)
+        elif kind is For:
+            names.add(stmt.var)
+            names |= assigned_names(stmt.body)
+        elif kind is While or kind is Repeat:
+            names |= assigned_names(stmt.body)
+    return names
+
+
+def array_names(program: Program) -> Set[str]:
+    """
+    Variables qui peuvent désigner un tableau, dans tout le programme: un
+    tableau change sans être affecté (élément modifié, ici ou par un
+    sous-programme), sa valeur n'est donc jamais mémorisée. Un tableau
+    se transmet par affectation, par argument et par valeur retournée.
+    """
+    arrays = set()
+    aliases: List[Tuple[str, Expr]] = []
+
+    def visit_expr(node: Expr):
+        kind = node.__class__
+        if kind is Index:
+            arrays.add(node.name)
+        elif kind is FunctionCall:
+            aliases.extend(zip((name for name, _ in program.functions[node.name].params), node.args))
+        for child in children(node):
+            visit_expr(child)
+
+    def visit(body: List[Stmt]):
+        for stmt in body:
+            kind = stmt.__class__
+            if kind is DeclareArray or kind is StoreItem or kind is ReadItem:
+                arrays.update([entry[0] for entry in stmt.entries] if kind is DeclareArray else [stmt.name])
+            elif kind is Assign:
+                aliases.append((stmt.name, stmt.expr))
+            elif kind is Declare:
+                aliases.extend((name, init) for name, init in stmt.entries if init is not None)
+            elif kind is CallStmt:
+                aliases.extend(zip((name for name, _ in program.functions[stmt.name].params), stmt.args))
+            map_stmt(stmt, lambda node: visit_expr(node) or node, lambda block: visit(block) or block)
+
+    for function in program.functions.values():
+        arrays.update(name for name, kind in function.params if kind is None or kind == 'TABLEAU')
+        visit(function.body)
+    visit(program.body)
+
+    # Une variable reçoit un tableau d'une autre variable ou d'un appel
+    changed = True
+    while changed:
+        changed = False
+        for name, node in aliases:
+            if name in arrays:
+                continue
+            kind = node.__class__
+            if (kind is FunctionCall or ((kind is Var or kind is Lookup) and node.name in arrays)
+                    or (kind is Lookup and node.fallback.__class__ is Var and node.fallback.name in arrays)):
+                arrays.add(name)
+                changed = True
+    return arrays
+
+
+# Noeuds dont le calcul peut être mémorisé (les autres sont des lectures)
+REUSABLE = (BinOp, Compare, Not, And, Or, Call)
+
+
+class InvariantHoister:
+    """Mémorise les invariants de boucle et les sous-expressions communes (noeuds `Reuse`)"""
+
+    def __init__(self):
+        # Invariants de boucle et occurrences répétées remplacés, emplacements utilisés
+        self.hoisted = 0
+        self.shared = 0
+        self.slots = 0
+        self.arrays: Set[str] = set()
+        # id(noeud) -> (noeud, mémorisable, variables lues)
+        self._info: Dict[int, Tuple[Expr, bool, FrozenSet[str]]] = {}
+
+    def hoist(self, program: Program) -> Program:
+        self.hoisted = self.shared = self.slots = 0
+        self._info = {}
+        self.arrays = array_names(program)
+        functions = {
+            name: Function(function.name, function.procedure, function.params, function.return_type,
+                           self.block(function.body), function.line, function.end_line)
+            for name, function in program.functions.items()
+        }
+        return Program(self.block(program.body), program.lines, functions)
+
+    def new_slot(self) -> int:
+        self.slots += 1
+        return self.slots - 1
+
+    # ------------------------------------------------------------------
+    # Instructions
+    # ------------------------------------------------------------------
+
+    def block(self, body: List[Stmt]) -> List[Stmt]:
+        return [self.stmt(stmt) for stmt in body]
+
+    def stmt(self, stmt: Stmt) -> Stmt:
+        kind = stmt.__class__
+        if kind is For or kind is While or kind is Repeat:
+            stmt = self.loop(stmt)
+        # Puis les boucles imbriquées et les sous-expressions communes de chaque expression
+        return map_stmt(stmt, self.common, self.block)
+
+    def loop(self, stmt: Stmt) -> Stmt:
+        """Boucle dont les invariants (corps et condition) sont mémorisés jusqu'à la sortie"""
+        assigned = assigned_names([stmt])
+        slots: Dict[Hashable, int] = {}
+
+        def invariant(node: Expr) -> Expr:
+            if self.reusable(node) and not (self.info(node)[2] & assigned):
+                key = expr_key(node)
+                slot = slots.get(key)
+                if slot is None:
+                    slot = slots[key] = self.new_slot()
+                self.hoisted += 1
+                return Reuse(slot, node)
+            return map_children(node, invariant)
+
+        def block(body: List[Stmt]) -> List[Stmt]:
+            return [map_stmt(inner, invariant, block) for inner in body]
+
+        if stmt.__class__ is For:
+            # Les bornes sont calculées une fois, avant la boucle
+            loop = For(stmt.line, stmt.var, stmt.start, stmt.end, stmt.step, block(stmt.body))
+        else:
+            loop = map_stmt(stmt, invariant, block)
+        loop.invariants = tuple(slots.values())
+        return loop
+
+    # ------------------------------------------------------------------
+    # Expressions
+    # ------------------------------------------------------------------
+
+    def info(self, node: Expr) -> Tuple[Expr, bool, FrozenSet[str]]:
+        """(noeud, sans effet ni tableau, variables lues)"""
+        key = id(node)
+        info = self._info.get(key)
+        if info is None:
+            kind = node.__class__
+            if kind is Index or kind is FunctionCall:
+                info = (node, False, frozenset())
+            elif kind is Reuse:
+                info = (node, True, self.info(node.expr)[2])
+            else:
+                pure = True
+                names = set()
+                if kind is Var or kind is Lookup:
+                    pure = node.name not in self.arrays
+                    names.add(node.name)
+                for child in children(node):
+                    _, child_pure, child_names = self.info(child)
+                    pure = pure and child_pure
+                    names |= child_names
+                info = (node, pure, frozenset(names))
+            # Le noeud est conservé avec le résultat: son id ne peut pas être réutilisé
+            self._info[key] = info
+        return info
+
+    def reusable(self, node: Expr) -> bool:
+        """Calcul sans effet qui dépend d'au moins une variable"""
+        if not isinstance(node, REUSABLE):
+            return False
+        _, pure, names = self.info(node)
+        return pure and bool(names)
+
+    def common(self, node: Expr) -> Expr:
+        """Sous-expressions répétées dans `node`: calculées à la première occurrence, relues ensuite"""
+        counts: Dict[Hashable, List] = {}
+        self.count(node, counts, False)
+        # La première occurrence doit être évaluée à coup sûr (pas dans une branche de ET / OU)
+        repeated = {key for key, (count, certain) in counts.items() if count > 1 and certain}
+        if not repeated:
+            return node
+        return self.share(node, repeated, {})
+
+    def count(self, node: Expr, counts: Dict[Hashable, List], conditional: bool):
+        if self.reusable(node):
+            key = expr_key(node)
+            entry = counts.get(key)
+            if entry is None:
+                counts[key] = [1, not conditional]
+            else:
+                entry[0] += 1
+        kind = node.__class__
+        if kind is And or kind is Or:
+            for i, operand in enumerate(node.operands):
+                self.count(operand, counts, conditional or i > 0)
+        elif kind is Lookup:
+            # Repli évalué seulement pour une variable sans valeur
+            self.count(node.fallback, counts, True)
+        else:
+            for child in children(node):
+                self.count(child, counts, conditional)
+
+    def share(self, node: Expr, repeated: Set[Hashable], slots: Dict[Hashable, int]) -> Expr:
+        if self.reusable(node):
+            key = expr_key(node)
+            if key in repeated:
+                slot = slots.get(key)
+                if slot is not None:
+                    self.shared += 1
+                    return Reuse(slot, node)
+                slot = slots[key] = self.new_slot()
+                return Reuse(slot, map_children(node, lambda child: self.share(child, repeated, slots)), True)
+        return map_children(node, lambda child: self.share(child, repeated, slots))
@@ -0,0 +1,1476 @@
+"""
+Analyseur du pseudo-code
+========================
+Transforme le code source en arbre (`pseudo_ast`) une seule fois, avant
+l'exécution. Les règles de découpage reproduisent exactement celles de
+l'interpréteur historique (découpage par opérateur, priorité des
+opérateurs, repli sur le texte brut pour les noms inconnus), de sorte
+que la sortie des programmes existants reste identique.
+
+Les expressions sont lues en une passe par `ExpressionParser` (analyse
+par précédence, coût linéaire); celles qui sortent de sa grammaire
+(signe unaire, comparaisons enchaînées, ...) passent par les règles
+historiques de découpage, qui leur donnent un sens particulier.
+
+Les blocs (SI/SINON/FINSI, POUR/FINPOUR, TANT QUE/FINTANTQUE,
+REPETER/JUSQU'A) sont appariés en une seule passe juste après le
+prétraitement (`match_blocks`): un bloc non fermé ou une fin de bloc
+orpheline est signalé avant toute exécution, avec son numéro de ligne.
+Les autres erreurs de structure (SI sans ALORS, POUR invalide, ...) sont
+enregistrées dans l'arbre et levées au moment où l'exécution atteint la
+ligne fautive, comme auparavant.
+
+Les tableaux (`tab: TABLEAU[1..n] DE ENTIER`, voir `pseudo_arrays`) ne
+changent que les programmes qui en déclarent: dans leurs expressions,
+chaque `tab[...]` est remplacé par un nom réservé avant le découpage,
+si bien que les deux analyses d'expressions le lisent comme un opérande.
+
+Les sous-programmes (`FONCTION nom(a, b: ENTIER): ENTIER ... FIN`,
+`PROCEDURE nom(...) ... FIN`) sont repérés avant l'appariement des blocs:
+chacun est analysé dans sa propre portée (paramètres et variables
+locales), le programme principal dans la sienne. Un bloc ne peut pas
+déborder d'un sous-programme. Sans en-tête FONCTION ni PROCEDURE,
+l'analyse est inchangée.
+"""
+
+import re
+from typing import Dict, List, Optional, Set, Tuple
+
+from .pseudo_arrays import ELEMENT_DEFAULTS
+from .pseudo_ast import (
+    And, Assign, BinOp, Call, CallStmt, Compare, Const, Declare, DeclareArray, Expr, Fail, For, Function,
+    FunctionCall, If, Index, Lookup, Nop, Not, Or, Program, PseudoCodeError, Read, ReadItem, Repeat, Return,
+    Stmt, StoreItem, Var, While, Write,
+)
+
+
+STRUCTURE_KEYWORDS = ['DEBUT', 'FIN', 'ALGORITHME', 'PROGRAMME', 'VARIABLES', 'VAR']
+
+TYPE_KEYWORDS = ['ENTIER', 'REEL', 'RÉEL', 'CHAINE', 'CHAÎNE', 'BOOLEEN', 'BOOLÉEN', 'CARACTERE', 'CARACTÈRE']
+
+# Débuts de ligne d'une déclaration "TYPE noms" et types reconnus après ":"
+DECLARATION_PREFIXES = tuple(t + ' ' for t in TYPE_KEYWORDS) + tuple(t + ':' for t in TYPE_KEYWORDS)
+TYPE_PREFIXES = tuple(TYPE_KEYWORDS)
+
+COMPARISON_OPERATORS = ['<>', '!=', '<=', '>=', '<', '>', '==', '=']
+
+BUILTIN_FUNCTIONS = {'ABS', 'RACINE', 'SQRT', 'CARRE', 'SQR', 'PUISSANCE', 'POW',
+                     'ENT', 'INT', 'ARRONDI', 'ROUND', 'LONGUEUR', 'LEN'}
+
+# Premier mot d'une instruction -> (nature, début de ligne exigé)
+STATEMENT_KEYWORDS = {
+    'ECRIRE': ('write', 'ECRIRE'),
+    'AFFICHER': ('write', 'AFFICHER'),
+    'LIRE': ('read', 'LIRE'),
+    'SI': ('if', 'SI '),
+    'POUR': ('for', 'POUR '),
+    'TANT': ('while', 'TANT QUE'),
+    'TANTQUE': ('while', 'TANTQUE'),
+    'REPETER': ('repeat', 'REPETER'),
+    'RÉPÉTER': ('repeat', 'RÉPÉTER'),
+}
+
+# Expressions régulières, compilées une seule fois
+COMMENT_RE = re.compile(r'(?://|#).*$')
+FIRST_WORD_RE = re.compile(r'[^\W\d_]+')
+WRITE_ARGS_RE = re.compile(r'\((.*)\)', re.IGNORECASE)
+WRITE_KEYWORD_RE = re.compile(r'^(ECRIRE|AFFICHER)\s*', re.IGNORECASE)
+READ_ARGS_RE = re.compile(r'LIRE\s*\(([^)]+)\)', re.IGNORECASE)
+READ_KEYWORD_RE = re.compile(r'^LIRE\s*', re.IGNORECASE)
+IF_RE = re.compile(r'SI\s+(.+?)\s+ALORS', re.IGNORECASE)
+FOR_RE = re.compile(r'POUR\s+(\w+)\s+(?:DE|ALLANT DE)\s+(.+?)\s+(?:A|À|JUSQU\'?A|JUSQUA)\s+(.+?)\s+(?:FAIRE|PAS)?', re.IGNORECASE)
+FOR_ARROW_RE = re.compile(r'POUR\s+(\w+)\s*←\s*(.+?)\s+(?:A|À)\s+(.+?)\s+FAIRE', re.IGNORECASE)
+STEP_RE = re.compile(r'PAS\s+(-?\d+)', re.IGNORECASE)
+WHILE_RE = re.compile(r'TANT\s*QUE\s+(.+?)\s+FAIRE', re.IGNORECASE)
+UNTIL_RE = re.compile(r"JUSQU'?\s*[AÀ]\s+(.+)", re.IGNORECASE)
+CALL_RE = re.compile(r'(\w+)\s*\((.+)\)', re.IGNORECASE)
+
+# Tableaux: "tab, notes : TABLEAU[1..10] DE ENTIER" ou "TABLEAU t[10], u[0..4] : REEL"
+ARRAY_DECLARATION_RE = re.compile(
+    r"^(?:VAR(?:IABLES)?(?:\s*:\s*|\s+))?(.+?)\s*:\s*TABLEAU\s*\[([^\]]+)\]\s*(?:DE\s+|D['’]\s*)(\w+)$",
+    re.IGNORECASE)
+ARRAY_PREFIX_RE = re.compile(r"^TABLEAU\s+(.+?)\s*(?::|\sDE\s+|\sD['’]\s*)\s*(\w+)$", re.IGNORECASE)
+ARRAY_ENTRY_RE = re.compile(r'\s*([^\W\d]\w*)\s*\[([^\]]+)\]\s*(?:,|$)')
+IDENTIFIER_RE = re.compile(r'[^\W\d]\w*$')
+ITEM_RE = re.compile(r'([^\W\d]\w*)\s*\[(.*)\]$', re.DOTALL)
+ITEM_NAME_RE = re.compile(r'_element\d+_', re.IGNORECASE)
+
+# Sous-programmes: "FONCTION Max(a, b: ENTIER): ENTIER", "PROCEDURE Afficher(nom: CHAINE)"
+SUBPROGRAM_RE = re.compile(
+    r'^(FONCTION|PROC[EÉ]DURE)\s+([^\W\d]\w*)\s*(?:\((.*)\))?\s*(?::\s*(.+))?$', re.IGNORECASE)
+SUBPROGRAM_END_RE = re.compile(r'^FIN\s*(?:FONCTION|PROC[EÉ]DURE)?$', re.IGNORECASE)
+RETURN_RE = re.compile(r'^(?:RETOURNER|RETOURNE|RENVOYER|RENVOIE)(?!\w)\s*(.*)$', re.IGNORECASE)
+CALL_STATEMENT_RE = re.compile(r'^(?:APPELER\s+)?([^\W\d]\w*)\s*(?:\((.*)\))?$', re.IGNORECASE)
+EMPTY_CALL_RE = re.compile(r'([^\W\d]\w*)\s*\(\s*\)$')
+PARAMETER_SEPARATOR_RE = re.compile(r'[;,]')
+
+# Priorité des opérateurs binaires, du moins au plus prioritaire: c'est
+# l'ordre dans lequel les règles historiques découpent une expression.
+# Le niveau des comparaisons est aussi celui de l'opérande de NON.
+COMPARISON_PRECEDENCE = 5
+BINARY_PRECEDENCE = {
+    'OU': 1, 'OR': 2, 'ET': 3, 'AND': 4,
+    **{op: COMPARISON_PRECEDENCE for op in COMPARISON_OPERATORS},
+    '+': 6, '-': 6, '*': 7, '/': 7, 'MOD': 8, 'DIV': 9,
+}
+LOGICAL_OPERATORS = {'OU': Or, 'OR': Or, 'ET': And, 'AND': And}
+LOGICAL_WORDS = {'OU', 'OR', 'ET', 'AND', 'NON', 'NOT'}
+WORD_OPERATORS = LOGICAL_WORDS | {'MOD', 'DIV'}
+
+# Lexèmes après lesquels "-5" est un nombre négatif et non une soustraction
+SIGN_CONTEXT = {'+', '-', '*', '/', '(', ','}
+
+# Structures de bloc: mot d'ouverture et mot de fermeture (pour les messages)
+BLOCK_KEYWORDS = {
+    'if': ('SI', 'FINSI'),
+    'for': ('POUR', 'FINPOUR'),
+    'while': ('TANT QUE', 'FINTANTQUE'),
+    'repeat': ('REPETER', "JUSQU'A"),
+}
+
+
+def preprocess(code: str) -> List[str]:
+    """Prétraite le code: supprime commentaires, normalise"""
+    lines = []
+    for line in code.split('\n'):
+        # Supprimer les commentaires (// ou #)
+        line = COMMENT_RE.sub('', line)
+
+        # Normaliser les espaces
+        line = line.strip()
+
+        # Supprimer le point-virgule en fin de ligne (style C/Pascal)
+        if line.endswith(';'):
+            line = line[:-1].strip()
+
+        # Ignorer les lignes vides
+        if line:
+            # Normaliser les flèches d'affectation
+            line = line.replace('<-', '←')
+            line = line.replace(':=', '←')
+
+            # Convertir = en ← pour les affectations (pas les comparaisons)
+            # Une affectation: variable = expression (pas dans SI, pas ==, pas <=, >=, <>)
+            line_upper = line.upper()
+            if '=' in line and '←' not in line:
+                # Ne pas convertir si c'est une comparaison
+                if not any(op in line for op in ['==', '<=', '>=', '<>', '!=']):
+                    # Ne pas convertir si c'est dans une condition SI ou TANT QUE
+                    if not line_upper.startswith('SI ') and not line_upper.startswith('TANT QUE'):
+                        # Convertir le premier = en ←
+                        line = line.replace('=', '←', 1)
+
+            lines.append(line)
+
+    return lines
+
+
+def block_marker(line: str) -> Optional[Tuple[str, str]]:
+    """Rôle de la ligne dans les blocs: ('open' | 'close' | 'else', structure) ou None"""
+    upper = line.upper()
+    if upper.startswith('SI '):
+        return 'open', 'if'
+    if upper == 'FINSI' or upper == 'FIN SI':
+        return 'close', 'if'
+    if upper == 'SINON':
+        return 'else', 'if'
+    if upper.startswith('POUR '):
+        return 'open', 'for'
+    if upper == 'FINPOUR' or upper == 'FIN POUR':
+        return 'close', 'for'
+    if upper.startswith('TANT QUE') or upper.startswith('TANTQUE'):
+        return 'open', 'while'
+    if upper == 'FINTANTQUE' or upper == 'FIN TANT QUE' or upper == 'FINTQ':
+        return 'close', 'while'
+    if upper.startswith('REPETER') or upper.startswith('RÉPÉTER'):
+        return 'open', 'repeat'
+    if upper.startswith('JUSQU'):
+        return 'close', 'repeat'
+    return None
+
+
+def match_blocks(lines: List[str], first: int = 0, last: Optional[int] = None
+                 ) -> Tuple[Dict[int, int], Dict[int, int]]:
+    """
+    Apparie les débuts et fins de blocs en une seule passe (lignes de
+    `first` à `last` exclue: le corps d'un sous-programme).
+
+    Returns:
+        (fins, sinons): index de la ligne de fermeture pour chaque ligne
+        d'ouverture, et index du SINON pour chaque SI qui en a un.
+
+    Raises:
+        PseudoCodeError: bloc non fermé ou fin de bloc sans début, avec
+        le numéro de la ligne fautive.
+    """
+    ends: Dict[int, int] = {}
+    elses: Dict[int, int] = {}
+    stack: List[Tuple[str, int]] = []
+
+    for i in range(first, len(lines) if last is None else last):
+        marker = block_marker(lines[i])
+        if marker is None:
+            continue
+        role, kind = marker
+
+        if role == 'open':
+            stack.append((kind, i))
+            continue
+
+        if not any(open_kind == kind for open_kind, _ in stack):
+            opening, closing = BLOCK_KEYWORDS[kind]
+            word = 'SINON' if role == 'else' else closing
+            raise PseudoCodeError(f"{word} sans {opening} correspondant", i + 1)
+
+        # Le bloc le plus interne doit être fermé avant ceux qui l'englobent
+        open_kind, start = stack[-1]
+        if open_kind != kind:
+            raise PseudoCodeError(f"{BLOCK_KEYWORDS[open_kind][1]} manquant", start + 1)
+
+        if role == 'else':
+            # Plusieurs SINON: le dernier l'emporte
+            elses[start] = i
+        else:
+            stack.pop()
+            ends[start] = i
+
+    if stack:
+        open_kind, start = stack[-1]
+        raise PseudoCodeError(f"{BLOCK_KEYWORDS[open_kind][1]} manquant", start + 1)
+
+    return ends, elses
+
+
+def find_subprograms(lines: List[str]) -> List[Tuple[int, int, re.Match]]:
+    """
+    Repère les sous-programmes: (index de l'en-tête, index du FIN, en-tête)
+    pour chaque FONCTION ou PROCEDURE, dans l'ordre du code.
+
+    Raises:
+        PseudoCodeError: en-tête sans FIN (ou suivi d'un autre en-tête
+        avant son FIN), avec le numéro de la ligne de l'en-tête.
+    """
+    found = []
+    i = 0
+    while i < len(lines):
+        header = SUBPROGRAM_RE.match(lines[i])
+        if header is None:
+            i += 1
+            continue
+        end = None
+        for j in range(i + 1, len(lines)):
+            if SUBPROGRAM_RE.match(lines[j]):
+                break
+            if SUBPROGRAM_END_RE.match(lines[j]):
+                end = j
+                break
+        if end is None:
+            kind = 'PROCEDURE' if header.group(1).upper().startswith('PROC') else 'FONCTION'
+            raise PseudoCodeError(f"FIN manquant pour la {kind} {header.group(2)}", i + 1)
+        found.append((i, end, header))
+        i = end + 1
+    return found
+
+
+def normalize_type(text: str) -> Optional[str]:
+    """Type d'un paramètre ou d'un résultat (ENTIER, REEL, ..., TABLEAU), None s'il est inconnu"""
+    upper = text.strip().upper()
+    if upper.startswith('TABLEAU'):
+        return 'TABLEAU'
+    for t in TYPE_KEYWORDS:
+        if upper.startswith(t):
+            return t.replace('É', 'E').replace('Î', 'I')
+    return None
+
+
+def parse_parameters(text: Optional[str], line: int) -> List[Tuple[str, Optional[str]]]:
+    """
+    Paramètres d'un en-tête: [(nom, type ou None)]. Formats acceptés:
+    `a, b: ENTIER; c: REEL`, `a: ENTIER, b: ENTIER`, `ENTIER a`, `a, b`.
+    """
+    params = []
+    pending = []
+    for piece in PARAMETER_SEPARATOR_RE.split(text or ''):
+        piece = piece.strip()
+        if not piece:
+            continue
+        name, colon, type_text = piece.partition(':')
+        words = name.split()
+        declared = None
+        # Format "ENTIER a"
+        if len(words) == 2 and normalize_type(words[0]) is not None:
+            declared = normalize_type(words[0])
+            words = words[1:]
+        if len(words) != 1 or not IDENTIFIER_RE.match(words[0]):
+            raise PseudoCodeError(f"Paramètre invalide: {piece}", line)
+        if colon:
+            declared = normalize_type(type_text)
+            if declared is None:
+                raise PseudoCodeError(f"Type inconnu: {type_text.strip()}", line)
+        pending.append(words[0].lower())
+        # "a, b: ENTIER": le type s'applique aux noms qui le précèdent
+        if declared is not None:
+            params.extend((param, declared) for param in pending)
+            pending = []
+    params.extend((param, None) for param in pending)
+
+    names = [name for name, _ in params]
+    for name in names:
+        if names.count(name) > 1:
+            raise PseudoCodeError(f"Paramètre en double: {name}", line)
+    return params
+
+
+def is_declaration(line: str) -> bool:
+    """Vérifie si la ligne est une déclaration de variable"""
+    upper = line.upper()
+
+    # Format 1: TYPE var1, var2 (ex: entier x, y)
+    if upper.startswith(DECLARATION_PREFIXES):
+        return True
+
+    # Format 2: var1, var2 : TYPE (ex: x, y : entier  ou  variables: x, y : entier)
+    # Couvre aussi VARIABLES: var1, var2 : TYPE (même texte après le dernier ":")
+    if ':' in upper:
+        after_colon = upper.rpartition(':')[2].strip()
+        if after_colon.startswith(TYPE_PREFIXES):
+            return True
+
+    return False
+
+
+def parse_declaration(line: str) -> Tuple[Optional[str], List[Tuple[str, Optional[str]]]]:
+    """Extrait le type et les variables déclarées: (type, [(nom, texte initial ou None)])"""
+    upper = line.upper()
+
+    var_type = None
+    var_names_str = ""
+
+    # Nettoyer la ligne si elle commence par "VARIABLES:" ou "VARIABLES :"
+    working_line = line
+    if upper.startswith('VARIABLES'):
+        working_line = line[len('VARIABLES'):].strip()
+        if working_line.startswith(':'):
+            working_line = working_line[1:].strip()
+    upper = working_line.upper()
+
+    # Format 1: TYPE var1, var2 (ex: entier x, y)
+    for t in TYPE_KEYWORDS:
+        if upper.startswith(t):
+            var_type = t.replace('É', 'E').replace('Î', 'I')
+            var_names_str = working_line[len(t):].strip().lstrip(':').strip()
+            break
+
+    # Format 2: var1, var2 : TYPE (ex: x, y : entier  ou  annee, age, anneeac : entier)
+    if var_type is None and ':' in working_line:
+        parts = working_line.split(':')
+        if len(parts) >= 2:
+            potential_type = parts[-1].strip().upper()
+            for t in TYPE_KEYWORDS:
+                if potential_type.startswith(t):
+                    var_type = t.replace('É', 'E').replace('Î', 'I')
+                    # Les noms sont tout ce qui précède le dernier ":"
+                    var_names_str = ':'.join(parts[:-1]).strip()
+                    break
+
+    if not var_type:
+        return None, []
+
+    entries = []
+    for var_name in [v.strip() for v in var_names_str.split(',')]:
+        # Gérer l'initialisation inline: entier x ← 5
+        if '←' in var_name:
+            parts = var_name.split('←')
+            entries.append((parts[0].strip().lower(), parts[1].strip()))
+        elif var_name:
+            entries.append((var_name.lower(), None))
+
+    return var_type, entries
+
+
+def parse_array_declaration(line: str) -> Optional[Tuple[str, List[Tuple[str, str, str]]]]:
+    """
+    Extrait le type des éléments et les tableaux déclarés:
+    (type, [(nom, texte de la borne basse, texte de la borne haute)]),
+    None si la ligne ne déclare pas de tableau.
+    """
+    match = ARRAY_DECLARATION_RE.match(line)
+    if match:
+        names, bounds, word = match.groups()
+        declared = [(name.strip(), bounds) for name in names.split(',')]
+    else:
+        match = ARRAY_PREFIX_RE.match(line)
+        if not match:
+            return None
+        items, word = match.groups()
+        declared = ARRAY_ENTRY_RE.findall(items)
+        if not declared or ''.join(ARRAY_ENTRY_RE.sub('', items).split()):
+            return None
+
+    # ENTIER, entiers, réels, chaîne...
+    element_type = word.upper().replace('É', 'E').replace('È', 'E').replace('Î', 'I')
+    if element_type not in ELEMENT_DEFAULTS and element_type.endswith('S'):
+        element_type = element_type[:-1]
+    if element_type not in ELEMENT_DEFAULTS:
+        return None
+
+    entries = []
+    for name, bounds in declared:
+        if not IDENTIFIER_RE.match(name):
+            return None
+        # [n] équivaut à [1..n]
+        low, separator, high = bounds.partition('..')
+        if not separator:
+            low, high = '1', bounds
+        entries.append((name.lower(), low.strip(), high.strip()))
+    return element_type, entries
+
+
+def find_closing_bracket(text: str, start: int) -> Optional[int]:
+    """Position du "]" qui ferme le "[" en `start` (hors chaînes), None s'il manque"""
+    depth = 0
+    i = start
+    n = len(text)
+    while i < n:
+        char = text[i]
+        if char in '"\'':
+            end = text.find(char, i + 1)
+            if end < 0:
+                return None
+            i = end
+        elif char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+            if depth == 0:
+                return i
+        i += 1
+    return None
+
+
+def split_arguments(content: str) -> List[str]:
+    """Sépare les arguments en tenant compte des chaînes"""
+    args = []
+    current = ""
+    in_string = False
+    string_char = None
+    depth = 0
+
+    for char in content:
+        if char in '"\'':
+            if not in_string:
+                in_string = True
+                string_char = char
+            elif char == string_char:
+                in_string = False
+            current += char
+        elif char == '(' and not in_string:
+            depth += 1
+            current += char
+        elif char == ')' and not in_string:
+            depth -= 1
+            current += char
+        elif char == ',' and not in_string and depth == 0:
+            args.append(current.strip())
+            current = ""
+        else:
+            current += char
+
+    if current.strip():
+        args.append(current.strip())
+
+    return args
+
+
+def tokenize_expression(expr: str) -> List[str]:
+    """Tokenize une expression en identifiants, nombres, opérateurs et chaînes"""
+    tokens = []
+    i = 0
+    while i < len(expr):
+        char = expr[i]
+
+        # Ignorer les espaces
+        if char.isspace():
+            i += 1
+            continue
+
+        # Chaîne de caractères
+        if char in '"\'':
+            end_char = char
+            j = i + 1
+            while j < len(expr) and expr[j] != end_char:
+                j += 1
+            tokens.append(expr[i:j+1])
+            i = j + 1
+            continue
+
+        # Nombre
+        if char.isdigit() or (char == '-' and i + 1 < len(expr) and expr[i+1].isdigit() and (not tokens or tokens[-1] in ['+', '-', '*', '/', '(', ','])):
+            j = i
+            if char == '-':
+                j += 1
+            while j < len(expr) and (expr[j].isdigit() or expr[j] == '.'):
+                j += 1
+            tokens.append(expr[i:j])
+            i = j
+            continue
+
+        # Identifiant (variable ou mot-clé)
+        if char.isalpha() or char == '_':
+            j = i
+            while j < len(expr) and (expr[j].isalnum() or expr[j] == '_'):
+                j += 1
+            tokens.append(expr[i:j])
+            i = j
+            continue
+
+        # Opérateurs multi-caractères
+        if i + 1 < len(expr):
+            two_char = expr[i:i+2]
+            if two_char in ['<=', '>=', '<>', '!=', '==']:
+                tokens.append(two_char)
+                i += 2
+                continue
+
+        # Opérateur simple ou parenthèse
+        tokens.append(char)
+        i += 1
+
+    return tokens
+
+
+def lex_expression(expr: str) -> List[Tuple[str, str, int, int]]:
+    """
+    Découpe une expression en lexèmes (nature, texte, début, fin).
+
+    Mêmes règles que `tokenize_expression`; un "-" collé à un chiffre est
+    aussi lu comme un signe après une comparaison ou un opérateur logique,
+    là où les règles historiques commencent un nouvel opérande (nature
+    'signed').
+    """
+    tokens = []
+    i = 0
+    n = len(expr)
+    while i < n:
+        char = expr[i]
+
+        if char.isspace():
+            i += 1
+            continue
+
+        if char in '"\'':
+            j = i + 1
+            while j < n and expr[j] != char:
+                j += 1
+            tokens.append(('str', expr[i:j + 1], i, min(j + 1, n)))
+            i = j + 1
+            continue
+
+        if char.isdigit() or (char == '-' and i + 1 < n and expr[i + 1].isdigit() and (
+                not tokens or tokens[-1][1] in SIGN_CONTEXT or tokens[-1][0] == 'op'
+                or tokens[-1][1].upper() in LOGICAL_WORDS)):
+            kind = 'num' if char != '-' or not tokens or tokens[-1][1] in SIGN_CONTEXT else 'signed'
+            j = i + 1
+            while j < n and (expr[j].isdigit() or expr[j] == '.'):
+                j += 1
+            tokens.append((kind, expr[i:j], i, j))
+            i = j
+            continue
+
+        if char.isalpha() or char == '_':
+            j = i
+            while j < n and (expr[j].isalnum() or expr[j] == '_'):
+                j += 1
+            tokens.append(('name', expr[i:j], i, j))
+            i = j
+            continue
+
+        two_char = expr[i:i + 2]
+        if two_char in ('<=', '>=', '<>', '!=', '=='):
+            tokens.append(('op', two_char, i, i + 2))
+            i += 2
+            continue
+
+        if char in '+-*/<>=':
+            kind = 'op'
+        elif char in '(),':
+            kind = char
+        else:
+            kind = 'other'
+        tokens.append((kind, char, i, i + 1))
+        i += 1
+
+    return tokens
+
+
+def split_by_operator(expr: str, op: str) -> List[str]:
+    """Sépare une expression par un opérateur en respectant les parenthèses"""
+    parts = []
+    current = ""
+    depth = 0
+    in_string = False
+    string_char = None
+    op_upper = op.upper()
+    i = 0
+
+    while i < len(expr):
+        char = expr[i]
+
+        if char in '"\'':
+            if not in_string:
+                in_string = True
+                string_char = char
+            elif char == string_char:
+                in_string = False
+            current += char
+        elif char == '(' and not in_string:
+            depth -= 1
+            current += char
+        elif char == ')' and not in_string:
+            depth += 1
+            current += char
+        elif depth == 0 and not in_string and expr[i:i + len(op)].upper() == op_upper:
+            # Opérateur trouvé
+            parts.append(current)
+            current = ""
+            i += len(op) - 1
+        else:
+            current += char
+
+        i += 1
+
+    if current:
+        parts.append(current)
+
+    return parts
+
+
+def _wrapped_in_parentheses(expr: str) -> bool:
+    """Vérifie que la première parenthèse ferme à la fin de l'expression"""
+    if not (expr.startswith('(') and expr.endswith(')')):
+        return False
+    depth = 0
+    for i, c in enumerate(expr):
+        if c == '(':
+            depth += 1
+        elif c == ')':
+            depth -= 1
+        if depth == 0 and i < len(expr) - 1:
+            return False
+    return True
+
+
+class IrregularExpression(Exception):
+    """Expression hors de la grammaire de `ExpressionParser`"""
+
+
+class ExpressionParser:
+    """
+    Analyse d'une expression en une passe, par précédence (Pratt).
+
+    Chaque lexème n'est lu qu'une fois et les suites d'opérateurs de même
+    niveau sont construites par une boucle (associativité à gauche pour
+    + - * /), si bien que le coût est linéaire dans la longueur de
+    l'expression. L'arbre obtenu est celui des règles historiques de
+    découpage (`PseudoParser.split_expression`), qui restent appliquées
+    aux expressions hors grammaire: signe unaire, comparaisons
+    enchaînées, opérateur en toutes lettres sans espaces, fonction
+    inconnue, juxtaposition... Celles-ci lèvent `IrregularExpression`.
+    """
+
+    def __init__(self, owner: 'PseudoParser', text: str):
+        self.owner = owner
+        self.text = text
+        self.tokens = lex_expression(text)
+        self.pos = 0
+        self.signed = [i for i, token in enumerate(self.tokens) if token[0] == 'signed']
+        self._texts: Dict[bool, List[str]] = {}
+
+    def parse(self) -> Expr:
+        # Un lexème seul relève des règles historiques (nom ou texte brut)
+        if len(self.tokens) < 2:
+            raise IrregularExpression
+        node = self.binary(0, False)
+        if self.pos != len(self.tokens):
+            raise IrregularExpression
+        return node
+
+    def token_texts(self, upper: bool) -> List[str]:
+        """Textes des lexèmes (en majuscules pour les opérandes de MOD et DIV)"""
+        texts = self._texts.get(upper)
+        if texts is None:
+            texts = self._texts[upper] = self.owner.source_tokens(
+                [t[1].upper() if upper else t[1] for t in self.tokens])
+        return texts
+
+    def infix_operator(self, index: int) -> Optional[str]:
+        """Opérateur binaire au lexème `index`, None sinon"""
+        if index >= len(self.tokens):
+            return None
+        kind, text, start, end = self.tokens[index]
+        if kind == 'op':
+            return text
+        if kind == 'name':
+            word = text.upper()
+            # Les opérateurs en toutes lettres sont entourés d'espaces
+            if word in BINARY_PRECEDENCE and self.text[start - 1:start] == ' ' and self.text[end:end + 1] == ' ':
+                return word
+        return None
+
+    def check_operand(self, start: int, end: int):
+        """Un opérande encadré de guillemets serait lu comme une seule chaîne"""
+        first = self.tokens[start]
+        if first[0] == 'str' and end - start > 1:
+            last = self.tokens[end - 1]
+            if last[0] == 'str' and first[1][0] == last[1][-1]:
+                raise IrregularExpression
+
+    def check_signed(self, start: int):
+        """
+        Signe hors d'atteinte: les règles historiques redécoupent en lexèmes
+        le texte d'une opération arithmétique, où "= -5" devient "= - 5".
+        """
+        if self.signed and any(start < i < self.pos for i in self.signed):
+            raise IrregularExpression
+
+    def operand(self, min_precedence: int, upper: bool) -> Expr:
+        start = self.pos
+        node = self.binary(min_precedence, upper)
+        self.check_operand(start, self.pos)
+        return node
+
+    def binary(self, min_precedence: int, upper: bool) -> Expr:
+        """Expression dont les opérateurs sont de priorité >= min_precedence"""
+        tokens = self.tokens
+        start = self.pos
+        left = self.prefix(min_precedence, upper)
+
+        while self.pos < len(tokens):
+            kind, op = tokens[self.pos][:2]
+            if kind in (')', ','):
+                break
+            if kind != 'op':
+                op = self.infix_operator(self.pos)
+                if op is None:
+                    raise IrregularExpression
+            precedence = BINARY_PRECEDENCE[op]
+            if precedence < min_precedence:
+                break
+            split = self.pos
+            self.check_operand(start, split)
+            self.pos += 1
+
+            if op in LOGICAL_OPERATORS:
+                operands = [left, self.operand(precedence + 1, upper)]
+                while self.infix_operator(self.pos) == op:
+                    self.pos += 1
+                    operands.append(self.operand(precedence + 1, upper))
+                left = LOGICAL_OPERATORS[op](operands)
+                continue
+
+            if precedence == COMPARISON_PRECEDENCE:
+                left = Compare(op, left, self.operand(precedence + 1, upper))
+            elif op in ('MOD', 'DIV'):
+                # Les deux opérandes sont lus en majuscules
+                if not upper:
+                    self.pos = start
+                    left = self.operand(precedence + 1, True)
+                    if self.pos != split:
+                        raise IrregularExpression
+                    self.pos += 1
+                left = BinOp(op, left, self.operand(precedence + 1, True))
+                self.check_signed(start)
+            else:
+                right = self.operand(precedence + 1, upper)
+                self.check_signed(start)
+                left = BinOp(op, left, right, (self.token_texts(upper), start, split, self.pos))
+                continue
+
+            # Comparaisons, MOD et DIV ne s'enchaînent pas
+            following = self.infix_operator(self.pos)
+            if following is not None and BINARY_PRECEDENCE[following] == precedence:
+                raise IrregularExpression
+
+        return left
+
+    def prefix(self, min_precedence: int, upper: bool) -> Expr:
+        """Opérande: NON, parenthèses, appel de fonction, littéral ou nom"""
+        tokens = self.tokens
+        if self.pos >= len(tokens):
+            raise IrregularExpression
+        kind, text, _, end = tokens[self.pos]
+
+        if kind == 'name':
+            word = text.upper()
+            if word in WORD_OPERATORS:
+                if word not in ('NON', 'NOT') or self.text[end:end + 1] != ' ':
+                    raise IrregularExpression
+                self.pos += 1
+                return Not(self.operand(max(min_precedence, COMPARISON_PRECEDENCE), upper))
+            if self.pos + 1 < len(tokens) and tokens[self.pos + 1][0] == '(':
+                return self.call(upper)
+        elif kind == '(':
+            return self.group(upper)
+        elif kind == 'str':
+            if len(text) < 2 or text[-1] != text[0] or '(' in text or ')' in text:
+                raise IrregularExpression
+        elif kind not in ('num', 'signed'):
+            raise IrregularExpression
+        self.pos += 1
+        return self.owner.expression(text.upper() if upper else text)
+
+    def group(self, upper: bool) -> Expr:
+        opening = self.pos
+        self.pos += 1
+        node = self.binary(0, upper)
+        if self.pos >= len(self.tokens) or self.tokens[self.pos][0] != ')':
+            raise IrregularExpression
+        self.pos += 1
+        if self.pos - opening == 3:
+            # "(x)": nom ou texte brut, sans conversion de littéral
+            text = self.tokens[opening + 1][1]
+            return self.owner._name_or_text(text.upper() if upper else text)
+        return node
+
+    def call(self, upper: bool) -> Expr:
+        name = self.tokens[self.pos][1]
+        # Une FONCTION du programme l'emporte sur une fonction prédéfinie du même nom
+        function = name.lower() in self.owner.functions
+        if not function and name.upper() not in BUILTIN_FUNCTIONS:
+            raise IrregularExpression
+        self.pos += 2
+        if function and self.pos < len(self.tokens) and self.tokens[self.pos][0] == ')':
+            self.pos += 1
+            return FunctionCall(name.lower(), [])
+        args = [self.operand(0, upper)]
+        while self.pos < len(self.tokens) and self.tokens[self.pos][0] == ',':
+            self.pos += 1
+            args.append(self.operand(0, upper))
+        if self.pos >= len(self.tokens) or self.tokens[self.pos][0] != ')':
+            raise IrregularExpression
+        self.pos += 1
+        if function:
+            return FunctionCall(name.lower(), args)
+        return Call(name.upper(), args)
+
+
+class PseudoParser:
+    """Construit l'arbre d'un programme de pseudo-code"""
+
+    def __init__(self):
+        self.lines: List[str] = []
+        self.names: Set[str] = set()
+        self.block_ends: Dict[int, int] = {}
+        self.block_elses: Dict[int, int] = {}
+        self._expressions: Dict[str, Expr] = {}
+        self._complex: Dict[str, Expr] = {}
+        self._single_token_names = True
+        self.arrays: Set[str] = set()
+        # Éléments de tableau masqués: nom réservé -> (tableau, texte de l'indice)
+        self._items: Dict[str, Tuple[str, str]] = {}
+        self._item_names: Dict[Tuple[str, str], str] = {}
+        # Sous-programmes: nom -> Function, index de l'en-tête -> index du FIN
+        self.functions: Dict[str, Function] = {}
+        self.subprograms: Dict[int, int] = {}
+        # Sous-programme en cours d'analyse (None: programme principal)
+        self.scope: Optional[Function] = None
+
+    def parse(self, code: str) -> Program:
+        """Prétraite et analyse le code source (PseudoCodeError si les blocs sont déséquilibrés)"""
+        self.lines = preprocess(code)
+        found = find_subprograms(self.lines)
+        self.functions = {}
+        for start, end, header in found:
+            function = self.parse_header(header, start, end)
+            if function.name in self.functions:
+                raise PseudoCodeError(f"{function.kind} {function.name} déjà définie", start + 1)
+            self.functions[function.name] = function
+        self.subprograms = {start: end for start, end, _ in found}
+
+        # Chaque sous-programme et chaque partie du programme principal
+        # ferme ses propres blocs
+        self.block_ends, self.block_elses = {}, {}
+        for first, last in self.segments():
+            ends, elses = match_blocks(self.lines, first, last)
+            self.block_ends.update(ends)
+            self.block_elses.update(elses)
+
+        for function in self.functions.values():
+            self.scope = function
+            self.enter_scope(range(function.line, function.end_line - 1), function.params)
+            function.body = self.parse_block(function.line, function.end_line - 1)
+        self.scope = None
+
+        self.enter_scope([i for i in range(len(self.lines)) if not self.in_subprogram(i)])
+        body = self.parse_block(0, len(self.lines))
+        return Program(body, self.lines, self.functions)
+
+    def enter_scope(self, indices, params: List[Tuple[str, Optional[str]]] = ()):
+        """Noms et tableaux d'une portée: lignes `indices` et paramètres `params`"""
+        lines = [self.lines[i] for i in indices]
+        self.arrays = self.collect_arrays(lines) | {name for name, kind in params if kind == 'TABLEAU'}
+        self._items = {}
+        self._item_names = {}
+        self.names = self.collect_names(lines) | {name for name, _ in params}
+        # Un nom fait de plusieurs lexèmes ("t[i]", "a b") peut désigner un
+        # opérande entier: seules les règles historiques le reconnaissent
+        self._single_token_names = all(len(lex_expression(name)) == 1 for name in self.names)
+        self._expressions = {}
+        self._complex = {}
+
+    # ------------------------------------------------------------------
+    # Sous-programmes
+    # ------------------------------------------------------------------
+
+    def parse_header(self, header: re.Match, start: int, end: int) -> Function:
+        """FONCTION ou PROCEDURE (corps vide, analysé ensuite) depuis son en-tête"""
+        keyword, name, params_text, result_text = header.groups()
+        procedure = keyword.upper().startswith('PROC')
+        params = parse_parameters(params_text, start + 1)
+        return_type = None
+        if result_text is not None:
+            if procedure:
+                raise PseudoCodeError(f"Une PROCEDURE ne retourne pas de valeur: {self.lines[start]}", start + 1)
+            return_type = normalize_type(result_text)
+            if return_type is None:
+                raise PseudoCodeError(f"Type inconnu: {result_text.strip()}", start + 1)
+        return Function(name.lower(), procedure, params, return_type, [], start + 1, end + 1)
+
+    def segments(self) -> List[Tuple[int, int]]:
+        """Plages de lignes (début, fin exclue) dont les blocs s'apparient entre eux"""
+        segments = []
+        first = 0
+        for start, end in sorted(self.subprograms.items()):
+            segments.append((first, start))
+            segments.append((start + 1, end))
+            first = end + 1
+        segments.append((first, len(self.lines)))
+        return segments
+
+    def in_subprogram(self, index: int) -> bool:
+        return any(start <= index <= end for start, end in self.subprograms.items())
+
+    def call_target(self, line: str) -> Optional[Tuple[str, List[str]]]:
+        """(nom, textes des arguments) si la ligne appelle un sous-programme du programme"""
+        match = CALL_STATEMENT_RE.match(line)
+        if match is None or match.group(1).lower() not in self.functions:
+            return None
+        args = match.group(2)
+        return match.group(1).lower(), split_arguments(args) if args and args.strip() else []
+
+    def function_call(self, expr: str) -> Optional[FunctionCall]:
+        """Appel d'une FONCTION du programme dans une expression: nom(arguments)"""
+        match = EMPTY_CALL_RE.match(expr)
+        if match is not None and match.group(1).lower() in self.functions:
+            return FunctionCall(match.group(1).lower(), [])
+        match = CALL_RE.match(expr)
+        if match is not None and match.group(1).lower() in self.functions:
+            return FunctionCall(match.group(1).lower(),
+                                [self.expression(arg.strip()) for arg in split_arguments(match.group(2))])
+        return None
+
+    def parse_return(self, line: str, lineno: int) -> Stmt:
+        """RETOURNER [expression], selon le sous-programme en cours"""
+        # Le prétraitement a pu lire "RETOURNER a = b" comme une affectation
+        text = RETURN_RE.match(line).group(1).replace('←', '=').strip()
+        function = self.scope
+        if function is None:
+            return Fail(lineno, f"RETOURNER en dehors d'une FONCTION: {line}")
+        if function.procedure:
+            if text:
+                return Fail(lineno, f"Une PROCEDURE ne retourne pas de valeur: {line}")
+            return Return(lineno, None)
+        if not text:
+            return Fail(lineno, f"RETOURNER sans valeur dans la FONCTION {function.name}")
+        return Return(lineno, self.expression(text))
+
+    # ------------------------------------------------------------------
+    # Instructions
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def classify(line: str) -> str:
+        """Retourne la nature d'une ligne (même ordre de priorité qu'à l'exécution)"""
+        upper = line.upper()
+        if upper in STRUCTURE_KEYWORDS:
+            return 'nop'
+        if 'TABLEAU' in upper and parse_array_declaration(line) is not None:
+            return 'declare_array'
+        if is_declaration(upper):
+            return 'declare'
+        if '←' in line:
+            return 'assign'
+
+        # Aiguillage sur le premier mot
+        word = FIRST_WORD_RE.match(upper)
+        entry = STATEMENT_KEYWORDS.get(word.group()) if word else None
+        if entry is not None and upper.startswith(entry[1]):
+            return entry[0]
+        # Mot-clé collé à la suite (ECRIREx, LIRE2, ...): règles de préfixe historiques
+        if upper.startswith(('ECRIRE', 'AFFICHER', 'LIRE', 'TANTQUE', 'REPETER', 'RÉPÉTER')):
+            return PseudoParser._classify_prefix(upper)
+
+        # Affectation sans flèche (format: var = valeur)
+        if '=' in line and '==' not in line and '<=' not in line and '>=' not in line and '<>' not in line:
+            return 'assign_eq'
+        return 'nop'
+
+    def statement_kind(self, line: str) -> str:
+        """Nature d'une ligne, RETOURNER et appels de sous-programmes compris"""
+        if self.functions:
+            match = RETURN_RE.match(line)
+            if match is not None and not match.group(1).startswith('←'):
+                return 'return'
+            if self.call_target(line) is not None:
+                return 'call'
+        return self.classify(line)
+
+    @staticmethod
+    def _classify_prefix(upper: str) -> str:
+        if upper.startswith('ECRIRE') or upper.startswith('AFFICHER'):
+            return 'write'
+        if upper.startswith('LIRE'):
+            return 'read'
+        if upper.startswith('TANTQUE'):
+            return 'while'
+        return 'repeat'
+
+    def collect_arrays(self, lines: List[str]) -> Set[str]:
+        """Noms des tableaux déclarés dans le programme"""
+        arrays = set()
+        for line in lines:
+            if self.classify(line) == 'declare_array':
+                arrays.update(name for name, _, _ in parse_array_declaration(line)[1])
+        return arrays
+
+    def collect_names(self, lines: List[str]) -> Set[str]:
+        """Ensemble des noms qui peuvent recevoir une valeur dans le programme"""
+        names = set(self.arrays)
+        for line in lines:
+            kind = self.statement_kind(line)
+            if kind == 'declare':
+                _, entries = parse_declaration(line)
+                names.update(name for name, _ in entries)
+            elif kind in ('assign', 'assign_eq'):
+                if kind == 'assign_eq':
+                    line = line.replace('=', '←', 1)
+                parts = line.split('←')
+                if len(parts) == 2 and self.item_target(parts[0].strip()) is None:
+                    names.add(parts[0].strip().lower())
+            elif kind == 'read':
+                target = self._read_target(line)
+                if self.item_target(target) is None:
+                    names.add(target)
+            elif kind == 'for':
+                match = self._match_for(line)
+                if match:
+                    names.add(match.group(1).lower())
+        return names
+
+    def parse_block(self, start: int, end: int) -> List[Stmt]:
+        """Analyse les lignes de start à end"""
+        body = []
+        i = start
+        while i < end:
+            # Un sous-programme est analysé à part
+            subprogram_end = self.subprograms.get(i)
+            if subprogram_end is not None:
+                i = subprogram_end + 1
+                continue
+
+            line = self.lines[i]
+            kind = self.statement_kind(line)
+
+            if kind == 'if':
+                stmt, i = self.parse_if(i, end)
+            elif kind == 'for':
+                stmt, i = self.parse_for(i, end)
+            elif kind == 'while':
+                stmt, i = self.parse_while(i, end)
+            elif kind == 'repeat':
+                stmt, i = self.parse_repeat(i, end)
+            else:
+                stmt = self.parse_simple(kind, line, i + 1)
+                i += 1
+
+            body.append(stmt)
+            # Une erreur de structure interrompt l'exécution: la suite du bloc est inaccessible
+            if isinstance(stmt, Fail):
+                break
+
+        return body
+
+    def parse_simple(self, kind: str, line: str, lineno: int) -> Stmt:
+        """Analyse une instruction d'une seule ligne"""
+        if kind == 'declare_array':
+            element_type, entries = parse_array_declaration(line)
+            return DeclareArray(lineno, element_type, [
+                (name, self.expression(low), self.expression(high)) for name, low, high in entries
+            ])
+
+        if kind == 'declare':
+            var_type, entries = parse_declaration(line)
+            if not var_type:
+                return Nop(lineno)
+            return Declare(lineno, var_type, [
+                (name, self.expression(init) if init is not None else None)
+                for name, init in entries
+            ])
+
+        if kind in ('assign', 'assign_eq'):
+            if kind == 'assign_eq':
+                line = line.replace('=', '←', 1)
+            parts = line.split('←')
+            if len(parts) != 2:
+                return Fail(lineno, f"Affectation invalide: {line}")
+            item = self.item_target(parts[0].strip())
+            if item is not None:
+                return StoreItem(lineno, item[0], self.expression(item[1]), self.expression(parts[1].strip()))
+            return Assign(lineno, parts[0].strip().lower(), self.expression(parts[1].strip()))
+
+        if kind == 'write':
+            # Extraire le contenu entre parenthèses
+            match = WRITE_ARGS_RE.search(line)
+            if match:
+                args = [self.expression(arg.strip()) for arg in split_arguments(match.group(1))]
+            else:
+                # Format sans parenthèses: ECRIRE x
+                content = WRITE_KEYWORD_RE.sub('', line)
+                args = [self.expression(content.strip())]
+            return Write(lineno, args)
+
+        if kind == 'read':
+            target = self._read_target(line)
+            item = self.item_target(target)
+            if item is not None:
+                return ReadItem(lineno, item[0], self.expression(item[1]))
+            return Read(lineno, target)
+
+        if kind == 'return':
+            return self.parse_return(line, lineno)
+
+        if kind == 'call':
+            name, args = self.call_target(line)
+            return CallStmt(lineno, name, [self.expression(arg) for arg in args])
+
+        return Nop(lineno)
+
+    def parse_if(self, start: int, end: int) -> Tuple[Stmt, int]:
+        """Analyse une structure SI ... ALORS ... SINON ... FINSI"""
+        line = self.lines[start]
+
+        # Extraire la condition
+        match = IF_RE.search(line)
+        if not match:
+            return Fail(start + 1, f"Structure SI invalide: {line}"), end
+
+        cond = self.expression(match.group(1))
+
+        finsi_index = self.block_ends[start]
+        sinon_index = self.block_elses.get(start, -1)
+
+        if sinon_index != -1:
+            then_body = self.parse_block(start + 1, sinon_index)
+            else_body = self.parse_block(sinon_index + 1, finsi_index)
+        else:
+            then_body = self.parse_block(start + 1, finsi_index)
+            else_body = []
+
+        return If(start + 1, cond, then_body, else_body), finsi_index + 1
+
+    @staticmethod
+    def _match_for(line: str) -> Optional[re.Match]:
+        # Format: POUR var DE debut A fin FAIRE
+        match = FOR_RE.search(line)
+        if not match:
+            # Format alternatif: POUR var ← debut A fin FAIRE
+            match = FOR_ARROW_RE.search(line)
+        return match
+
+    def parse_for(self, start: int, end: int) -> Tuple[Stmt, int]:
+        """Analyse une boucle POUR"""
+        line = self.lines[start]
+
+        match = self._match_for(line)
+        if not match:
+            return Fail(start + 1, f"Structure POUR invalide: {line}"), end
+
+        var_name = match.group(1).lower()
+        start_expr = self.expression(match.group(2))
+        end_expr = self.expression(match.group(3))
+
+        # Extraire le pas si présent
+        step = None
+        step_match = STEP_RE.search(line)
+        if step_match:
+            step = int(step_match.group(1))
+
+        finpour_index = self.block_ends[start]
+        body = self.parse_block(start + 1, finpour_index)
+        return For(start + 1, var_name, start_expr, end_expr, step, body), finpour_index + 1
+
+    def parse_while(self, start: int, end: int) -> Tuple[Stmt, int]:
+        """Analyse une boucle TANT QUE"""
+        line = self.lines[start]
+
+        # Extraire la condition
+        match = WHILE_RE.search(line)
+        if not match:
+            return Fail(start + 1, f"Structure TANT QUE invalide: {line}"), end
+
+        fintq_index = self.block_ends[start]
+        cond = self.expression(match.group(1))
+        body = self.parse_block(start + 1, fintq_index)
+        return While(start + 1, cond, body), fintq_index + 1
+
+    def parse_repeat(self, start: int, end: int) -> Tuple[Stmt, int]:
+        """Analyse une boucle REPETER ... JUSQU'A"""
+        jusqua_index = self.block_ends[start]
+
+        # Extraire la condition
+        condition_line = self.lines[jusqua_index]
+        match = UNTIL_RE.search(condition_line)
+        if not match:
+            return Fail(start + 1, f"Condition JUSQU'A invalide: {condition_line}", jusqua_index + 1), end
+
+        body = self.parse_block(start + 1, jusqua_index)
+        cond = self.expression(match.group(1))
+        return Repeat(start + 1, body, cond), jusqua_index + 1
+
+    def item_target(self, target: str) -> Optional[Tuple[str, str]]:
+        """(tableau, texte de l'indice) si `target` désigne un élément de tableau déclaré"""
+        if not self.arrays or '[' not in target:
+            return None
+        match = ITEM_RE.match(target)
+        if match is None or match.group(1).lower() not in self.arrays:
+            return None
+        return match.group(1).lower(), match.group(2)
+
+    @staticmethod
+    def _read_target(line: str) -> str:
+        match = READ_ARGS_RE.search(line)
+        if match:
+            return match.group(1).strip().lower()
+        return READ_KEYWORD_RE.sub('', line).strip().lower()
+
+    # ------------------------------------------------------------------
+    # Expressions
+    # ------------------------------------------------------------------
+
+    def expression(self, text: str) -> Expr:
+        """Analyse une expression (littéral, variable ou expression complexe)"""
+        expr = text.strip()
+        if self.arrays and '[' in expr:
+            expr = self.mask_items(expr)
+        node = self._expressions.get(expr)
+        if node is None:
+            node = self._expressions[expr] = self._parse_expression(expr)
+        return node
+
+    def _parse_expression(self, expr: str) -> Expr:
+        # Élément de tableau (nom réservé de `mask_items`)
+        if self._items:
+            item = self._items.get(expr.lower())
+            if item is not None:
+                return Index(item[0], self.expression(item[1]))
+
+        # Chaîne de caractères
+        if (expr.startswith('"') and expr.endswith('"')) or (expr.startswith("'") and expr.endswith("'")):
+            return Const(expr[1:-1])
+
+        # Booléens
+        if expr.upper() in ['VRAI', 'TRUE']:
+            return Const(True)
+        if expr.upper() in ['FAUX', 'FALSE']:
+            return Const(False)
+
+        # Nombre entier
+        try:
+            return Const(int(expr))
+        except ValueError:
+            pass
+
+        # Nombre réel
+        try:
+            return Const(float(expr))
+        except ValueError:
+            pass
+
+        node = self.complex_expression(expr)
+
+        # Variable: sa valeur est prioritaire sur l'analyse du texte
+        name = expr.lower()
+        if name in self.names and not (isinstance(node, Var) and node.name == name):
+            return Lookup(name, node)
+        return node
+
+    def complex_expression(self, text: str) -> Expr:
+        """Analyse une expression complexe avec opérateurs"""
+        expr = text.strip()
+        node = self._complex.get(expr)
+        if node is None:
+            node = self._complex[expr] = self._parse_complex(expr)
+        return node
+
+    def _parse_complex(self, expr: str) -> Expr:
+        if self._single_token_names:
+            try:
+                return ExpressionParser(self, expr).parse()
+            except IrregularExpression:
+                pass
+        return self.split_expression(expr)
+
+    def split_expression(self, expr: str) -> Expr:
+        """Règles historiques: découpe sur l'opérateur le moins prioritaire, puis récursion"""
+        # Gérer les parenthèses
+        if _wrapped_in_parentheses(expr):
+            return self.complex_expression(expr[1:-1])
+
+        # Opérateurs par priorité (du moins prioritaire au plus prioritaire)
+        # Opérateurs logiques
+        for op in [' OU ', ' OR ']:
+            parts = split_by_operator(expr, op)
+            if len(parts) > 1:
+                return Or([self.expression(part) for part in parts])
+
+        for op in [' ET ', ' AND ']:
+            parts = split_by_operator(expr, op)
+            if len(parts) > 1:
+                return And([self.expression(part) for part in parts])
+
+        # NON
+        if expr.upper().startswith('NON ') or expr.upper().startswith('NOT '):
+            return Not(self.expression(expr[4:]))
+
+        # Opérateurs de comparaison
+        for op in COMPARISON_OPERATORS:
+            parts = split_by_operator(expr, op)
+            if len(parts) == 2:
+                return Compare(op, self.expression(parts[0]), self.expression(parts[1]))
+
+        # Opérateurs arithmétiques - utiliser les tokens pour éviter les erreurs
+        tokens = tokenize_expression(expr)
+
+        # Chercher + ou - depuis la droite (hors parenthèses et hors chaînes)
+        node = self._split_tokens(tokens, ['+', '-'], unary_aware=True)
+        if node is not None:
+            return node
+
+        # Chercher * ou / depuis la droite
+        node = self._split_tokens(tokens, ['*', '/'], unary_aware=False)
+        if node is not None:
+            return node
+
+        # MOD et DIV
+        for op in [' MOD ', ' DIV ']:
+            parts = split_by_operator(expr.upper(), op)
+            if len(parts) == 2:
+                return BinOp(op.strip(), self.expression(parts[0]), self.expression(parts[1]))
+
+        # Sous-programmes du programme
+        if self.functions:
+            call = self.function_call(expr)
+            if call is not None:
+                return call
+
+        # Fonctions mathématiques
+        func_match = CALL_RE.match(expr)
+        if func_match:
+            func_name = func_match.group(1).upper()
+            args = [self.expression(a.strip()) for a in split_arguments(func_match.group(2))]
+            if func_name in BUILTIN_FUNCTIONS:
+                return Call(func_name, args)
+            return Call(func_name, args, fallback=self._name_or_text(expr))
+
+        return self._name_or_text(expr)
+
+    def _split_tokens(self, tokens: List[str], operators: List[str], unary_aware: bool) -> Optional[Expr]:
+        """Coupe sur l'opérateur le plus à droite au niveau 0 (associativité à gauche)"""
+        depth = 0
+        in_string = False
+        for i in range(len(tokens) - 1, -1, -1):
+            tok = tokens[i]
+            if tok in ['"', "'"]:
+                in_string = not in_string
+            elif tok == ')':
+                depth += 1
+            elif tok == '(':
+                depth -= 1
+            elif depth == 0 and not in_string and tok in operators:
+                # Vérifier que ce n'est pas un signe unaire (au début ou après un opérateur)
+                if unary_aware and not (i > 0 and tokens[i-1] not in ['+', '-', '*', '/', '(', ',']):
+                    continue
+                return BinOp(tok, self.expression(' '.join(tokens[:i])),
+                             self.expression(' '.join(tokens[i+1:])),
+                             (self.source_tokens(tokens), 0, i, len(tokens)))
+        return None
+
+    def _name_or_text(self, expr: str) -> Expr:
+        """Variable simple, sinon le texte tel quel"""
+        name = expr.lower()
+        if self._items and name in self._items:
+            return self._parse_expression(expr)
+        if name in self.names:
+            return Var(name, expr)
+        if self._items:
+            # Texte brut: les éléments de tableau y reprennent leur écriture
+            return Const(ITEM_NAME_RE.sub(lambda match: self.item_text(match.group()), expr))
+        return Const(expr)
+
+    # ------------------------------------------------------------------
+    # Éléments de tableau
+    # ------------------------------------------------------------------
+
+    def mask_items(self, expr: str) -> str:
+        """Remplace chaque `tab[...]` (tableau déclaré, hors chaînes) par un nom réservé"""
+        parts = []
+        last = 0
+        i = 0
+        n = len(expr)
+        while i < n:
+            char = expr[i]
+            if char in '"\'':
+                end = expr.find(char, i + 1)
+                i = n if end < 0 else end + 1
+                continue
+            if not (char.isalpha() or char == '_'):
+                i += 1
+                continue
+            j = i
+            while j < n and (expr[j].isalnum() or expr[j] == '_'):
+                j += 1
+            k = j
+            while k < n and expr[k] == ' ':
+                k += 1
+            name = expr[i:j].lower()
+            if k < n and expr[k] == '[' and name in self.arrays:
+                close = find_closing_bracket(expr, k)
+                if close is not None:
+                    parts.append(expr[last:i])
+                    parts.append(self.item_name(name, expr[k + 1:close].strip()))
+                    i = last = close + 1
+                    continue
+            i = j
+        if not parts:
+            return expr
+        parts.append(expr[last:])
+        return ''.join(parts)
+
+    def item_name(self, array: str, index: str) -> str:
+        key = (array, index)
+        name = self._item_names.get(key)
+        if name is None:
+            name = self._item_names[key] = f"_element{len(self._item_names)}_"
+            self._items[name] = key
+        return name
+
+    def item_text(self, name: str) -> str:
+        """Écriture d'origine d'un nom réservé (un autre texte est rendu tel quel)"""
+        item = self._items.get(name.lower())
+        return name if item is None else f"{item[0]}[{item[1]}]"
+
+    def source_tokens(self, tokens: List[str]) -> List[str]:
+        """Lexèmes d'un texte d'opérande, éléments de tableau rétablis (messages d'erreur)"""
+        if not self._items:
+            return tokens
+        return [self.item_text(token) for token in tokens]
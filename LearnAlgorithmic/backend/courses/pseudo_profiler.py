@@ -0,0 +1,164 @@
+"""
+Profil d'exécution du pseudo-code
+=================================
+`ProfilingInterpreter` exécute un programme comme `PseudoInterpreter`
+(l'un ou l'autre moteur) en comptant, pour chaque ligne du programme,
+le nombre de passages et le temps passé, et pour chaque fonction
+prédéfinie le nombre d'appels et leur durée.
+
+- Le temps d'une ligne va du début de son passage au début du passage
+  suivant (temps propre: le corps d'une boucle n'est pas compté sur la
+  ligne de la boucle). L'évaluation d'une condition de boucle est donc
+  comptée sur la dernière ligne exécutée du corps.
+- Les deux moteurs appellent déjà `checkpoint` quand le compteur de
+  passages dépasse `next_checkpoint`: en mode profil, ce seuil suit le
+  compteur, `checkpoint` est appelé à chaque passage et enregistre la
+  ligne. Sans profil, l'exécution ordinaire ne paie rien.
+- Les fonctions prédéfinies sont remplacées à la compilation par des
+  fonctions chronométrées; les programmes profilés ne passent donc pas
+  par le cache des programmes.
+- `elided_evaluations` donne le nombre de calculs évités par les
+  valeurs mémorisées (invariants de boucle, sous-expressions communes).
+
+Le résultat (`profile`) est renvoyé par la vue `execute_interpreter`
+(option `profile`) et par la commande `profile_solutions`.
+"""
+
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .pseudo_interpreter import BUILTINS, PseudoInterpreter
+from .pseudo_limits import ExecutionLimits
+from .pseudo_parser import preprocess
+
+
+class Profile:
+    """Compteurs et durées par ligne et par fonction prédéfinie"""
+
+    def __init__(self):
+        self.line_counts: Dict[int, int] = {}
+        self.line_times: Dict[int, float] = {}
+        self.call_counts: Dict[str, int] = {}
+        self.call_times: Dict[str, float] = {}
+        self.line: Optional[int] = None
+        self.line_start = 0.0
+        self.started = 0.0
+        self.total = 0.0
+
+    def clear(self):
+        # Vidés sur place: les fonctions chronométrées gardent ces dictionnaires
+        self.line_counts.clear()
+        self.line_times.clear()
+        self.call_counts.clear()
+        self.call_times.clear()
+        self.line = None
+        self.total = 0.0
+
+    def start(self):
+        self.line = None
+        self.started = self.line_start = time.perf_counter()
+
+    def enter(self, line: int):
+        """Début d'un passage sur `line`: le temps écoulé revient à la ligne précédente"""
+        now = time.perf_counter()
+        previous = self.line
+        if previous is not None:
+            self.line_times[previous] = self.line_times.get(previous, 0.0) + now - self.line_start
+        self.line = line
+        self.line_start = now
+        self.line_counts[line] = self.line_counts.get(line, 0) + 1
+
+    def stop(self):
+        now = time.perf_counter()
+        if self.line is not None:
+            self.line_times[self.line] = self.line_times.get(self.line, 0.0) + now - self.line_start
+            self.line = None
+        self.total += now - self.started
+
+    def timed(self, name: str, function: Callable[[list], Any]) -> Callable[[list], Any]:
+        """`function` chronométrée sous le nom `name`"""
+        call_counts = self.call_counts
+        call_times = self.call_times
+
+        def call(args):
+            start = time.perf_counter()
+            try:
+                return function(args)
+            finally:
+                call_times[name] = call_times.get(name, 0.0) + time.perf_counter() - start
+                call_counts[name] = call_counts.get(name, 0) + 1
+        return call
+
+    def hot_lines(self, count: int = 5) -> List[int]:
+        """Lignes les plus coûteuses, de la plus lente à la moins lente"""
+        return sorted(self.line_times, key=self.line_times.get, reverse=True)[:count]
+
+    def as_dict(self, source_lines: List[str] = ()) -> Dict[str, Any]:
+        total = self.total or 1e-12
+        lines = []
+        for line in sorted(self.line_counts):
+            elapsed = self.line_times.get(line, 0.0)
+            lines.append({
+                'line': line,
+                'code': source_lines[line - 1] if 0 < line <= len(source_lines) else '',
+                'count': self.line_counts[line],
+                'time_ms': round(elapsed * 1000, 3),
+                'percent': round(100 * elapsed / total, 1),
+            })
+        builtins = [
+            {
+                'name': name,
+                'count': self.call_counts[name],
+                'time_ms': round(self.call_times[name] * 1000, 3),
+            }
+            for name in sorted(self.call_times, key=self.call_times.get, reverse=True)
+        ]
+        return {
+            'total_ms': round(self.total * 1000, 3),
+            'lines': lines,
+            'builtins': builtins,
+            'hot_lines': self.hot_lines(),
+        }
+
+
+class ProfilingInterpreter(PseudoInterpreter):
+    """Interpréteur qui mesure le coût de chaque ligne et de chaque fonction prédéfinie"""
+
+    def __init__(self, backend: str = 'tree', limits: Optional[ExecutionLimits] = None):
+        super().__init__(backend=backend, cache=None, limits=limits)
+        self.profile = Profile()
+        self.builtins = {name: self.profile.timed(name, function) for name, function in BUILTINS.items()}
+        self.source_lines: List[str] = []
+        # Prochain passage où `PseudoInterpreter.checkpoint` vérifie le budget
+        self.budget_checkpoint = 0
+
+    def reset(self):
+        super().reset()
+        self.budget_checkpoint = self.next_checkpoint
+        # `checkpoint` à chaque passage
+        self.next_checkpoint = 0
+
+    def execute(self, code: str, inputs: List[str] = None) -> Tuple[bool, str, str]:
+        self.source_lines = preprocess(code)
+        return super().execute(code, inputs)
+
+    def run(self, compiled, inputs: List[str] = None) -> Tuple[bool, str, str]:
+        # Les appels faits par le calcul des constantes (compilation) ne comptent pas
+        self.profile.clear()
+        self.profile.start()
+        try:
+            return super().run(compiled, inputs)
+        finally:
+            self.profile.stop()
+
+    def checkpoint(self, count: int, line: int) -> int:
+        self.profile.enter(line)
+        if count > self.budget_checkpoint:
+            self.budget_checkpoint = super().checkpoint(count, line)
+        self.next_checkpoint = count
+        return count
+
+    def profile_data(self) -> Dict[str, Any]:
+        data = self.profile.as_dict(self.source_lines)
+        data['elided_evaluations'] = self.elided_evaluations
+        return data
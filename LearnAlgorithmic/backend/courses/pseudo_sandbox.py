@@ -0,0 +1,450 @@
+"""
+Exécution isolée du pseudo-code
+===============================
+Le code des apprenants ne s'exécute plus dans le processus web: un
+worker gunicorn synchrone bloqué par un programme pathologique ne
+répond plus à personne. `SandboxPool` démarre d'avance quelques
+processus interpréteurs (méthode `forkserver`: ils ne reçoivent ni les
+connexions ni les descripteurs du processus web) et leur transmet les
+travaux par des tubes.
+
+- Chaque travail a un délai: au-delà, le processus est tué puis
+  remplacé, et `SandboxTimeout` est levée.
+- La mémoire de chaque processus est plafonnée (`RLIMIT_AS`); un
+  processus qui meurt est remplacé (`SandboxCrashed`).
+- Quand tous les processus sont occupés, au plus `max_pending` requêtes
+  attendent, pendant `queue_timeout` secondes au plus; les suivantes
+  sont refusées tout de suite (`SandboxBusy`, réponse 503) au lieu
+  d'immobiliser les workers web.
+
+Les budgets de `pseudo_limits` s'appliquent toujours dans le processus
+interpréteur; le délai du pool est le dernier recours pour une
+instruction qui ne rend pas la main.
+
+Un travail 'stream' (`SandboxPool.stream`) envoie la sortie par lots
+pendant l'exécution, avant son résultat (voir `pseudo_stream`). Les
+étapes des sessions interactives (`pseudo_session`) s'exécutent aussi
+dans le pool: l'état sérialisé va et vient avec le travail.
+"""
+
+import atexit
+import multiprocessing
+import signal
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from .pseudo_cache import ProgramCache
+from .pseudo_interpreter import CaseResult, PseudoInterpreter, run_test_cases, validate_pseudo_code
+from .pseudo_limits import ExecutionLimits
+from .pseudo_profiler import ProfilingInterpreter
+from .pseudo_session import SessionStep, run_session_step
+from .pseudo_stream import StreamingInterpreter, StreamMessage
+
+try:
+    import resource
+except ImportError:  # Windows: pas de plafond mémoire
+    resource = None
+
+
+class SandboxError(Exception):
+    """Échec de l'exécution isolée (message destiné à l'apprenant)"""
+
+
+class SandboxBusy(SandboxError):
+    """Tous les processus sont occupés et la file d'attente est pleine"""
+
+
+class SandboxTimeout(SandboxError):
+    """Le travail a dépassé son délai: le processus a été remplacé"""
+
+
+class SandboxCrashed(SandboxError):
+    """Le processus s'est arrêté pendant le travail (mémoire épuisée, ...)"""
+
+
+# ----------------------------------------------------------------------
+# Processus interpréteur
+# ----------------------------------------------------------------------
+
+def _limit_memory(memory_limit: Optional[int]):
+    """Plafonne l'espace d'adressage à la taille actuelle plus `memory_limit` octets"""
+    if resource is None or not memory_limit:
+        return
+    current = 0
+    try:
+        with open('/proc/self/statm') as statm:
+            current = int(statm.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        pass
+    limit = current + memory_limit
+    soft, hard = resource.getrlimit(resource.RLIMIT_AS)
+    if hard != resource.RLIM_INFINITY:
+        limit = min(limit, hard)
+    resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def _run_job(kind: str, args: tuple, backend: str, cache: ProgramCache, conn) -> Any:
+    if kind == 'execute':
+        code, inputs, limits = args
+        interpreter = PseudoInterpreter(backend=backend, cache=cache, limits=limits)
+        success, output, error = interpreter.execute(code, inputs)
+        return success, output, error, interpreter.describe_variables(), interpreter.diagnostics
+    if kind == 'profile':
+        code, inputs, limits = args
+        interpreter = ProfilingInterpreter(backend=backend, limits=limits)
+        success, output, error = interpreter.execute(code, inputs)
+        return (success, output, error, interpreter.describe_variables(), interpreter.diagnostics,
+                interpreter.profile_data())
+    if kind == 'validate':
+        code, test_cases, limits, stop_early = args
+        return validate_pseudo_code(code, test_cases, backend=backend, cache=cache, limits=limits,
+                                    stop_early=stop_early)
+    if kind == 'stream':
+        # Les lots de sortie précèdent le résultat sur le même tube
+        code, inputs, limits = args
+        interpreter = StreamingInterpreter(lambda batch: conn.send(('lines', batch)), backend=backend,
+                                           cache=cache, limits=limits)
+        success, _, error = interpreter.execute(code, inputs)
+        return success, error, interpreter.describe_variables()
+    if kind == 'session':
+        code, inputs, data, limits, max_state_bytes = args
+        return run_session_step(code, inputs, data, cache=cache, limits=limits, max_state_bytes=max_state_bytes)
+    raise ValueError(f"Travail inconnu: {kind}")
+
+
+def _worker_main(conn, backend: str, memory_limit: Optional[int]):
+    """Boucle d'un processus interpréteur: un travail reçu, un résultat envoyé"""
+    # Ctrl-C dans le terminal du serveur: c'est le processus parent qui arrête le pool
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _limit_memory(memory_limit)
+    cache = ProgramCache(max_entries=64, max_bytes=2 * 1024 * 1024)
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+        kind, args = job
+        try:
+            result = ('ok', _run_job(kind, args, backend, cache, conn))
+        except MemoryError:
+            result = ('error', "Mémoire insuffisante pour exécuter le programme")
+        except Exception as e:
+            result = ('error', f"Erreur inattendue: {str(e)}")
+        try:
+            try:
+                conn.send(result)
+            except MemoryError:
+                # Résultat trop volumineux pour être sérialisé sous le plafond
+                result = None
+                conn.send(('error', "Mémoire insuffisante pour exécuter le programme"))
+        except (OSError, ValueError):
+            break
+
+
+# ----------------------------------------------------------------------
+# Pool
+# ----------------------------------------------------------------------
+
+class _Worker:
+    __slots__ = ('process', 'conn', 'jobs')
+
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.jobs = 0
+
+
+class SandboxStream:
+    """
+    Messages d'un travail 'stream' en cours: ('lines', [...]) à chaque
+    lot, puis ('done', (success, error, variables)).
+
+    Le délai court depuis l'envoi du travail, lecture par le client
+    comprise. Fermé avant la fin (client parti), le processus est
+    remplacé: il exécute encore le programme.
+    """
+
+    def __init__(self, pool: 'SandboxPool', worker: _Worker, timeout: float):
+        self.pool = pool
+        self.worker: Optional[_Worker] = worker
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout
+
+    def __iter__(self) -> 'SandboxStream':
+        return self
+
+    def __next__(self) -> StreamMessage:
+        worker = self.worker
+        if worker is None:
+            raise StopIteration
+        try:
+            remaining = self.deadline - time.monotonic()
+            if remaining <= 0 or not worker.conn.poll(remaining):
+                self.pool.timeouts += 1
+                self.close()
+                raise SandboxTimeout(f"Exécution interrompue: délai de {self.timeout:g} s dépassé")
+            status, payload = worker.conn.recv()
+        except (EOFError, OSError):
+            self.pool.crashes += 1
+            self.close()
+            raise SandboxCrashed("L'exécution s'est arrêtée anormalement (mémoire insuffisante ?)") from None
+        if status == 'lines':
+            return status, payload
+
+        worker.jobs += 1
+        self.pool.jobs += 1
+        self.worker = None
+        self.pool._release(worker, True)
+        if status == 'error':
+            raise SandboxError(payload)
+        return 'done', payload
+
+    def close(self):
+        if self.worker is not None:
+            worker, self.worker = self.worker, None
+            self.pool._release(worker, False)
+
+
+def _start_method() -> str:
+    methods = multiprocessing.get_all_start_methods()
+    return 'forkserver' if 'forkserver' in methods else 'spawn'
+
+
+class SandboxPool:
+    """Pool de processus interpréteurs pré-démarrés"""
+
+    def __init__(self, size: int = 2, backend: str = 'tree', timeout: float = 5.0,
+                 memory_limit: Optional[int] = 256 * 1024 * 1024, max_pending: int = 4,
+                 queue_timeout: float = 2.0, max_jobs_per_worker: int = 500):
+        self.size = size
+        self.backend = backend
+        self.timeout = timeout
+        self.memory_limit = memory_limit
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self._context = multiprocessing.get_context(_start_method())
+        if self._context.get_start_method() == 'forkserver':
+            # Le serveur importe l'interpréteur une fois: chaque processus en hérite
+            self._context.set_forkserver_preload(['courses.pseudo_sandbox'])
+        self._condition = threading.Condition()
+        self._idle: List[_Worker] = []
+        self._waiting = 0
+        self._closed = False
+        self.jobs = 0
+        self.timeouts = 0
+        self.crashes = 0
+        self.rejected = 0
+        for _ in range(size):
+            self._idle.append(self._spawn())
+
+    def _spawn(self) -> _Worker:
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, args=(child_conn, self.backend, self.memory_limit),
+                                        name='pseudo-sandbox', daemon=True)
+        process.start()
+        child_conn.close()
+        return _Worker(process, parent_conn)
+
+    @staticmethod
+    def _kill(worker: _Worker):
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join(1)
+        worker.conn.close()
+
+    def _acquire(self) -> _Worker:
+        """Prend un processus libre, en attendant au plus `queue_timeout` secondes"""
+        with self._condition:
+            if self._closed:
+                raise SandboxError("Le service d'exécution est arrêté")
+            if not self._idle and self._waiting >= self.max_pending:
+                self.rejected += 1
+                raise SandboxBusy("Serveur d'exécution saturé, réessayez dans quelques instants")
+            self._waiting += 1
+            try:
+                deadline = time.monotonic() + self.queue_timeout
+                while not self._idle:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.rejected += 1
+                        raise SandboxBusy("Serveur d'exécution saturé, réessayez dans quelques instants")
+                    self._condition.wait(remaining)
+                return self._idle.pop()
+            finally:
+                self._waiting -= 1
+
+    def _release(self, worker: _Worker, healthy: bool):
+        """Rend un processus au pool, ou le remplace s'il est bloqué, mort ou usé"""
+        if not healthy or worker.jobs >= self.max_jobs_per_worker or not worker.process.is_alive():
+            self._kill(worker)
+            worker = None if self._closed else self._spawn()
+        with self._condition:
+            if worker is not None:
+                if self._closed:
+                    self._kill(worker)
+                else:
+                    self._idle.append(worker)
+            self._condition.notify()
+
+    def submit(self, kind: str, args: tuple, timeout: Optional[float] = None) -> Any:
+        """Exécute un travail dans un processus du pool et retourne son résultat"""
+        timeout = self.timeout if timeout is None else timeout
+        worker = self._acquire()
+        healthy = False
+        try:
+            try:
+                worker.conn.send((kind, args))
+                if not worker.conn.poll(timeout):
+                    self.timeouts += 1
+                    raise SandboxTimeout(f"Exécution interrompue: délai de {timeout:g} s dépassé")
+                status, payload = worker.conn.recv()
+            except (EOFError, OSError):
+                self.crashes += 1
+                raise SandboxCrashed("L'exécution s'est arrêtée anormalement (mémoire insuffisante ?)") from None
+            worker.jobs += 1
+            self.jobs += 1
+            healthy = True
+        finally:
+            self._release(worker, healthy)
+        if status == 'error':
+            raise SandboxError(payload)
+        return payload
+
+    def execute(self, code: str, inputs: List[str] = None, limits: Optional[ExecutionLimits] = None,
+                timeout: Optional[float] = None) -> Tuple[bool, str, str, Dict[str, Dict[str, str]], List[Dict]]:
+        """
+        Équivalent isolé de `PseudoInterpreter.execute`: (success, output,
+        error, variables, diagnostics de l'analyse statique)
+        """
+        return self.submit('execute', (code, list(inputs or []), limits), timeout)
+
+    def profile(self, code: str, inputs: List[str] = None, limits: Optional[ExecutionLimits] = None,
+                timeout: Optional[float] = None) -> Tuple[bool, str, str, Dict[str, Dict[str, str]], List[Dict],
+                                                          Dict[str, Any]]:
+        """Comme `execute`, avec le profil de `pseudo_profiler` en sixième élément"""
+        return self.submit('profile', (code, list(inputs or []), limits), timeout)
+
+    def stream(self, code: str, inputs: List[str] = None, limits: Optional[ExecutionLimits] = None,
+               timeout: Optional[float] = None) -> SandboxStream:
+        """
+        Équivalent isolé de `pseudo_stream.stream_in_process`. Le processus
+        est réservé tout de suite (`SandboxBusy` avant toute réponse) et
+        rendu au pool à la fin du flux ou à sa fermeture.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        worker = self._acquire()
+        try:
+            worker.conn.send(('stream', (code, list(inputs or []), limits)))
+        except (OSError, ValueError):
+            self.crashes += 1
+            self._release(worker, False)
+            raise SandboxCrashed("L'exécution s'est arrêtée anormalement (mémoire insuffisante ?)") from None
+        return SandboxStream(self, worker, timeout)
+
+    def session_step(self, code: Optional[str], inputs: List[str], data: Optional[bytes] = None,
+                     limits: Optional[ExecutionLimits] = None, max_state_bytes: Optional[int] = None,
+                     timeout: Optional[float] = None) -> SessionStep:
+        """Équivalent isolé de `pseudo_session.run_session_step`"""
+        return self.submit('session', (code, list(inputs or []), data, limits, max_state_bytes), timeout)
+
+    def validate(self, code: str, test_cases: List[Dict], limits: Optional[ExecutionLimits] = None,
+                 timeout: Optional[float] = None, workers: int = 1,
+                 stop_early: bool = False) -> Tuple[bool, int, List[str]]:
+        """
+        Équivalent isolé de `validate_pseudo_code`.
+
+        Avec `workers` <= 1, tous les cas sont exécutés par un même processus
+        en un seul travail (délai multiplié par le nombre de cas). Sinon,
+        chaque cas est un travail distinct, réparti sur `workers` processus
+        au plus; chaque processus compile le code une fois (son cache de
+        programmes) et un cas trop long n'interrompt que lui-même.
+        """
+        if workers <= 1 or len(test_cases) <= 1:
+            if timeout is None:
+                timeout = self.timeout * max(1, len(test_cases))
+            return self.submit('validate', (code, test_cases, limits, stop_early), timeout)
+
+        if not test_cases:
+            return True, 100, ["Aucun cas de test défini"]
+
+        def run_case(inputs: List[str]) -> CaseResult:
+            try:
+                return self.execute(code, inputs, limits, timeout)[:3]
+            except SandboxBusy:
+                raise
+            except SandboxError as e:
+                return False, "", str(e)
+
+        return run_test_cases(run_case, test_cases, min(workers, self.size), stop_early)
+
+    def close(self):
+        """Arrête tous les processus (les travaux en cours se terminent en erreur)"""
+        with self._condition:
+            self._closed = True
+            workers, self._idle = self._idle, []
+            self._condition.notify_all()
+        for worker in workers:
+            try:
+                worker.conn.send(None)
+            except OSError:
+                pass
+            worker.process.join(1)
+            self._kill(worker)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                'size': self.size,
+                'idle': len(self._idle),
+                'waiting': self._waiting,
+                'jobs': self.jobs,
+                'timeouts': self.timeouts,
+                'crashes': self.crashes,
+                'rejected': self.rejected,
+            }
+
+
+_sandbox_pool: Optional[SandboxPool] = None
+_sandbox_lock = threading.Lock()
+
+
+def get_sandbox_pool() -> Optional[SandboxPool]:
+    """
+    Pool du processus web, configuré par `settings.PSEUDO_SANDBOX`.
+
+    Retourne None si l'exécution isolée est désactivée (ou hors de
+    Django): le code s'exécute alors dans le processus appelant.
+    """
+    global _sandbox_pool
+    if _sandbox_pool is not None:
+        return _sandbox_pool
+    try:
+        from django.conf import settings
+        from django.core.exceptions import ImproperlyConfigured
+    except ImportError:
+        return None
+    try:
+        options = getattr(settings, 'PSEUDO_SANDBOX', {})
+        backend = getattr(settings, 'PSEUDO_INTERPRETER_BACKEND', 'tree')
+    except ImproperlyConfigured:
+        return None
+    if not options.get('ENABLED'):
+        return None
+    with _sandbox_lock:
+        if _sandbox_pool is None:
+            _sandbox_pool = SandboxPool(
+                size=options.get('WORKERS', 2),
+                backend=backend,
+                timeout=options.get('JOB_TIMEOUT', 5.0),
+                memory_limit=options.get('MEMORY_LIMIT', 256 * 1024 * 1024),
+                max_pending=options.get('MAX_PENDING', 4),
+                queue_timeout=options.get('QUEUE_TIMEOUT', 2.0),
+                max_jobs_per_worker=options.get('MAX_JOBS_PER_WORKER', 500),
+            )
+            atexit.register(_sandbox_pool.close)
+    return _sandbox_pool
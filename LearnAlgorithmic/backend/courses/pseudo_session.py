@@ -0,0 +1,273 @@
+"""
+Exécution interactive du pseudo-code
+====================================
+`PseudoInterpreter` lit les valeurs de LIRE dans une liste fournie
+d'avance et invente une valeur par défaut quand la liste est épuisée.
+Une session interactive s'arrête au contraire sur LIRE, conserve son
+état côté serveur et reprend sur cette même instruction quand
+l'apprenant envoie la valeur: le programme n'est jamais ré-exécuté
+depuis le début.
+
+- Seule la machine virtuelle ('vm') sait se suspendre: son état tient
+  dans le compteur d'instruction, les emplacements des variables, les
+  boucles POUR et les cadres des appels de sous-programmes en cours
+  (`InputRequired.state`). Cet état est sérialisé avec
+  pickle, avec les types des variables et les compteurs; les
+  instructions, elles, sont recompilées à la reprise (cache des
+  programmes).
+- Le budget de temps s'applique à chaque reprise (le temps de réflexion
+  de l'apprenant n'en fait pas partie); le nombre de passages et la
+  taille de la sortie se cumulent sur toute la session.
+- `SessionStore` garde les états sous un identifiant aléatoire, avec une
+  durée de vie (`ttl`) et un plafond en octets par session et au total.
+  Avec un cache partagé (Redis, ...), n'importe quel worker peut
+  reprendre la session; sinon elle reste dans le processus qui l'a créée.
+"""
+
+import pickle
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from .pseudo_ast import InputRequired, PseudoCodeError
+from .pseudo_cache import CACHE_FORMAT_VERSION, ProgramCache
+from .pseudo_interpreter import PseudoInterpreter
+from .pseudo_limits import ExecutionLimits
+from .pseudo_vm import Bytecode, PseudoVM
+
+# À incrémenter quand l'état sérialisé ou la compilation vers la VM
+# change: les sessions d'une version précédente sont considérées expirées
+SESSION_FORMAT_VERSION = 5
+
+SESSION_EXPIRED = "Session expirée: relancez le programme"
+
+SessionStep = Tuple[Dict[str, Any], Optional[bytes]]
+
+
+class SessionExpired(PseudoCodeError):
+    """Session inconnue, expirée, ou reprise par un autre utilisateur"""
+
+    def __init__(self):
+        super().__init__(SESSION_EXPIRED)
+
+
+class InteractiveInterpreter(PseudoInterpreter):
+    """Interpréteur (moteur 'vm') qui s'interrompt sur LIRE quand les valeurs sont épuisées"""
+
+    def __init__(self, cache: Optional[ProgramCache] = None, limits: Optional[ExecutionLimits] = None):
+        super().__init__(backend='vm', cache=cache, limits=limits)
+        self.saved: Optional[Dict[str, Any]] = None
+
+    def reset(self):
+        super().reset()
+        saved = self.saved
+        if saved is not None:
+            self.variable_types = saved['variable_types']
+            self.iteration_count = saved['iteration_count']
+            self.current_line = saved['current_line']
+            self.output_bytes = saved['output_bytes']
+
+    def read_input(self, var_name: str, var_type: Optional[str] = None) -> Any:
+        if self.input_index >= len(self.input_values):
+            raise InputRequired(var_name, var_type=var_type)
+        return super().read_input(var_name, var_type)
+
+    def run_bytecode(self, bytecode: Bytecode):
+        PseudoVM(self).run(bytecode, self.saved['vm'] if self.saved is not None else None)
+
+    def step(self, code: str, inputs: List[str], saved: Optional[Dict[str, Any]] = None) -> SessionStep:
+        """
+        Exécute `code` (ou le reprend depuis `saved`) jusqu'à la fin ou au
+        prochain LIRE sans valeur. Retourne le résultat de l'étape et l'état
+        sérialisé à conserver (None quand le programme est terminé).
+        """
+        self.saved = saved
+        try:
+            success, output, error = self.execute(code, inputs)
+        except InputRequired as e:
+            state = {
+                'version': SESSION_FORMAT_VERSION,
+                'code': code,
+                'vm': e.state,
+                'variable_types': self.variable_types,
+                'iteration_count': self.iteration_count,
+                'current_line': self.current_line,
+                'output_bytes': self.output_bytes,
+            }
+            result = {
+                'status': 'input',
+                'output': self.get_output(),
+                'error': '',
+                'variables': self.describe_variables(),
+                'prompt': {
+                    'variable': e.name,
+                    'type': e.var_type or self.variable_types.get(e.name, 'CHAINE'),
+                    'line': e.line,
+                },
+            }
+            return result, pickle.dumps(state, pickle.HIGHEST_PROTOCOL)
+        finally:
+            self.saved = None
+        return {
+            'status': 'done',
+            'success': success,
+            'output': output or '',
+            'error': error or '',
+            'variables': self.describe_variables(),
+        }, None
+
+
+def run_session_step(code: Optional[str], inputs: List[str], data: Optional[bytes] = None,
+                     cache: Optional[ProgramCache] = None, limits: Optional[ExecutionLimits] = None,
+                     max_state_bytes: Optional[int] = None) -> SessionStep:
+    """
+    Démarre une session (`code`) ou reprend l'état sérialisé `data` avec
+    les valeurs `inputs`. Un état plus gros que `max_state_bytes` termine
+    la session en erreur; un état d'une autre version du serveur donne le
+    statut 'expired'.
+    """
+    saved = None
+    if data is not None:
+        try:
+            saved = pickle.loads(data)
+        except Exception:
+            saved = None
+        if not isinstance(saved, dict) or saved.get('version') != SESSION_FORMAT_VERSION:
+            return {'status': 'expired', 'output': '', 'error': SESSION_EXPIRED, 'variables': {}}, None
+        code = saved['code']
+
+    result, state = InteractiveInterpreter(cache=cache, limits=limits).step(code, inputs, saved)
+    if state is not None and max_state_bytes is not None and len(state) > max_state_bytes:
+        result = {
+            'status': 'done',
+            'success': False,
+            'output': result['output'],
+            'error': f"Ligne {result['prompt']['line']}: état du programme trop volumineux pour "
+                     f"une exécution interactive (limite de {max_state_bytes} octets)",
+            'variables': result['variables'],
+        }
+        state = None
+    return result, state
+
+
+class SessionStore:
+    """États des sessions interactives, avec durée de vie et plafonds en octets"""
+
+    def __init__(self, ttl: int = 600, max_state_bytes: int = 256 * 1024,
+                 max_bytes: int = 16 * 1024 * 1024, shared: Any = None,
+                 key_prefix: str = 'pseudo-session'):
+        self.ttl = ttl
+        self.max_state_bytes = max_state_bytes
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self.key_prefix = f"{key_prefix}:v{SESSION_FORMAT_VERSION}.{CACHE_FORMAT_VERSION}"
+        # Cache local: identifiant -> (échéance, propriétaire, état)
+        self._entries: 'OrderedDict[str, Tuple[float, Any, bytes]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evicted = 0
+
+    def create(self, owner: Any, data: bytes) -> str:
+        session_id = secrets.token_urlsafe(16)
+        self.save(session_id, owner, data)
+        return session_id
+
+    def save(self, session_id: str, owner: Any, data: bytes):
+        if self.shared is not None:
+            self.shared.set(f"{self.key_prefix}:{session_id}", (owner, data), self.ttl)
+            return
+        with self._lock:
+            self._discard(session_id)
+            self._entries[session_id] = (time.monotonic() + self.ttl, owner, data)
+            self._bytes += len(data)
+            self._purge()
+
+    def load(self, session_id: str, owner: Any) -> bytes:
+        """État de la session (seul son propriétaire peut la reprendre)"""
+        if self.shared is not None:
+            entry = self.shared.get(f"{self.key_prefix}:{session_id}")
+            if entry is None or entry[0] != owner:
+                raise SessionExpired()
+            return entry[1]
+        with self._lock:
+            self._purge()
+            entry = self._entries.get(session_id)
+            if entry is None or entry[1] != owner:
+                raise SessionExpired()
+            return entry[2]
+
+    def delete(self, session_id: str, owner: Any):
+        if self.shared is not None:
+            key = f"{self.key_prefix}:{session_id}"
+            entry = self.shared.get(key)
+            if entry is not None and entry[0] == owner:
+                self.shared.delete(key)
+            return
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and entry[1] == owner:
+                self._discard(session_id)
+
+    def _discard(self, session_id: str):
+        entry = self._entries.pop(session_id, None)
+        if entry is not None:
+            self._bytes -= len(entry[2])
+
+    def _purge(self):
+        """Retire les sessions expirées, puis les plus anciennes au-delà de `max_bytes`"""
+        now = time.monotonic()
+        while self._entries:
+            session_id, (expires, _, data) = next(iter(self._entries.items()))
+            if expires > now and self._bytes <= self.max_bytes:
+                break
+            self._discard(session_id)
+            if expires > now:
+                self.evicted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._purge()
+            return {
+                'sessions': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'evicted': self.evicted,
+                'shared': self.shared is not None,
+            }
+
+
+_session_store: Optional[SessionStore] = None
+
+
+def get_session_store() -> SessionStore:
+    """
+    Stockage des sessions du processus, configuré par
+    `settings.PSEUDO_SESSIONS`.
+    """
+    global _session_store
+    if _session_store is None:
+        options = {}
+        shared = None
+        try:
+            from django.conf import settings
+            from django.core.exceptions import ImproperlyConfigured
+        except ImportError:
+            settings = None
+        if settings is not None:
+            try:
+                options = getattr(settings, 'PSEUDO_SESSIONS', {})
+            except ImproperlyConfigured:
+                options = {}
+            alias = options.get('SHARED_CACHE_ALIAS')
+            if alias:
+                from django.core.cache import caches
+                shared = caches[alias]
+        _session_store = SessionStore(
+            ttl=options.get('TTL', 600),
+            max_state_bytes=options.get('MAX_STATE_BYTES', 256 * 1024),
+            max_bytes=options.get('MAX_BYTES', 16 * 1024 * 1024),
+            shared=shared,
+        )
+    return _session_store
@@ -0,0 +1,122 @@
+"""
+États de variables encodés par différences
+==========================================
+Copier toutes les variables à chaque étape coûte étapes × variables,
+en base comme dans les réponses de l'API. Une étape ne stocke donc que
+les variables qui ont changé:
+
+    {'changes': {'s': 6}, 'current_line': 8}
+
+et, toutes les `KEYFRAME_INTERVAL` étapes (ainsi qu'à la première), un
+état complet qui permet de reconstruire n'importe quelle étape sans
+repartir du début:
+
+    {'keyframe': True, 'variables': {'n': 4, 'i': 3, 's': 6}, 'current_line': 6}
+
+Les variables ne disparaissent pas en pseudo-code; pour des états
+quelconques (`encode_states`), une variable supprimée est listée dans
+'removed'. Un `state_data` sans 'keyframe' ni 'changes' (étapes écrites
+à la main) est considéré comme un état complet.
+"""
+
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+KEYFRAME_INTERVAL = 16
+
+_MISSING = object()
+
+
+def is_delta(state: Dict[str, Any]) -> bool:
+    """Vrai pour une étape encodée par différence (pas un état complet)"""
+    return isinstance(state, dict) and 'changes' in state and not state.get('keyframe')
+
+
+def is_keyframe(state: Dict[str, Any]) -> bool:
+    """Vrai pour un état complet: image clé, ou étape écrite à la main"""
+    return not is_delta(state)
+
+
+def keyframe_variables(state: Dict[str, Any]) -> Dict[str, Any]:
+    """Variables d'un état complet, quel que soit son format"""
+    if state.get('keyframe') or isinstance(state.get('variables'), dict):
+        return dict(state.get('variables', {}))
+    # Étape écrite à la main: le dictionnaire contient directement les variables
+    return dict(state)
+
+
+class DeltaEncoder:
+    """Produit les `state_data` successifs d'une trace, étape par étape"""
+
+    def __init__(self, keyframe_interval: int = KEYFRAME_INTERVAL):
+        self.keyframe_interval = max(1, keyframe_interval)
+        self.variables: Dict[str, Any] = {}
+        self.count = 0
+
+    def step(self, changes: Dict[str, Any], current_line: Optional[int] = None,
+             removed: Iterable[str] = ()) -> Dict[str, Any]:
+        self.variables.update(changes)
+        removed = [name for name in removed if self.variables.pop(name, _MISSING) is not _MISSING]
+        keyframe = self.count % self.keyframe_interval == 0
+        self.count += 1
+
+        if keyframe:
+            state = {'keyframe': True, 'variables': dict(self.variables)}
+        else:
+            state = {'changes': dict(changes)}
+            if removed:
+                state['removed'] = removed
+        if current_line is not None:
+            state['current_line'] = current_line
+        return state
+
+
+def encode_states(states: Sequence[Dict[str, Any]], keyframe_interval: int = KEYFRAME_INTERVAL,
+                  lines: Sequence[Optional[int]] = None) -> List[Dict[str, Any]]:
+    """Encode une suite d'états complets de variables"""
+    encoder = DeltaEncoder(keyframe_interval)
+    encoded = []
+    previous: Dict[str, Any] = {}
+    for index, variables in enumerate(states):
+        # VRAI == 1: le type compte aussi comme un changement
+        changes = {name: value for name, value in variables.items()
+                   if name not in previous or previous[name] != value
+                   or type(previous[name]) is not type(value)}
+        removed = [name for name in previous if name not in variables]
+        encoded.append(encoder.step(changes, lines[index] if lines else None, removed))
+        previous = variables
+    return encoded
+
+
+def apply_delta(variables: Dict[str, Any], state: Dict[str, Any]) -> Dict[str, Any]:
+    """Applique une étape à `variables` (modifié sur place) et le retourne"""
+    if is_keyframe(state):
+        variables.clear()
+        variables.update(keyframe_variables(state))
+        return variables
+    variables.update(state['changes'])
+    for name in state.get('removed', ()):
+        variables.pop(name, None)
+    return variables
+
+
+def reconstruct(states: Sequence[Dict[str, Any]], index: int) -> Dict[str, Any]:
+    """
+    Variables complètes à l'étape `index` (0 pour la première): on repart
+    de l'image clé la plus proche, puis on applique au plus
+    KEYFRAME_INTERVAL - 1 différences.
+    """
+    if not 0 <= index < len(states):
+        raise IndexError(f"Étape {index} hors de la trace ({len(states)} étapes)")
+    start = index
+    while start > 0 and not is_keyframe(states[start]):
+        start -= 1
+    variables: Dict[str, Any] = {}
+    for state in states[start:index + 1]:
+        apply_delta(variables, state)
+    return variables
+
+
+def materialize(states: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Variables complètes de chaque étape (parcours unique)"""
+    variables: Dict[str, Any] = {}
+    return [dict(apply_delta(variables, state)) for state in states]
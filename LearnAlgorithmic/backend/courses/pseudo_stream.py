@@ -0,0 +1,152 @@
+"""
+Exécution du pseudo-code en flux
+================================
+`PseudoInterpreter.execute` rend toute la sortie à la fin: un programme
+qui affiche 10 000 lignes n'affiche rien pendant son exécution, et le
+serveur garde toute la sortie en mémoire. `StreamingInterpreter`
+transmet au contraire chaque ligne écrite par ECRIRE à une fonction
+`sink`, par petits lots:
+
+- une ligne part immédiatement si le lot précédent date de plus de
+  `FLUSH_INTERVAL` secondes, sinon elle attend le lot suivant (au plus
+  `BATCH_LINES` lignes); les points de contrôle de l'interpréteur
+  envoient aussi un lot en attente, même si le programme n'écrit plus;
+- la sortie n'est pas conservée: seul le budget `max_output_bytes`
+  la borne (erreur "Sortie trop volumineuse").
+
+`stream_in_process` exécute le programme dans un thread et retourne les
+messages au fil de l'eau: ('lines', [...]) puis ('done', (success,
+error, variables)). `SandboxPool.stream` produit les mêmes messages
+depuis un processus isolé; `sse_event` les met au format
+server-sent events pour la vue `execute_interpreter_stream`.
+"""
+
+import json
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from .pseudo_cache import ProgramCache
+from .pseudo_interpreter import PseudoInterpreter
+from .pseudo_limits import ExecutionLimits
+
+# Lignes au plus par lot, et délai au-delà duquel un lot part
+BATCH_LINES = 64
+FLUSH_INTERVAL = 0.05
+
+# Lots en attente entre le thread interpréteur et la réponse HTTP
+STREAM_QUEUE_SIZE = 16
+
+StreamMessage = Tuple[str, Any]
+
+
+class StreamClosed(Exception):
+    """Le client est parti: l'exécution s'arrête à la prochaine écriture"""
+
+
+class OutputStream(list):
+    """Sortie de l'interpréteur qui transmet les lignes au lieu de les conserver"""
+
+    def __init__(self, sink: Callable[[List[str]], None], batch_lines: int = BATCH_LINES,
+                 flush_interval: float = FLUSH_INTERVAL):
+        super().__init__()
+        self.sink = sink
+        self.batch_lines = batch_lines
+        self.flush_interval = flush_interval
+        self.pending: List[str] = []
+        self.lines = 0
+        self.last_flush = 0.0
+
+    def append(self, text: str):
+        self.pending.append(text)
+        self.lines += 1
+        if (len(self.pending) >= self.batch_lines
+                or time.monotonic() - self.last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush_due(self):
+        """Envoie le lot en attente s'il attend depuis plus de `flush_interval`"""
+        if self.pending and time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            batch, self.pending = self.pending, []
+            self.sink(batch)
+        self.last_flush = time.monotonic()
+
+
+class StreamingInterpreter(PseudoInterpreter):
+    """Interpréteur dont la sortie est transmise à `sink` par lots de lignes"""
+
+    def __init__(self, sink: Callable[[List[str]], None], backend: str = 'tree',
+                 cache: Optional[ProgramCache] = None, limits: Optional[ExecutionLimits] = None):
+        super().__init__(backend=backend, cache=cache, limits=limits)
+        self.sink = sink
+
+    def reset(self):
+        super().reset()
+        self.output = OutputStream(self.sink)
+
+    def run(self, compiled, inputs: List[str] = None) -> Tuple[bool, str, str]:
+        success, output, error = super().run(compiled, inputs)
+        # Lignes écrites avant la fin (ou l'erreur) du programme
+        self.output.flush()
+        return success, output, error
+
+    def checkpoint(self, count: int, line: int) -> int:
+        self.output.flush_due()
+        return super().checkpoint(count, line)
+
+
+def stream_in_process(code: str, inputs: List[str] = None, backend: str = 'tree',
+                      cache: Optional[ProgramCache] = None,
+                      limits: Optional[ExecutionLimits] = None) -> Iterator[StreamMessage]:
+    """
+    Exécute `code` dans un thread et produit ses messages au fil de
+    l'eau. La file entre les deux est bornée: si le client lit lentement,
+    l'exécution attend (son temps d'exécution continue de courir). Si le
+    générateur est fermé avant la fin, l'exécution s'arrête.
+    """
+    messages: queue.Queue = queue.Queue(maxsize=STREAM_QUEUE_SIZE)
+    closed = threading.Event()
+
+    def send(message: StreamMessage):
+        while not closed.is_set():
+            try:
+                messages.put(message, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+        raise StreamClosed()
+
+    def produce():
+        try:
+            interpreter = StreamingInterpreter(lambda batch: send(('lines', batch)), backend=backend,
+                                               cache=cache, limits=limits)
+            success, _, error = interpreter.execute(code, list(inputs or []))
+            send(('done', (success, error, interpreter.describe_variables())))
+        except StreamClosed:
+            pass
+        except Exception as e:
+            try:
+                send(('done', (False, f"Erreur inattendue: {str(e)}", {})))
+            except StreamClosed:
+                pass
+
+    thread = threading.Thread(target=produce, name='pseudo-stream', daemon=True)
+    thread.start()
+    try:
+        while True:
+            message = messages.get()
+            yield message
+            if message[0] == 'done':
+                return
+    finally:
+        closed.set()
+
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Un événement server-sent events (données JSON sur une seule ligne)"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
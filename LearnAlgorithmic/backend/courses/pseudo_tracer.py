@@ -0,0 +1,258 @@
+"""
+Trace d'exécution du pseudo-code
+================================
+`TracingInterpreter` exécute un programme comme `PseudoInterpreter`
+(moteur 'tree') et enregistre une étape par instruction exécutée:
+ligne, variables modifiées, résultat des conditions, sorties produites.
+
+Seules les variables modifiées par l'instruction sont enregistrées
+(elles sont connues sans comparer les états): le coût reste
+proportionnel au nombre d'étapes. `trace_to_steps` en déduit le contenu
+des `SimulationStep` (état encodé par différences, voir
+`pseudo_snapshots`; message; panneau du lecteur), utilisé par la commande
+`generate_simulation_steps`.
+
+Un appel de sous-programme donne une étape 'call' (valeurs des
+paramètres) puis, au retour, une étape 'return' qui rétablit les
+variables de l'appelant et porte la valeur retournée.
+"""
+
+import math
+from typing import Any, Dict, List, Optional
+
+from .pseudo_arrays import PseudoArray
+from .pseudo_ast import (
+    Assign, Declare, DeclareArray, For, Function, If, Read, ReadItem, Repeat, StoreItem, While, Write,
+)
+from .pseudo_cache import ProgramCache
+from .pseudo_interpreter import PseudoInterpreter
+from .pseudo_limits import ExecutionLimits
+from .pseudo_snapshots import KEYFRAME_INTERVAL, DeltaEncoder
+
+
+def json_value(value: Any) -> Any:
+    """Valeur enregistrable en JSON (les réels non finis deviennent du texte, un tableau une liste)"""
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, PseudoArray):
+        return [json_value(item) for item in value]
+    return str(value)
+
+
+def format_value(value: Any) -> str:
+    if isinstance(value, bool):
+        return "VRAI" if value else "FAUX"
+    if isinstance(value, str):
+        return f'"{value}"'
+    return str(value)
+
+
+class TracingInterpreter(PseudoInterpreter):
+    """Interpréteur qui enregistre une étape par instruction exécutée"""
+
+    def __init__(self, cache: Optional[ProgramCache] = None, limits: Optional[ExecutionLimits] = None):
+        super().__init__(backend='tree', cache=cache, limits=limits)
+        self.trace: List[Dict[str, Any]] = []
+        self.lines: List[str] = []
+
+    def run(self, compiled, inputs: List[str] = None):
+        self.trace = []
+        self.lines = compiled.lines
+        return super().run(compiled, inputs)
+
+    def record(self, line: int, kind: str, changes: Dict[str, Any] = None, condition: bool = None,
+               output_start: int = None):
+        step = {
+            'step': len(self.trace) + 1,
+            'line': line,
+            'kind': kind,
+            'code': self.lines[line - 1].strip() if 0 < line <= len(self.lines) else '',
+        }
+        if changes:
+            step['changes'] = {name: json_value(value) for name, value in changes.items()}
+        if condition is not None:
+            step['condition'] = condition
+        if output_start is not None and len(self.output) > output_start:
+            step['output'] = self.output[output_start:]
+        self.trace.append(step)
+
+    # ------------------------------------------------------------------
+    # Instructions (mêmes effets que PseudoInterpreter, plus l'étape)
+    # ------------------------------------------------------------------
+
+    def exec_declare(self, stmt: Declare):
+        super().exec_declare(stmt)
+        self.record(stmt.line, 'declare', {name: self.variables[name] for name, _ in stmt.entries})
+
+    def exec_assign(self, stmt: Assign):
+        super().exec_assign(stmt)
+        self.record(stmt.line, 'assign', {stmt.name: self.variables[stmt.name]})
+
+    def exec_read(self, stmt: Read):
+        super().exec_read(stmt)
+        self.record(stmt.line, 'read', {stmt.name: self.variables[stmt.name]})
+
+    # Un tableau modifié est enregistré en entier (les simulations en ont de petits)
+    def exec_declare_array(self, stmt: DeclareArray):
+        super().exec_declare_array(stmt)
+        self.record(stmt.line, 'declare', {name: self.variables[name] for name, _, _ in stmt.entries})
+
+    def exec_store_item(self, stmt: StoreItem):
+        super().exec_store_item(stmt)
+        self.record(stmt.line, 'assign', {stmt.name: self.variables[stmt.name]})
+
+    def exec_read_item(self, stmt: ReadItem):
+        super().exec_read_item(stmt)
+        self.record(stmt.line, 'read', {stmt.name: self.variables[stmt.name]})
+
+    def exec_write(self, stmt: Write):
+        start = len(self.output)
+        super().exec_write(stmt)
+        self.record(stmt.line, 'write', output_start=start)
+
+    def exec_if(self, stmt: If):
+        condition = bool(self.evaluate(stmt.cond))
+        self.record(stmt.line, 'condition', condition=condition)
+        self.execute_block(stmt.then_body if condition else stmt.else_body)
+
+    def exec_for(self, stmt: For):
+        if stmt.invariants:
+            self.forget(stmt.invariants)
+        start_val = int(self.evaluate(stmt.start))
+        end_val = int(self.evaluate(stmt.end))
+
+        step = stmt.step
+        if step is None:
+            step = -1 if start_val > end_val else 1
+
+        variables = self.variables
+        var_name = stmt.var
+        val = start_val
+        while (val <= end_val) if step > 0 else (val >= end_val):
+            variables[var_name] = val
+            self.record(stmt.line, 'loop', {var_name: val}, condition=True)
+            self.execute_block(stmt.body)
+            val += step
+        self.record(stmt.line, 'loop', condition=False)
+
+    def exec_while(self, stmt: While):
+        if stmt.invariants:
+            self.forget(stmt.invariants)
+        while True:
+            condition = bool(self.evaluate(stmt.cond))
+            self.record(stmt.line, 'loop', condition=condition)
+            if not condition:
+                break
+            self.execute_block(stmt.body)
+
+    def exec_repeat(self, stmt: Repeat):
+        if stmt.invariants:
+            self.forget(stmt.invariants)
+        while True:
+            self.execute_block(stmt.body)
+            condition = bool(self.evaluate(stmt.cond))
+            # JUSQU'A: la boucle s'arrête quand la condition devient vraie
+            self.record(stmt.line, 'loop', condition=not condition)
+            if condition:
+                break
+
+    def invoke(self, function: Function, values: List[Any], line: int) -> Any:
+        self.record(line, 'call', {param: value for (param, _), value in zip(function.params, values)})
+        result = super().invoke(function, values, line)
+        self.record(line, 'return', dict(self.variables))
+        if not function.procedure:
+            self.trace[-1]['value'] = json_value(result)
+        return result
+
+
+def describe_step(step: Dict[str, Any]) -> str:
+    """Message lisible d'une étape de trace"""
+    kind = step['kind']
+    changes = step.get('changes', {})
+    assigned = ", ".join(f"{name} prend la valeur {format_value(value)}" for name, value in changes.items())
+
+    if kind == 'declare':
+        return "Déclaration: " + assigned
+    if kind == 'assign':
+        return "Affectation: " + assigned
+    if kind == 'read':
+        return "Lecture: " + assigned
+    if kind == 'write':
+        return "Affichage: " + " / ".join(step.get('output', []))
+    if kind == 'condition':
+        return f"Condition {'VRAIE' if step['condition'] else 'FAUSSE'}: " + (
+            "bloc ALORS" if step['condition'] else "bloc SINON (ou suite du programme)")
+    if kind == 'loop':
+        if not step['condition']:
+            return "Fin de la boucle"
+        return "Tour de boucle" + (f": {assigned}" if assigned else "")
+    if kind == 'call':
+        return "Appel du sous-programme" + (f": {assigned}" if assigned else "")
+    if kind == 'return':
+        if 'value' in step:
+            return f"Retour au programme appelant avec la valeur {format_value(step['value'])}"
+        return "Retour au programme appelant"
+    return step['code']
+
+
+def value_type(value: Any) -> str:
+    """Type affiché par le lecteur de simulations (icône et couleur de la variable)"""
+    if isinstance(value, bool):
+        return 'booleen'
+    if isinstance(value, int):
+        return 'entier'
+    if isinstance(value, float):
+        return 'reel'
+    if isinstance(value, list):
+        return 'tableau'
+    return 'chaine'
+
+
+def visual_for(step: Dict[str, Any], message: str) -> Dict[str, Any]:
+    """
+    `visual_data` d'une étape, dans le format du lecteur
+    (AlgorithmSimulation.js): `code_line` met la ligne en évidence;
+    conditions et tours de boucle s'affichent avec le panneau des
+    conditions (texte de la ligne, résultat), affichages avec le même
+    panneau (code, sortie), les autres étapes avec le panneau des
+    variables modifiées.
+    """
+    visual: Dict[str, Any] = {'code_line': step['line']}
+    if 'condition' in step:
+        visual.update(title=message, condition=step['code'], result=step['condition'],
+                      result_text="VRAI" if step['condition'] else "FAUX")
+    elif step['kind'] == 'write':
+        visual.update(title="Affichage", highlight=step['code'], output="\n".join(step.get('output', [])))
+    else:
+        status = {'declare': 'new', 'call': 'new', 'return': ''}.get(step['kind'], 'modified')
+        changes = step.get('changes', {})
+        visual.update(type='variables', message=message, variables=[
+            {'name': name, 'type': value_type(value), 'value': value, 'status': status}
+            for name, value in changes.items()
+        ])
+        if len(changes) == 1 and status:
+            visual['highlight'] = next(iter(changes))
+    return visual
+
+
+def trace_to_steps(trace: List[Dict[str, Any]],
+                   keyframe_interval: int = KEYFRAME_INTERVAL) -> List[Dict[str, Any]]:
+    """
+    Contenu des `SimulationStep` d'une trace: step_number, description,
+    state_data (variables modifiées et ligne courante, avec un état
+    complet toutes les `keyframe_interval` étapes) et visual_data (voir
+    `visual_for`).
+    """
+    encoder = DeltaEncoder(keyframe_interval)
+    steps = []
+    for step in trace:
+        message = describe_step(step)
+        steps.append({
+            'step_number': step['step'],
+            'description': message,
+            'state_data': encoder.step(step.get('changes', {}), step['line']),
+            'visual_data': visual_for(step, message),
+        })
+    return steps
@@ -0,0 +1,585 @@
+"""
+Traduction du pseudo-code en Python
+===================================
+Troisième moteur, réservé au contenu de confiance: le pseudo-code écrit
+par l'équipe (`Exercise.solution_code`, `Simulation.algorithm_code`,
+exemples). `PythonTranspiler` traduit l'arbre du programme en source
+Python, une fonction par programme et par sous-programme, puis le
+compile avec `compile()`: les variables deviennent des variables
+locales, les boucles des boucles Python, et l'exécution ne passe plus
+par le parcours de l'arbre ni par la boucle de la machine virtuelle.
+
+Le résultat est celui de `PseudoInterpreter` (sortie, erreurs et leurs
+lignes, variables, types, nombre de passages): les opérations passent
+par les mêmes conversions, le compteur de passages et les budgets de
+`pseudo_limits` sont vérifiés comme dans les autres moteurs. La
+commande `compare_interpreters` le vérifie sur tout le contenu. Seules
+les valeurs mémorisées d'`InvariantHoister` ne sont pas utilisées
+(`elided_evaluations` reste à zéro): une variable locale Python coûte
+déjà moins qu'une lecture mémorisée.
+
+Le code produit est exécuté par l'interpréteur Python lui-même, sans
+le processus isolé de `pseudo_sandbox`: `TrustedInterpreter` ne doit
+JAMAIS exécuter le code soumis par les apprenants. Il ne fait pas
+partie des moteurs de `BACKENDS` (réglage
+`PSEUDO_INTERPRETER_BACKEND`, vues).
+"""
+
+from typing import Any, Callable, Dict, List, Optional
+
+from .pseudo_arrays import PseudoArray, new_array, not_an_array
+from .pseudo_ast import (
+    And, Assign, BinOp, Call, CallStmt, Compare, Const, Declare, DeclareArray, Expr, Fail, For, Function,
+    FunctionCall, If, Index, Lookup, Nop, Not, Or, Program, PseudoCodeError, Read, ReadItem, Repeat, Return,
+    Stmt, StoreItem, Var, While, Write,
+)
+from .pseudo_cache import ProgramCache
+from .pseudo_interpreter import COMPARISONS, PseudoInterpreter, _to_number, reserve_python_stack
+from .pseudo_limits import ExecutionLimits, call_depth_exceeded, check_value, format_text, value_too_large
+from .pseudo_optimizer import children
+from .pseudo_vm import MISSING
+
+
+# Opérateurs de comparaison écrits directement en Python
+PYTHON_COMPARISONS = {'=': '==', '==': '==', '<>': '!=', '!=': '!=', '<': '<', '>': '>', '<=': '<=', '>=': '>='}
+
+# Entiers écrits tels quels dans le source (les autres constantes sont passées par nom)
+MAX_LITERAL_INT = 1 << 62
+
+# Opérations dont le type des opérandes n'est connu qu'à l'exécution
+# (mêmes règles que `PseudoInterpreter.eval_binop`)
+PRELUDE = '''
+def _add(a, b):
+    if a.__class__ is int and b.__class__ is int:
+        return a + b
+    a = _to_number(a)
+    b = _to_number(b)
+    if isinstance(a, str) or isinstance(b, str):
+        return str(a) + str(b)
+    return a + b
+
+def _sub(a, b, message):
+    if a.__class__ is int and b.__class__ is int:
+        return a - b
+    a = _to_number(a)
+    b = _to_number(b)
+    if isinstance(a, str) or isinstance(b, str):
+        raise PseudoCodeError(message)
+    return a - b
+
+def _mul(a, b):
+    if a.__class__ is int and b.__class__ is int:
+        return a * b
+    a = _to_number(a)
+    b = _to_number(b)
+    if isinstance(a, str) or isinstance(b, str):
+        raise PseudoCodeError(_OPERANDS)
+    return a * b
+
+def _div(a, b):
+    a = _to_number(a)
+    b = _to_number(b)
+    if isinstance(a, str) or isinstance(b, str):
+        raise PseudoCodeError(_OPERANDS)
+    if b == 0:
+        raise PseudoCodeError("Division par zero")
+    return a / b
+
+def _mod(a, b):
+    if isinstance(a, str):
+        return format_text(a, b)
+    return a % b
+
+def _array(value, name):
+    if value.__class__ is not PseudoArray:
+        raise not_an_array(name)
+    return value
+'''
+
+
+class TranspiledFunction:
+    """Sous-programme traduit: `run(interp, arguments)` est la fonction Python produite"""
+    __slots__ = ('function', 'run')
+
+    def __init__(self, function: Function):
+        self.function = function
+        self.run: Optional[Callable] = None
+
+
+def call(interp, target: TranspiledFunction, values: List[Any], line: int, needs_value: bool) -> Any:
+    """Appel d'un sous-programme traduit (mêmes contrôles que `PseudoInterpreter.call_function`)"""
+    function = target.function
+    function.check_call(len(values), needs_value, line)
+    limit = interp.limits.max_call_depth
+    if limit is not None and interp.call_depth >= limit:
+        raise call_depth_exceeded(interp.limits, line)
+    variable_types = interp.variable_types
+    interp.variable_types = function.local_types()
+    interp.call_depth += 1
+    try:
+        return target.run(interp, values)
+    finally:
+        interp.call_depth -= 1
+        interp.variable_types = variable_types
+
+
+def keep_variables(variables: Dict[str, Any], names: List[str], values: tuple):
+    """Variables du programme principal qui ont reçu une valeur"""
+    for name, value in zip(names, values):
+        if value is not MISSING:
+            variables[name] = value
+
+
+class PythonProgram:
+    """
+    Programme traduit: fonction principale, présence de sous-programmes,
+    source (mise au point) et diagnostics de l'analyse statique
+    """
+    __slots__ = ('main', 'has_functions', 'source', 'diagnostics')
+
+    def __init__(self, main: Callable, has_functions: bool, source: str):
+        self.main = main
+        self.has_functions = has_functions
+        self.source = source
+        self.diagnostics = []
+
+
+class PythonTranspiler:
+    """Traduit l'arbre d'un programme en fonctions Python compilées"""
+
+    def __init__(self, builtins: Dict[str, Callable], comparisons: Dict[str, Callable],
+                 to_number: Callable[[Any], Any]):
+        self.builtins = builtins
+        self.comparisons = comparisons
+        self.to_number = to_number
+        self.lines: List[str] = []
+        self.namespace: Dict[str, Any] = {}
+        self.targets: Dict[str, TranspiledFunction] = {}
+        # Variables locales du sous-programme en cours: nom du pseudo-code -> nom Python
+        self.locals: Dict[str, str] = {}
+        self.temps = 0
+        self._constants: Dict[tuple, str] = {}
+
+    def transpile(self, program: Program) -> PythonProgram:
+        self.namespace = {
+            'MISSING': MISSING, 'PseudoArray': PseudoArray, 'PseudoCodeError': PseudoCodeError,
+            'new_array': new_array, 'not_an_array': not_an_array, 'check_value': check_value,
+            'value_too_large': value_too_large, 'format_text': format_text, 'keep_variables': keep_variables,
+            '_call': call, '_to_number': self.to_number,
+            '_OPERANDS': "Impossible d'effectuer l'operation: les deux operandes doivent etre des nombres",
+        }
+        self._constants = {}
+        self.lines = [PRELUDE]
+        self.targets = {}
+        for index, (name, function) in enumerate(program.functions.items()):
+            target = self.targets[name] = TranspiledFunction(function)
+            self.namespace[f"_F{index}"] = target
+        for index, function in enumerate(program.functions.values()):
+            self.function(f"f{index}", function.body, function)
+        self.function('main', program.body, None)
+
+        source = "\n".join(self.lines)
+        exec(compile(source, '<pseudo-code>', 'exec'), self.namespace)
+        for index, target in enumerate(self.targets.values()):
+            target.run = self.namespace[f"f{index}"]
+        return PythonProgram(self.namespace['main'], bool(program.functions), source)
+
+    # ------------------------------------------------------------------
+    # Fonctions produites
+    # ------------------------------------------------------------------
+
+    def function(self, python_name: str, body: List[Stmt], function: Optional[Function]):
+        """
+        Une fonction Python par programme ou sous-programme: les passages
+        sont comptés dans `count`, reporté sur l'interpréteur à la sortie
+        (et avant chaque appel de sous-programme), `line` suit la ligne
+        courante pour les erreurs levées sans ligne.
+        """
+        self.locals = {}
+        self.temps = 0
+        params = [self.local(name) for name, _ in function.params] if function is not None else []
+        code: List[str] = []
+        self.block(body, code, 2)
+        if function is not None and function.procedure:
+            code.append("        return None")
+        elif function is not None:
+            message = self.constant(f"FONCTION {function.name} terminée sans RETOURNER")
+            code.append(f"        raise PseudoCodeError({message}, {function.end_line})")
+
+        header = [f"def {python_name}(interp{', arguments' if function is not None else ''}):"]
+        if params:
+            header.append(f"    {', '.join(params)}{',' if len(params) == 1 else ''} = arguments")
+        others = [name for name in self.locals.values() if name not in params]
+        if others:
+            header.append(f"    {' = '.join(others)} = MISSING")
+        header += [
+            "    count = interp.iteration_count",
+            "    checkpoint = interp.next_checkpoint",
+            "    types = interp.variable_types",
+            "    limits = interp.limits",
+            "    output = interp.output",
+            "    line = interp.current_line",
+            "    try:",
+        ]
+        footer = [
+            "    except PseudoCodeError as e:",
+            "        if e.line is None:",
+            "            raise e.with_line(line) from None",
+            "        raise",
+            "    finally:",
+            # Un sous-programme appelé a pu compter davantage de passages
+            "        if count > interp.iteration_count:",
+            "            interp.iteration_count = count",
+        ]
+        if function is None:
+            names = list(self.locals)
+            footer.append("        interp.current_line = line")
+            footer.append(f"        keep_variables(interp.variables, {names!r}, "
+                          f"({', '.join(self.locals.values())}{',' if len(names) == 1 else ''}))")
+        self.lines.extend(header + code + footer + [""])
+
+    def local(self, name: str) -> str:
+        python_name = self.locals.get(name)
+        if python_name is None:
+            python_name = self.locals[name] = f"v{len(self.locals)}"
+        return python_name
+
+    def temporary(self) -> str:
+        self.temps += 1
+        return f"t{self.temps}"
+
+    def constant(self, value: Any) -> str:
+        """Écriture Python d'une constante (nom d'une variable globale si elle n'a pas de littéral sûr)"""
+        kind = value.__class__
+        if value is None or kind is bool or kind is str or (kind is int and -MAX_LITERAL_INT < value < MAX_LITERAL_INT):
+            return repr(value)
+        key = (kind, repr(value))
+        name = self._constants.get(key)
+        if name is None:
+            name = self._constants[key] = f"_K{len(self._constants)}"
+            self.namespace[name] = value
+        return name
+
+    # ------------------------------------------------------------------
+    # Instructions
+    # ------------------------------------------------------------------
+
+    def block(self, body: List[Stmt], code: List[str], depth: int):
+        start = len(code)
+        for stmt in body:
+            self.stmt(stmt, code, depth)
+        if len(code) == start:
+            code.append("    " * depth + "pass")
+
+    def stmt(self, stmt: Stmt, code: List[str], depth: int):
+        pad = "    " * depth
+        kind = stmt.__class__
+        line = stmt.line
+        # Passage sur l'instruction, comme dans `execute_block`
+        code.append(f"{pad}line = {line}")
+        code.append(f"{pad}count += 1")
+        code.append(f"{pad}if count > checkpoint:")
+        code.append(f"{pad}    checkpoint = interp.checkpoint(count, {line})")
+
+        calls = bool(self.targets) and stmt_calls(stmt)
+        if calls and kind is not While and kind is not Repeat:
+            # Le sous-programme appelé poursuit le compte des passages
+            code.append(f"{pad}interp.iteration_count = count")
+
+        def resume():
+            if calls:
+                code.append(f"{pad}count = interp.iteration_count")
+                code.append(f"{pad}checkpoint = interp.next_checkpoint")
+
+        if kind is Nop:
+            pass
+
+        elif kind is Fail:
+            code.append(f"{pad}raise PseudoCodeError({self.constant(stmt.message)}, {stmt.error_line})")
+
+        elif kind is Assign:
+            value = self.temporary()
+            code.append(f"{pad}{value} = {self.expr(stmt.expr)}")
+            resume()
+            code.append(f"{pad}if {value}.__class__ is str:")
+            code.append(f"{pad}    if len({value}) > limits.string_ceiling:")
+            code.append(f"{pad}        raise value_too_large({value}, limits, {line})")
+            code.append(f"{pad}elif {value}.__class__ is int:")
+            code.append(f"{pad}    if {value}.bit_length() > limits.integer_bits_ceiling:")
+            code.append(f"{pad}        raise value_too_large({value}, limits, {line})")
+            code.append(f"{pad}{self.local(stmt.name)} = {value}")
+
+        elif kind is Declare:
+            var_type = self.constant(stmt.var_type)
+            for name, init in stmt.entries:
+                code.append(f"{pad}types[{self.constant(name)}] = {var_type}")
+                if init is not None:
+                    value = self.temporary()
+                    code.append(f"{pad}{value} = {self.expr(init)}")
+                    code.append(f"{pad}check_value({value}, limits, {line})")
+                    code.append(f"{pad}{self.local(name)} = {value}")
+                else:
+                    code.append(f"{pad}{self.local(name)} = "
+                                f"{self.constant(PseudoInterpreter.default_value(stmt.var_type))}")
+            resume()
+
+        elif kind is DeclareArray:
+            element_type = self.constant(stmt.element_type)
+            for name, low, high in stmt.entries:
+                array = self.local(name)
+                code.append(f"{pad}{array} = new_array({self.constant(name)}, {element_type}, "
+                            f"{self.expr(low)}, {self.expr(high)}, limits)")
+                code.append(f"{pad}types[{self.constant(name)}] = {array}.type_name")
+            resume()
+
+        elif kind is StoreItem:
+            array, value = self.temporary(), self.temporary()
+            code.append(f"{pad}{array} = _array({self.local(stmt.name)}, {self.constant(stmt.name)})")
+            index = self.temporary()
+            code.append(f"{pad}{index} = {self.expr(stmt.index)}")
+            code.append(f"{pad}{value} = {self.expr(stmt.expr)}")
+            resume()
+            code.append(f"{pad}check_value({value}, limits, {line})")
+            code.append(f"{pad}{array}.set({index}, {value})")
+
+        elif kind is Write:
+            text = self.temporary()
+            args = ", ".join(f"str({self.expr(arg)})" for arg in stmt.args)
+            code.append(f"{pad}{text} = \" \".join([{args}])")
+            resume()
+            code.append(f"{pad}interp.count_output({text}, line)")
+            code.append(f"{pad}output.append({text})")
+
+        elif kind is Read:
+            code.append(f"{pad}{self.local(stmt.name)} = interp.read_input({self.constant(stmt.name)})")
+
+        elif kind is ReadItem:
+            array, index = self.temporary(), self.temporary()
+            code.append(f"{pad}{array} = _array({self.local(stmt.name)}, {self.constant(stmt.name)})")
+            code.append(f"{pad}{index} = {array}.check({self.expr(stmt.index)})")
+            resume()
+            code.append(f"{pad}{array}.set({index}, interp.read_input("
+                        f"{self.constant(stmt.name + '[')} + str({index}) + ']', {array}.element_type))")
+
+        elif kind is If:
+            condition = self.temporary()
+            code.append(f"{pad}{condition} = {self.expr(stmt.cond)}")
+            resume()
+            code.append(f"{pad}if {condition}:")
+            self.block(stmt.then_body, code, depth + 1)
+            if stmt.else_body:
+                code.append(f"{pad}else:")
+                self.block(stmt.else_body, code, depth + 1)
+
+        elif kind is For:
+            self.loop_for(stmt, code, depth, resume)
+
+        elif kind is While:
+            if calls:
+                code.append(f"{pad}while True:")
+                self.condition(stmt.cond, code, depth + 1, "if not {}:")
+                self.block(stmt.body, code, depth + 1)
+            else:
+                code.append(f"{pad}while {self.expr(stmt.cond)}:")
+                self.block(stmt.body, code, depth + 1)
+
+        elif kind is Repeat:
+            code.append(f"{pad}while True:")
+            self.block(stmt.body, code, depth + 1)
+            if calls:
+                self.condition(stmt.cond, code, depth + 1, "if {}:")
+            else:
+                code.append(f"{pad}    if {self.expr(stmt.cond)}:")
+                code.append(f"{pad}        break")
+
+        elif kind is CallStmt:
+            args = ", ".join(self.expr(arg) for arg in stmt.args)
+            code.append(f"{pad}_call(interp, {self.target(stmt.name)}, [{args}], line, False)")
+            resume()
+
+        elif kind is Return:
+            code.append(f"{pad}return {self.expr(stmt.expr) if stmt.expr is not None else 'None'}")
+
+        else:
+            raise TypeError(f"Instruction non prise en charge: {kind.__name__}")
+
+    def condition(self, node: Expr, code: List[str], depth: int, test: str):
+        """Condition de boucle qui appelle un sous-programme: passages reportés avant et repris après"""
+        pad = "    " * depth
+        value = self.temporary()
+        code.append(f"{pad}interp.iteration_count = count")
+        code.append(f"{pad}{value} = {self.expr(node)}")
+        code.append(f"{pad}count = interp.iteration_count")
+        code.append(f"{pad}checkpoint = interp.next_checkpoint")
+        code.append(f"{pad}{test.format(value)}")
+        code.append(f"{pad}    break")
+
+    def loop_for(self, stmt: For, code: List[str], depth: int, resume: Callable[[], None]):
+        """POUR: bornes calculées une fois, puis `range` (le pas inconnu est déduit des bornes)"""
+        pad = "    " * depth
+        start, end = self.temporary(), self.temporary()
+        code.append(f"{pad}{start} = int({self.expr(stmt.start)})")
+        code.append(f"{pad}{end} = int({self.expr(stmt.end)})")
+        resume()
+        var = self.local(stmt.var)
+        step = stmt.step
+        if step is None:
+            direction = self.temporary()
+            code.append(f"{pad}{direction} = -1 if {start} > {end} else 1")
+            code.append(f"{pad}for {var} in range({start}, {end} + {direction}, {direction}):")
+        elif step != 0:
+            code.append(f"{pad}for {var} in range({start}, {end} {'+' if step > 0 else '-'} 1, {step}):")
+        else:
+            # Pas nul: la boucle ne s'arrête que sur le budget, comme dans les autres moteurs
+            value = self.temporary()
+            code.append(f"{pad}{value} = {start}")
+            code.append(f"{pad}while {value} >= {end}:")
+            code.append(f"{pad}    {var} = {value}")
+        self.block(stmt.body, code, depth + 1)
+
+    def target(self, name: str) -> str:
+        return f"_F{list(self.targets).index(name)}"
+
+    # ------------------------------------------------------------------
+    # Expressions
+    # ------------------------------------------------------------------
+
+    def expr(self, node: Expr) -> str:
+        kind = node.__class__
+
+        if kind is Const:
+            return self.constant(node.value)
+
+        if kind is Var:
+            # Une variable jamais affectée vaut son propre nom
+            name = self.local(node.name)
+            return f"({name} if {name} is not MISSING else {self.constant(node.text)})"
+
+        if kind is Lookup:
+            name = self.local(node.name)
+            return f"({name} if {name} is not MISSING else {self.expr(node.fallback)})"
+
+        if kind is Index:
+            return (f"_array({self.local(node.name)}, {self.constant(node.name)})"
+                    f".get({self.expr(node.index)})")
+
+        if kind is BinOp:
+            left = self.expr(node.left)
+            right = self.expr(node.right)
+            op = node.op
+            if op == 'MOD':
+                return f"_mod({left}, {right})"
+            if op == 'DIV':
+                return f"({left} // {right})"
+            if op == '+':
+                return f"_add({left}, {right})"
+            if op == '-':
+                message = (f"Impossible de soustraire: '{node.left_text}' et '{node.right_text}' "
+                           f"doivent etre des nombres")
+                return f"_sub({left}, {right}, {self.constant(message)})"
+            if op == '*':
+                return f"_mul({left}, {right})"
+            return f"_div({left}, {right})"
+
+        if kind is Compare:
+            op = PYTHON_COMPARISONS.get(node.op)
+            if op is None:
+                name = self.constant_function(self.comparisons[node.op])
+                return f"{name}({self.expr(node.left)}, {self.expr(node.right)})"
+            return f"(({self.expr(node.left)}) {op} ({self.expr(node.right)}))"
+
+        if kind is And or kind is Or:
+            joined = f" {'and' if kind is And else 'or'} ".join(f"({self.expr(operand)})"
+                                                              for operand in node.operands)
+            return f"(True if ({joined}) else False)"
+
+        if kind is Not:
+            return f"(not ({self.expr(node.operand)}))"
+
+        if kind is Call:
+            args = ", ".join(self.expr(arg) for arg in node.args)
+            if node.fallback is not None:
+                # Fonction inconnue: les arguments sont évalués, puis le texte ou la variable
+                return f"(([{args}]), {self.expr(node.fallback)})[1]"
+            function = self.constant_function(node.function or self.builtins[node.name])
+            return f"{function}([{args}])"
+
+        if kind is FunctionCall:
+            args = ", ".join(self.expr(arg) for arg in node.args)
+            return f"_call(interp, {self.target(node.name)}, [{args}], line, True)"
+
+        raise TypeError(f"Expression non prise en charge: {kind.__name__}")
+
+    def constant_function(self, function: Callable) -> str:
+        key = ('function', id(function))
+        name = self._constants.get(key)
+        if name is None:
+            name = self._constants[key] = f"_B{len(self._constants)}"
+            self.namespace[name] = function
+        return name
+
+
+def calls(node: Expr) -> bool:
+    """L'expression appelle-t-elle un sous-programme du programme?"""
+    return node.__class__ is FunctionCall or any(calls(child) for child in children(node))
+
+
+def stmt_calls(stmt: Stmt) -> bool:
+    """Les expressions propres à l'instruction (hors blocs) appellent-elles un sous-programme?"""
+    kind = stmt.__class__
+    if kind is Assign:
+        nodes = [stmt.expr]
+    elif kind is StoreItem:
+        nodes = [stmt.index, stmt.expr]
+    elif kind is Write or kind is CallStmt:
+        nodes = stmt.args
+    elif kind is ReadItem:
+        nodes = [stmt.index]
+    elif kind is Declare:
+        nodes = [init for _, init in stmt.entries if init is not None]
+    elif kind is DeclareArray:
+        nodes = [bound for _, low, high in stmt.entries for bound in (low, high)]
+    elif kind is If or kind is While or kind is Repeat:
+        nodes = [stmt.cond]
+    elif kind is For:
+        nodes = [stmt.start, stmt.end]
+    elif kind is Return:
+        nodes = [stmt.expr] if stmt.expr is not None else []
+    else:
+        nodes = []
+    return kind is CallStmt or any(calls(node) for node in nodes)
+
+
+class TrustedInterpreter(PseudoInterpreter):
+    """
+    Interpréteur du contenu écrit par l'équipe: le programme est traduit
+    en Python (`PythonTranspiler`) puis exécuté directement.
+
+    Ne JAMAIS l'utiliser pour du code soumis par un apprenant: le
+    programme s'exécute sans isolation. Un programme que Python refuse
+    de compiler (imbrication trop profonde) s'exécute avec le moteur
+    'tree'.
+    """
+
+    hoist_invariants = False
+
+    def __init__(self, cache: Optional[ProgramCache] = None, limits: Optional[ExecutionLimits] = None):
+        super().__init__(backend='tree', cache=cache, limits=limits)
+        # Clé distincte dans le cache des programmes
+        self.backend = 'python'
+
+    def lower(self, program: Program):
+        program = super().lower(program)
+        try:
+            compiled = PythonTranspiler(self.builtins, COMPARISONS, _to_number).transpile(program)
+        except (SyntaxError, RecursionError, MemoryError):
+            return program
+        compiled.diagnostics = program.diagnostics
+        return compiled
+
+    def run_compiled(self, compiled):
+        if not isinstance(compiled, PythonProgram):
+            return super().run_compiled(compiled)
+        if compiled.has_functions:
+            reserve_python_stack(self.limits.max_call_depth)
+        compiled.main(self)
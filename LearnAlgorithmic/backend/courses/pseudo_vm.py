@@ -0,0 +1,889 @@
+"""
+Machine virtuelle du pseudo-code
+================================
+Deuxième moteur d'exécution de `PseudoInterpreter`, sélectionné avec
+`backend='vm'`. L'arbre produit par `pseudo_parser` est abaissé en une
+liste plate d'instructions (sauts et branchements) qui travaillent sur
+des emplacements de variables numérotés au lieu du dictionnaire
+`variables`. Les expressions sont compilées en fonctions Python qui
+reçoivent le tableau des emplacements.
+
+L'exécution ne passe plus par la récursion de `execute_block`: la
+profondeur d'imbrication des blocs n'a plus d'effet sur la pile Python.
+Le programme compilé ne dépend d'aucune exécution et peut être relancé
+pour chaque cas de test.
+
+Un tableau (`pseudo_arrays.PseudoArray`) occupe un emplacement; la
+lecture d'un élément contrôle l'indice sur place, sans appel de méthode.
+
+Les sous-programmes sont compilés à la suite du programme principal,
+chacun avec ses propres emplacements (les paramètres d'abord). Un appel
+empile un cadre (compteur de retour, emplacements et boucles de
+l'appelant) et crée la liste des emplacements de l'appelé: ni copie de
+dictionnaire, ni récursion Python, si bien que la profondeur des appels
+n'est bornée que par `ExecutionLimits.max_call_depth`. Un appel placé
+dans une expression est sorti de l'expression: une instruction CALL le
+précède et range le résultat dans un emplacement temporaire, que
+l'expression lit ensuite (les opérandes ET / OU gardent leur évaluation
+en court-circuit, par des branchements).
+
+Une valeur mémorisée (`Reuse`) occupe un emplacement du cadre; FORGET
+l'oublie à l'entrée de sa boucle. Chaque cadre compte dans un autre
+emplacement les calculs évités, ajoutés à
+`PseudoInterpreter.elided_evaluations` quand le cadre se termine.
+"""
+
+import sys
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .pseudo_arrays import PseudoArray, new_array, not_an_array
+from .pseudo_ast import (
+    And, Assign, BinOp, Call, CallStmt, Compare, Const, Declare, DeclareArray, Expr, Fail, For, Function,
+    FunctionCall, If, Index, InputRequired, Lookup, Nop, Not, Or, Program, PseudoCodeError, Read, ReadItem,
+    Repeat, Return, Reuse, Stmt, StoreItem, Var, While, Write,
+)
+from .pseudo_limits import call_depth_exceeded, check_value, format_text, value_too_large
+
+
+# Codes d'instruction: (code, ligne, a, b). Une ligne non nulle compte
+# comme un passage sur l'instruction (numéro de ligne courant, protection
+# contre les boucles infinies et budget de temps), comme dans `execute_block`.
+NOP = 0
+FAIL = 1
+DECLARE = 2
+STORE = 3
+WRITE = 4
+READ = 5
+BRANCH_FALSE = 6
+JUMP = 7
+FOR_INIT = 8
+FOR_NEXT = 9
+DECLARE_ARRAY = 10
+STORE_ITEM = 11
+READ_ITEM = 12
+CALL = 13
+RETURN = 14
+TEMP = 15
+FORGET = 16
+
+OPCODE_NAMES = {
+    NOP: 'NOP', FAIL: 'FAIL', DECLARE: 'DECLARE', STORE: 'STORE', WRITE: 'WRITE',
+    READ: 'READ', BRANCH_FALSE: 'BRANCH_FALSE', JUMP: 'JUMP',
+    FOR_INIT: 'FOR_INIT', FOR_NEXT: 'FOR_NEXT',
+    DECLARE_ARRAY: 'DECLARE_ARRAY', STORE_ITEM: 'STORE_ITEM', READ_ITEM: 'READ_ITEM',
+    CALL: 'CALL', RETURN: 'RETURN', TEMP: 'TEMP', FORGET: 'FORGET',
+}
+
+# Début du nom des emplacements temporaires (résultats d'appels, valeurs
+# mémorisées, compteur): aucune variable du programme ne peut porter ce nom
+TEMPORARY_PREFIX = '<'
+
+
+class _Missing:
+    """Emplacement jamais affecté (un seul exemplaire, conservé par pickle)"""
+    __slots__ = ()
+
+    def __reduce__(self):
+        return 'MISSING'
+
+    def __repr__(self):
+        return 'MISSING'
+
+
+MISSING = _Missing()
+
+Instruction = Tuple[int, int, Any, Any]
+
+# État d'une exécution suspendue: compteur d'instruction, emplacements, boucles POUR,
+# cadres des appels en cours, types des variables, compteur de calculs évités
+ResumeState = Tuple[int, List[Any], List[Any], List[tuple], Dict[str, str], Optional[int]]
+
+
+class FunctionCode:
+    """Sous-programme compilé: première instruction, emplacements et boucles POUR de son cadre"""
+    __slots__ = ('function', 'entry', 'names', 'loop_count', 'types', 'hits')
+
+    def __init__(self, function: Function):
+        self.function = function
+        self.entry = 0
+        self.names: List[str] = []
+        self.loop_count = 0
+        self.types = function.local_types()
+        # Emplacement du compteur de calculs évités (None: aucune valeur mémorisée)
+        self.hits: Optional[int] = None
+
+    @property
+    def size(self) -> int:
+        return len(self.names)
+
+
+class Bytecode:
+    """
+    Programme compilé: instructions, noms des emplacements, nombre de boucles
+    POUR, sous-programmes et diagnostics de l'analyse statique
+    """
+    __slots__ = ('code', 'names', 'loop_count', 'functions', 'hits', 'diagnostics')
+
+    def __init__(self, code: List[Instruction], names: List[str], loop_count: int,
+                 functions: Optional[List[FunctionCode]] = None, hits: Optional[int] = None):
+        self.code = code
+        self.names = names
+        self.loop_count = loop_count
+        self.functions = functions or []
+        self.hits = hits
+        self.diagnostics = []
+
+    def disassemble(self) -> str:
+        """Représentation lisible des instructions (mise au point)"""
+        rows = []
+        for pc, (op, line, a, b) in enumerate(self.code):
+            rows.append(f"{pc:4d}  L{line:<4d} {OPCODE_NAMES[op]:<13} {a!r:.40} {b!r:.30}")
+        return "\n".join(rows)
+
+
+class BytecodeCompiler:
+    """Abaisse l'arbre d'un programme en instructions de la machine virtuelle"""
+
+    def __init__(self, builtins: Dict[str, Callable], comparisons: Dict[str, Callable],
+                 to_number: Callable[[Any], Any]):
+        self.builtins = builtins
+        self.comparisons = comparisons
+        self.to_number = to_number
+        self.code: List[Instruction] = []
+        self.slots: Dict[str, int] = {}
+        self.loop_count = 0
+        self.functions: Dict[str, FunctionCode] = {}
+        # Emplacements temporaires de l'instruction en cours
+        self.temps = 0
+        # Compteur de calculs évités du cadre en cours de compilation
+        self.hits: Optional[int] = None
+        # id(noeud) -> (noeud, l'expression contient un appel de sous-programme)
+        self._calls: Dict[int, Tuple[Expr, bool]] = {}
+
+    def compile(self, program: Program) -> Bytecode:
+        self.code = []
+        self.slots = {}
+        self.loop_count = 0
+        self.hits = None
+        self._calls = {}
+        self.functions = {name: FunctionCode(function) for name, function in program.functions.items()}
+        self.compile_block(program.body)
+        names = self.slot_names()
+        loop_count = self.loop_count
+        hits = self.hits
+        if self.functions:
+            # Fin du programme principal: les sous-programmes suivent
+            self.emit(RETURN)
+            for target in self.functions.values():
+                self.compile_function(target)
+        return Bytecode(self.code, names, loop_count, list(self.functions.values()), hits)
+
+    def compile_function(self, target: FunctionCode):
+        """Corps d'un sous-programme, dans ses propres emplacements (paramètres d'abord)"""
+        function = target.function
+        self.slots = {}
+        self.loop_count = 0
+        self.hits = None
+        for name, _ in function.params:
+            self.slot(name)
+        target.entry = len(self.code)
+        self.compile_block(function.body)
+        if function.procedure:
+            self.emit(RETURN)
+        else:
+            self.emit(FAIL, 0, f"FONCTION {function.name} terminée sans RETOURNER", function.end_line)
+        target.names = self.slot_names()
+        target.loop_count = self.loop_count
+        target.hits = self.hits
+
+    def slot_names(self) -> List[str]:
+        names = [None] * len(self.slots)
+        for name, slot in self.slots.items():
+            names[slot] = name
+        return names
+
+    def slot(self, name: str) -> int:
+        """Numéro d'emplacement d'une variable"""
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.slots)
+        return slot
+
+    def emit(self, op: int, line: int = 0, a: Any = None, b: Any = None) -> int:
+        self.code.append((op, line, a, b))
+        return len(self.code) - 1
+
+    def patch(self, pc: int, b: Any):
+        """Renseigne la cible d'un saut émis avant que sa destination soit connue"""
+        op, line, a, _ = self.code[pc]
+        self.code[pc] = (op, line, a, b)
+
+    # ------------------------------------------------------------------
+    # Instructions
+    # ------------------------------------------------------------------
+
+    def compile_block(self, body: List[Stmt]):
+        for stmt in body:
+            self.compile_stmt(stmt)
+
+    def compile_stmt(self, stmt: Stmt):
+        line = stmt.line
+        kind = stmt.__class__
+        self.temps = 0
+        if (kind is For or kind is While or kind is Repeat) and stmt.invariants:
+            self.emit(FORGET, 0, [self.reuse_slot(slot) for slot in stmt.invariants])
+        calls = bool(self.functions) and self.stmt_has_calls(stmt)
+        if calls and kind is not While and kind is not Repeat:
+            # Les appels précèdent l'instruction: le passage est compté avant eux
+            self.emit(NOP, line)
+            line = 0
+
+        if kind is Assign:
+            self.emit(STORE, line, self.slot(stmt.name), self.expr(stmt.expr))
+
+        elif kind is StoreItem:
+            index, expr = self.lower_operands([stmt.index, stmt.expr])
+            self.emit(STORE_ITEM, line, self.slot(stmt.name), (stmt.name, self.expr(index), self.expr(expr)))
+
+        elif kind is Write:
+            self.emit(WRITE, line, [self.expr(arg) for arg in self.lower_operands(stmt.args)])
+
+        elif kind is Read:
+            self.emit(READ, line, self.slot(stmt.name), stmt.name)
+
+        elif kind is ReadItem:
+            self.emit(READ_ITEM, line, self.slot(stmt.name), (stmt.name, self.expr(stmt.index)))
+
+        elif kind is DeclareArray:
+            if calls:
+                # Une instruction par tableau: les appels d'une borne suivent les tableaux qui précèdent
+                for name, low, high in stmt.entries:
+                    low, high = self.lower_operands([low, high])
+                    self.emit(DECLARE_ARRAY, 0, stmt.element_type,
+                              [(self.slot(name), name, self.expr(low), self.expr(high))])
+            else:
+                entries = [(self.slot(name), name, self.expr(low), self.expr(high))
+                           for name, low, high in stmt.entries]
+                self.emit(DECLARE_ARRAY, line, stmt.element_type, entries)
+
+        elif kind is Declare:
+            if calls:
+                # Une instruction par variable: une valeur initiale peut lire les précédentes
+                for name, init in stmt.entries:
+                    self.emit(DECLARE, 0, stmt.var_type,
+                              [(self.slot(name), name, self.expr(init) if init is not None else None)])
+            else:
+                entries = [(self.slot(name), name, self.expr(init) if init is not None else None)
+                           for name, init in stmt.entries]
+                self.emit(DECLARE, line, stmt.var_type, entries)
+
+        elif kind is Nop:
+            self.emit(NOP, line)
+
+        elif kind is Fail:
+            self.emit(FAIL, line, stmt.message, stmt.error_line)
+
+        elif kind is If:
+            branch = self.emit(BRANCH_FALSE, line, self.expr(stmt.cond))
+            self.compile_block(stmt.then_body)
+            if stmt.else_body:
+                jump = self.emit(JUMP)
+                self.patch(branch, len(self.code))
+                self.compile_block(stmt.else_body)
+                self.patch(jump, len(self.code))
+            else:
+                self.patch(branch, len(self.code))
+
+        elif kind is For:
+            loop_id = self.loop_count
+            self.loop_count += 1
+            slot = self.slot(stmt.var)
+            start, end = self.lower_operands([stmt.start, stmt.end])
+            init = self.emit(FOR_INIT, line, (loop_id, slot, self.expr(start), self.expr(end), stmt.step))
+            body_start = len(self.code)
+            self.compile_block(stmt.body)
+            self.emit(FOR_NEXT, 0, (loop_id, slot), body_start)
+            self.patch(init, len(self.code))
+
+        elif kind is While:
+            self.emit(NOP, line)
+            # Les appels de la condition sont refaits à chaque tour
+            head = len(self.code)
+            branch = self.emit(BRANCH_FALSE, 0, self.expr(stmt.cond))
+            self.compile_block(stmt.body)
+            self.emit(JUMP, 0, None, head)
+            self.patch(branch, len(self.code))
+
+        elif kind is Repeat:
+            self.emit(NOP, line)
+            head = len(self.code)
+            self.compile_block(stmt.body)
+            self.temps = 0
+            self.emit(BRANCH_FALSE, 0, self.expr(stmt.cond), head)
+
+        elif kind is CallStmt:
+            args = [self.expr(arg) for arg in self.lower_operands(stmt.args)]
+            self.emit(CALL, line, (self.functions[stmt.name], args), None)
+
+        elif kind is Return:
+            self.emit(RETURN, line, self.expr(stmt.expr) if stmt.expr is not None else None)
+
+        else:
+            raise TypeError(f"Instruction non prise en charge: {kind.__name__}")
+
+    # ------------------------------------------------------------------
+    # Appels de sous-programmes
+    # ------------------------------------------------------------------
+
+    def stmt_has_calls(self, stmt: Stmt) -> bool:
+        """Les expressions propres à l'instruction (hors blocs) appellent-elles un sous-programme?"""
+        kind = stmt.__class__
+        if kind is Assign:
+            nodes = [stmt.expr]
+        elif kind is StoreItem:
+            nodes = [stmt.index, stmt.expr]
+        elif kind is Write or kind is CallStmt:
+            nodes = stmt.args
+        elif kind is ReadItem:
+            nodes = [stmt.index]
+        elif kind is Declare:
+            nodes = [init for _, init in stmt.entries if init is not None]
+        elif kind is DeclareArray:
+            nodes = [bound for _, low, high in stmt.entries for bound in (low, high)]
+        elif kind is If or kind is While or kind is Repeat:
+            nodes = [stmt.cond]
+        elif kind is For:
+            nodes = [stmt.start, stmt.end]
+        elif kind is Return:
+            nodes = [stmt.expr] if stmt.expr is not None else []
+        else:
+            nodes = []
+        return any(self.has_calls(node) for node in nodes)
+
+    def has_calls(self, node: Expr) -> bool:
+        """L'expression appelle-t-elle un sous-programme du programme?"""
+        if not self.functions:
+            return False
+        entry = self._calls.get(id(node))
+        if entry is None:
+            # Le noeud est conservé avec le résultat: son id ne peut pas être réutilisé
+            entry = self._calls[id(node)] = (node, self._has_calls(node))
+        return entry[1]
+
+    def _has_calls(self, node: Expr) -> bool:
+        kind = node.__class__
+        if kind is FunctionCall:
+            return True
+        if kind is Lookup:
+            return self.has_calls(node.fallback)
+        if kind is Index:
+            return self.has_calls(node.index)
+        if kind is Not:
+            return self.has_calls(node.operand)
+        if kind is And or kind is Or:
+            return any(self.has_calls(operand) for operand in node.operands)
+        if kind is Compare or kind is BinOp:
+            return self.has_calls(node.left) or self.has_calls(node.right)
+        if kind is Call:
+            return any(self.has_calls(arg) for arg in node.args)
+        return False
+
+    def reuse_slot(self, slot: int) -> int:
+        """Emplacement de la valeur mémorisée `slot` dans le cadre en cours"""
+        return self.slot(f"{TEMPORARY_PREFIX}r{slot}>")
+
+    def temporary(self) -> Tuple[str, int]:
+        """Nouvel emplacement temporaire de l'instruction en cours: (nom, numéro)"""
+        name = f"{TEMPORARY_PREFIX}{self.temps}>"
+        self.temps += 1
+        return name, self.slot(name)
+
+    def lower_operands(self, nodes: List[Expr]) -> List[Expr]:
+        """
+        `lower_calls` sur des opérandes évalués de gauche à droite: un
+        opérande suivi d'un appel est calculé avant cet appel (un appel
+        peut modifier un tableau passé en argument).
+        """
+        lowered = []
+        for i, node in enumerate(nodes):
+            node = self.lower_calls(node)
+            if (node.__class__ is not Const and node.__class__ is not Var
+                    and any(self.has_calls(later) for later in nodes[i + 1:])):
+                name, slot = self.temporary()
+                self.emit(TEMP, 0, slot, self.expr(node))
+                node = Var(name, '')
+            lowered.append(node)
+        return lowered
+
+    def lower_calls(self, node: Expr) -> Expr:
+        """
+        Expression équivalente sans appel de sous-programme: chaque appel
+        est émis avant (instruction CALL) et remplacé par la lecture de
+        son résultat dans un emplacement temporaire.
+        """
+        if not self.has_calls(node):
+            return node
+        kind = node.__class__
+
+        if kind is FunctionCall:
+            args = [self.expr(arg) for arg in self.lower_operands(node.args)]
+            name, slot = self.temporary()
+            self.emit(CALL, 0, (self.functions[node.name], args), slot)
+            return Var(name, '')
+
+        if kind is BinOp:
+            left, right = self.lower_operands([node.left, node.right])
+            return BinOp(node.op, left, right, node.source)
+
+        if kind is Compare:
+            left, right = self.lower_operands([node.left, node.right])
+            return Compare(node.op, left, right)
+
+        if kind is Not:
+            return Not(self.lower_calls(node.operand))
+
+        if kind is Index:
+            return Index(node.name, self.lower_calls(node.index))
+
+        if kind is Call:
+            return Call(node.name, self.lower_operands(node.args), node.fallback, node.function)
+
+        if kind is And or kind is Or:
+            # Court-circuit: le premier opérande faux (ET) ou vrai (OU) saute les suivants
+            name, slot = self.temporary()
+            exits = []
+            for i, operand in enumerate(node.operands):
+                test = self.expr(operand)
+                self.emit(TEMP, 0, slot, lambda values, test=test: bool(test(values)))
+                if i < len(node.operands) - 1:
+                    if kind is And:
+                        exits.append(self.emit(BRANCH_FALSE, 0, lambda values: values[slot]))
+                    else:
+                        exits.append(self.emit(BRANCH_FALSE, 0, lambda values: not values[slot]))
+            for pc in exits:
+                self.patch(pc, len(self.code))
+            return Var(name, '')
+
+        if kind is Lookup:
+            # Variable si elle a une valeur, sinon l'expression de repli (et ses appels)
+            name, slot = self.temporary()
+            variable = self.slot(node.name)
+            self.emit(TEMP, 0, slot, lambda values: values[variable])
+            skip = self.emit(BRANCH_FALSE, 0, lambda values: values[slot] is MISSING)
+            self.emit(TEMP, 0, slot, self.expr(node.fallback))
+            self.patch(skip, len(self.code))
+            return Var(name, '')
+
+        raise TypeError(f"Expression non prise en charge: {kind.__name__}")
+
+    # ------------------------------------------------------------------
+    # Expressions: chaque noeud devient une fonction f(values)
+    # ------------------------------------------------------------------
+
+    def expr(self, node: Expr) -> Callable[[list], Any]:
+        if self.functions and self.has_calls(node):
+            node = self.lower_calls(node)
+        kind = node.__class__
+
+        if kind is Const:
+            value = node.value
+            return lambda values: value
+
+        if kind is Var:
+            slot = self.slot(node.name)
+            text = node.text
+
+            def var(values):
+                value = values[slot]
+                # Une variable jamais affectée vaut son propre nom
+                return text if value is MISSING else value
+            return var
+
+        if kind is Lookup:
+            slot = self.slot(node.name)
+            fallback = self.expr(node.fallback)
+
+            def lookup(values):
+                value = values[slot]
+                return fallback(values) if value is MISSING else value
+            return lookup
+
+        if kind is Reuse:
+            slot = self.reuse_slot(node.slot)
+            inner = self.expr(node.expr)
+            if node.store:
+                def store(values):
+                    value = values[slot] = inner(values)
+                    return value
+                return store
+            if self.hits is None:
+                self.hits = self.slot(f"{TEMPORARY_PREFIX}hits>")
+            hits = self.hits
+
+            def reuse(values):
+                value = values[slot]
+                if value is MISSING:
+                    value = values[slot] = inner(values)
+                else:
+                    values[hits] += 1
+                return value
+            return reuse
+
+        if kind is Index:
+            slot = self.slot(node.name)
+            index = self.expr(node.index)
+            name = node.name
+
+            def item(values):
+                array = values[slot]
+                if array.__class__ is not PseudoArray:
+                    raise not_an_array(name)
+                i = index(values)
+                if i.__class__ is not int:
+                    i = array.convert_index(i)
+                if array.low <= i <= array.high:
+                    return array.items[i - array.low]
+                raise array.out_of_bounds(i)
+            return item
+
+        if kind is BinOp:
+            return self.binop(node)
+
+        if kind is Compare:
+            left = self.expr(node.left)
+            right = self.expr(node.right)
+            op = node.op
+            if op == '=' or op == '==':
+                return lambda values: left(values) == right(values)
+            if op == '<>' or op == '!=':
+                return lambda values: left(values) != right(values)
+            if op == '<':
+                return lambda values: left(values) < right(values)
+            if op == '>':
+                return lambda values: left(values) > right(values)
+            if op == '<=':
+                return lambda values: left(values) <= right(values)
+            if op == '>=':
+                return lambda values: left(values) >= right(values)
+            compare = self.comparisons[op]
+            return lambda values: compare(left(values), right(values))
+
+        if kind is And:
+            operands = [self.expr(operand) for operand in node.operands]
+
+            def conjunction(values):
+                for operand in operands:
+                    if not operand(values):
+                        return False
+                return True
+            return conjunction
+
+        if kind is Or:
+            operands = [self.expr(operand) for operand in node.operands]
+
+            def disjunction(values):
+                for operand in operands:
+                    if operand(values):
+                        return True
+                return False
+            return disjunction
+
+        if kind is Not:
+            operand = self.expr(node.operand)
+            return lambda values: not operand(values)
+
+        if kind is Call:
+            args = [self.expr(arg) for arg in node.args]
+            if node.fallback is not None:
+                # Fonction inconnue: les arguments sont évalués, puis le texte ou la variable
+                fallback = self.expr(node.fallback)
+
+                def unknown_call(values):
+                    for arg in args:
+                        arg(values)
+                    return fallback(values)
+                return unknown_call
+            function = node.function or self.builtins[node.name]
+            return lambda values: function([arg(values) for arg in args])
+
+        raise TypeError(f"Expression non prise en charge: {kind.__name__}")
+
+    def binop(self, node: BinOp) -> Callable[[list], Any]:
+        left = self.expr(node.left)
+        right = self.expr(node.right)
+        to_number = self.to_number
+        op = node.op
+
+        if op == 'MOD':
+            def mod(values):
+                a = left(values)
+                if isinstance(a, str):
+                    return format_text(a, right(values))
+                return a % right(values)
+            return mod
+        if op == 'DIV':
+            return lambda values: left(values) // right(values)
+
+        if op == '+':
+            def add(values):
+                a = to_number(left(values))
+                b = to_number(right(values))
+                if isinstance(a, str) or isinstance(b, str):
+                    return str(a) + str(b)
+                return a + b
+            return add
+
+        if op == '-':
+            def sub(values):
+                a = to_number(left(values))
+                b = to_number(right(values))
+                if isinstance(a, str) or isinstance(b, str):
+                    raise PseudoCodeError(f"Impossible de soustraire: '{node.left_text}' et '{node.right_text}' doivent etre des nombres")
+                return a - b
+            return sub
+
+        message = "Impossible d'effectuer l'operation: les deux operandes doivent etre des nombres"
+        if op == '*':
+            def mul(values):
+                a = to_number(left(values))
+                b = to_number(right(values))
+                if isinstance(a, str) or isinstance(b, str):
+                    raise PseudoCodeError(message)
+                return a * b
+            return mul
+
+        def div(values):
+            a = to_number(left(values))
+            b = to_number(right(values))
+            if isinstance(a, str) or isinstance(b, str):
+                raise PseudoCodeError(message)
+            if b == 0:
+                raise PseudoCodeError("Division par zero")
+            return a / b
+        return div
+
+
+class PseudoVM:
+    """Exécute un `Bytecode` avec l'état (sorties, entrées, compteurs) d'un interpréteur"""
+
+    def __init__(self, interpreter):
+        self.interpreter = interpreter
+
+    def run(self, bytecode: Bytecode, resume: ResumeState = None):
+        """
+        Exécute le programme, ou le reprend depuis l'état `resume`
+        (compteur d'instruction, emplacements, boucles POUR, cadres des
+        appels en cours, types des variables, compteur de calculs évités)
+        joint à une exception `InputRequired`.
+        """
+        interp = self.interpreter
+        code = bytecode.code
+        names = bytecode.names
+        if resume is None:
+            pc = 0
+            values = [MISSING] * len(names)
+            loops = [None] * bytecode.loop_count
+            frames = []
+            variable_types = interp.variable_types
+            hits = bytecode.hits
+            if hits is not None:
+                values[hits] = 0
+            assigned = []
+        else:
+            pc, values, loops, frames, variable_types, hits = resume
+            interp.variable_types = variable_types
+            # Dans un sous-programme, les affectations du cadre courant sont locales
+            assigned = [] if frames else [
+                slot for slot, value in enumerate(values)
+                if value is not MISSING and not names[slot].startswith(TEMPORARY_PREFIX)
+            ]
+        output = interp.output
+        count_output = interp.count_output
+        limits = interp.limits
+        max_depth = limits.max_call_depth if limits.max_call_depth is not None else sys.maxsize
+        elided = 0
+        string_ceiling = limits.string_ceiling
+        integer_bits_ceiling = limits.integer_bits_ceiling
+        checkpoint = interp.next_checkpoint
+        count = interp.iteration_count
+        line = interp.current_line
+        end = len(code)
+
+        try:
+            while pc < end:
+                op, lineno, a, b = code[pc]
+                pc += 1
+                if lineno:
+                    line = lineno
+                    count += 1
+                    if count > checkpoint:
+                        checkpoint = interp.checkpoint(count, lineno)
+
+                if op == STORE:
+                    value = b(values)
+                    kind = value.__class__
+                    if kind is int:
+                        if value.bit_length() > integer_bits_ceiling:
+                            raise value_too_large(value, limits, line)
+                    elif kind is str:
+                        if len(value) > string_ceiling:
+                            raise value_too_large(value, limits, line)
+                    if values[a] is MISSING:
+                        assigned.append(a)
+                    values[a] = value
+
+                elif op == BRANCH_FALSE:
+                    if not a(values):
+                        pc = b
+
+                elif op == FOR_NEXT:
+                    loop_id, slot = a
+                    state = loops[loop_id]
+                    val = state[0] + state[2]
+                    if (val <= state[1]) if state[2] > 0 else (val >= state[1]):
+                        state[0] = val
+                        values[slot] = val
+                        pc = b
+
+                elif op == JUMP:
+                    pc = b
+
+                elif op == STORE_ITEM:
+                    name, index, expr = b
+                    array = values[a]
+                    if array.__class__ is not PseudoArray:
+                        raise not_an_array(name)
+                    i = index(values)
+                    value = expr(values)
+                    kind = value.__class__
+                    if kind is int:
+                        if value.bit_length() > integer_bits_ceiling:
+                            raise value_too_large(value, limits, line)
+                    elif kind is str:
+                        if len(value) > string_ceiling:
+                            raise value_too_large(value, limits, line)
+                    array.set(i, value)
+
+                elif op == WRITE:
+                    text = " ".join([str(arg(values)) for arg in a])
+                    count_output(text, line)
+                    output.append(text)
+
+                elif op == NOP:
+                    pass
+
+                elif op == FOR_INIT:
+                    loop_id, slot, start, stop, step = a
+                    start_val = int(start(values))
+                    end_val = int(stop(values))
+                    if step is None:
+                        step = -1 if start_val > end_val else 1
+                    if (start_val <= end_val) if step > 0 else (start_val >= end_val):
+                        loops[loop_id] = [start_val, end_val, step]
+                        if values[slot] is MISSING:
+                            assigned.append(slot)
+                        values[slot] = start_val
+                    else:
+                        pc = b
+
+                elif op == READ:
+                    value = interp.read_input(b)
+                    if values[a] is MISSING:
+                        assigned.append(a)
+                    values[a] = value
+
+                elif op == READ_ITEM:
+                    name, index = b
+                    array = values[a]
+                    if array.__class__ is not PseudoArray:
+                        raise not_an_array(name)
+                    i = array.check(index(values))
+                    array.set(i, interp.read_input(f"{name}[{i}]", array.element_type))
+
+                elif op == DECLARE_ARRAY:
+                    for slot, name, low, high in b:
+                        array = new_array(name, a, low(values), high(values), limits)
+                        variable_types[name] = array.type_name
+                        if values[slot] is MISSING:
+                            assigned.append(slot)
+                        values[slot] = array
+
+                elif op == DECLARE:
+                    for slot, name, init in b:
+                        variable_types[name] = a
+                        if init is not None:
+                            value = init(values)
+                            check_value(value, limits, line)
+                        else:
+                            value = interp.default_value(a)
+                        if values[slot] is MISSING:
+                            assigned.append(slot)
+                        values[slot] = value
+
+                elif op == TEMP:
+                    values[a] = b(values)
+
+                elif op == FORGET:
+                    for slot in a:
+                        values[slot] = MISSING
+
+                elif op == CALL:
+                    target, args = a
+                    arguments = [arg(values) for arg in args]
+                    target.function.check_call(len(arguments), b is not None, line)
+                    if len(frames) >= max_depth:
+                        raise call_depth_exceeded(limits, line)
+                    frames.append((pc, values, loops, assigned, variable_types, b, line, hits))
+                    values = arguments + [MISSING] * (target.size - len(arguments))
+                    loops = [None] * target.loop_count
+                    assigned = []
+                    variable_types = interp.variable_types = target.types.copy()
+                    hits = target.hits
+                    if hits is not None:
+                        values[hits] = 0
+                    pc = target.entry
+
+                elif op == RETURN:
+                    if not frames:
+                        # Fin du programme principal
+                        break
+                    result = a(values) if a is not None else None
+                    if hits is not None:
+                        elided += values[hits]
+                    pc, values, loops, assigned, variable_types, slot, line, hits = frames.pop()
+                    interp.variable_types = variable_types
+                    if slot is not None:
+                        values[slot] = result
+
+                elif op == FAIL:
+                    raise PseudoCodeError(a, b)
+
+        except InputRequired as e:
+            # LIRE sera exécutée de nouveau à la reprise: elle ne compte qu'une fois
+            count -= 1
+            e.line = line
+            e.state = (pc - 1, values, loops, frames, variable_types, hits)
+            if frames and e.var_type is None:
+                e.var_type = variable_types.get(e.name)
+            raise
+        except PseudoCodeError as e:
+            # Les erreurs d'expression sont levées sans ligne: la ligne courante s'applique
+            if e.line is None:
+                raise e.with_line(line) from None
+            raise
+        finally:
+            interp.iteration_count = count
+            interp.current_line = line
+            # Calculs évités des cadres encore ouverts, remis à zéro pour une reprise
+            for frame_values, frame_hits in [(values, hits)] + [(frame[1], frame[7]) for frame in frames]:
+                if frame_hits is not None:
+                    elided += frame_values[frame_hits]
+                    frame_values[frame_hits] = 0
+            interp.elided_evaluations += elided
+            if frames:
+                # Arrêt dans un sous-programme: seules les variables du programme principal restent visibles
+                _, values, _, assigned, variable_types, _, _, _ = frames[0]
+                interp.variable_types = variable_types
+            variables = interp.variables
+            for slot in assigned:
+                variables[names[slot]] = values[slot]
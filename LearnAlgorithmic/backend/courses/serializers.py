@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import *
+from .pseudo_snapshots import materialize
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -41,6 +42,15 @@ class SimulationSerializer(serializers.ModelSerializer):
         model = Simulation
         fields = ['id', 'title', 'description', 'algorithm_code', 'order', 'steps']
 
+    def to_representation(self, instance):
+        # Les étapes générées ne stockent que les variables modifiées (pseudo_snapshots):
+        # le lecteur reçoit l'état complet des variables à chaque étape
+        data = super().to_representation(instance)
+        states = materialize(step['state_data'] for step in data.get('steps', []))
+        for step, variables in zip(data.get('steps', []), states):
+            step['state_data'] = variables
+        return data
+
 
 class ConceptSerializer(serializers.ModelSerializer):
     class Meta:
@@ -223,6 +233,33 @@ class ModuleSerializer(serializers.ModelSerializer):
         return obj.lessons.count()
 
 
+class LessonSummarySerializer(serializers.ModelSerializer):
+    """Leçon dans la liste d'un module, sans son contenu"""
+    class Meta:
+        model = Lesson
+        fields = ['id', 'title', 'order']
+
+
+class LessonListSerializer(serializers.ModelSerializer):
+    """Leçon dans la liste des leçons d'un module (contenu servi par LessonViewSet.retrieve)"""
+    class Meta:
+        model = Lesson
+        fields = ['id', 'module', 'title', 'description', 'order']
+
+
+class ModuleListSerializer(serializers.ModelSerializer):
+    """Module du catalogue: leçons résumées, sans concepts, exemples ni simulations"""
+    lessons = LessonSummarySerializer(many=True, read_only=True)
+    lessons_count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Module
+        fields = ['id', 'title', 'description', 'order', 'lessons', 'lessons_count']
+
+    def get_lessons_count(self, obj):
+        return obj.lessons.count()
+
+
 class LessonProgressSerializer(serializers.ModelSerializer):
     lesson_title = serializers.CharField(source='lesson.title', read_only=True)
     
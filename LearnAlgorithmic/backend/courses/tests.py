@@ -0,0 +1,280 @@
+import json
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+
+from .management.commands.check_query_counts import grow_catalogue
+from .management.commands.compare_interpreters import compare_engines
+from .models import Concept, Lesson, Module, Quiz, QuizChoice, QuizQuestion, Simulation, SimulationStep
+from .pseudo_analysis import TOO_DEEP, analyze_code
+from .pseudo_interpreter import PseudoInterpreter
+from .pseudo_snapshots import KEYFRAME_INTERVAL, materialize, reconstruct
+from .pseudo_tracer import TracingInterpreter, trace_to_steps
+from .serializers import SimulationSerializer
+from .views import LessonViewSet, ModuleViewSet
+
+
+# Imbrications qui épuisent la pile de l'analyseur récursif
+DEEP_PARENTHESES = "x ← " + "(" * 5000 + "1" + ")" * 5000
+DEEP_BLOCKS = "x ← 1\n" + "SI x > 0 ALORS\n" * 3000 + "ECRIRE(x)\n" + "FINSI\n" * 3000
+
+
+class DeepNestingTests(TestCase):
+    """Code trop imbriqué: diagnostic de syntaxe, jamais d'exception"""
+
+    def test_analyze_code(self):
+        for code in (DEEP_PARENTHESES, DEEP_BLOCKS):
+            diagnostics = analyze_code(code)
+            self.assertEqual(len(diagnostics), 1)
+            self.assertEqual(diagnostics[0]['kind'], 'syntax')
+            self.assertEqual(diagnostics[0]['severity'], 'error')
+
+    def test_execute(self):
+        for backend in ('tree', 'vm'):
+            for code in (DEEP_PARENTHESES, DEEP_BLOCKS):
+                interpreter = PseudoInterpreter(backend=backend)
+                success, output, error = interpreter.execute(code)
+                self.assertFalse(success)
+                self.assertEqual(error, TOO_DEEP)
+                self.assertEqual([d['kind'] for d in interpreter.diagnostics], ['syntax'])
+
+    @override_settings(PSEUDO_SANDBOX={'ENABLED': False})
+    def test_execute_view(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='apprenant', password=None))
+        for code in (DEEP_PARENTHESES, DEEP_BLOCKS):
+            response = client.post(reverse('execute-interpreter'), {'code': code}, format='json')
+            self.assertEqual(response.status_code, 200)
+            self.assertFalse(response.data['success'])
+            self.assertEqual([d['kind'] for d in response.data['warnings']], ['syntax'])
+
+    @override_settings(PSEUDO_SANDBOX={'ENABLED': False})
+    def test_warnings_from_compilation(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='apprenant', password=None))
+        response = client.post(reverse('execute-interpreter'), {'code': "x ← 1\nECRIRE(x)"}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['success'])
+        self.assertEqual([d['kind'] for d in response.data['warnings']], ['undeclared'])
+
+
+# Tableaux, fonctions récursives et procédures, chaînes, boucles et erreurs d'exécution
+DIFFERENTIAL_PROGRAMS = [
+    """t: TABLEAU[1..5] DE ENTIER
+PROCEDURE remplir(t: TABLEAU DE ENTIER, n: ENTIER)
+   POUR i DE 1 A n FAIRE
+      t[i] ← i * i
+   FINPOUR
+FIN
+FONCTION somme(t: TABLEAU DE ENTIER, n: ENTIER): ENTIER
+   SI n = 0 ALORS
+      RETOURNER 0
+   FINSI
+   RETOURNER t[n] + somme(t, n - 1)
+FIN
+remplir(t, 5)
+ECRIRE(somme(t, 5), t[6])""",
+    """FONCTION fact(n: ENTIER): ENTIER
+   SI n <= 1 ALORS
+      RETOURNER 1
+   FINSI
+   RETOURNER n * fact(n - 1)
+FIN
+entier n
+LIRE(n)
+ECRIRE(fact(n), 10 DIV n, 10 MOD n, 7 / n)""",
+    """s ← "ab"
+POUR i DE 10 A 1 PAS -3 FAIRE
+   s ← s + "c"
+FINPOUR
+n ← 0
+REPETER
+   n ← n + 1
+JUSQU'A n >= 3 OU n * n > 5
+ECRIRE(s, LONGUEUR(s), n)
+m ← n / 0""",
+    """i ← 1
+TANT QUE i <= 5 FAIRE
+   SI i = 3 ALORS
+      ECRIRE("trois")
+   SINON
+      ECRIRE(i * 2.5)
+   FINSI
+   i ← i + 1
+FINTANTQUE
+ECRIRE(i = 6 ET VRAI, NON (i < 2))""",
+]
+
+
+class InterpreterDifferentialTests(SimpleTestCase):
+    """Les moteurs 'tree', 'vm' et 'python' donnent les mêmes résultats"""
+
+    def assertSameResults(self, code, inputs_list):
+        differences = compare_engines(code, inputs_list, trusted=True)
+        self.assertEqual(differences, [], f"Moteurs en désaccord pour:\n{code}")
+
+    def test_programs(self):
+        for code in DIFFERENTIAL_PROGRAMS:
+            with self.subTest(code=code):
+                self.assertSameResults(code, [[], ['5'], ['0']])
+
+    def test_seed_content(self):
+        """Solutions, exemples et simulations du contenu initial (data_backup.json)"""
+        with open(settings.BASE_DIR / 'data_backup.json', encoding='utf-8') as f:
+            objects = json.load(f)
+        for obj in objects:
+            fields = obj['fields']
+            if obj['model'] == 'courses.exercise' and fields.get('solution_code'):
+                tests = fields['test_cases'].get('execution_tests', []) \
+                    if isinstance(fields['test_cases'], dict) else []
+                code, inputs_list = fields['solution_code'], [test.get('inputs', []) for test in tests] or [[]]
+            elif obj['model'] == 'courses.example':
+                code, inputs_list = fields['code'], [[], ['5', '3', '7']]
+            elif obj['model'] == 'courses.simulation':
+                code, inputs_list = fields['algorithm_code'], [[], ['4', '9']]
+            else:
+                continue
+            with self.subTest(model=obj['model'], pk=obj['pk']):
+                self.assertSameResults(code, [[str(value) for value in inputs] for inputs in inputs_list])
+
+
+# Sans le cache des réponses, la version du contenu dans un cache local (sans requête)
+@override_settings(
+    CACHES=dict(settings.CACHES, **{'query-count': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'query-count',
+    }}),
+    COURSE_CONTENT_CACHE={'ENABLED': False, 'ALIAS': 'query-count'},
+)
+class QueryCountTestCase(TestCase):
+    """Catalogue d'un module et d'une leçon complète, apprenant qui a débloqué le module"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='apprenant', password=None)
+        grow_catalogue(cls.user, modules=1, lessons=1)
+
+    def get(self, view, path, user=None, etag=None, **kwargs):
+        factory = APIRequestFactory()
+        request = factory.get(path, HTTP_IF_NONE_MATCH=etag) if etag else factory.get(path)
+        force_authenticate(request, user=user or self.user)
+        return view(request, **kwargs)
+
+    def assertQueries(self, count, count_304, view, path, user=None, **kwargs):
+        """Réponse complète en `count` requêtes, réponse 304 au client à jour en `count_304`"""
+        with self.assertNumQueries(count):
+            response = self.get(view, path, user, **kwargs)
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(count_304):
+            response = self.get(view, path, user, etag=response['ETag'], **kwargs)
+        self.assertEqual(response.status_code, 304)
+
+
+class ModuleListQueryCountTests(QueryCountTestCase):
+    """/api/modules/: six requêtes quel que soit le nombre de modules et de leçons"""
+
+    def assertModuleListQueries(self):
+        self.assertQueries(6, 3, ModuleViewSet.as_view({'get': 'list'}), '/api/modules/')
+
+    def test_constant(self):
+        self.assertModuleListQueries()
+        grow_catalogue(self.user, modules=3, lessons=5)
+        self.assertEqual(Module.objects.count(), 4)
+        self.assertModuleListQueries()
+
+
+class LessonDetailQueryCountTests(QueryCountTestCase):
+    """/api/lessons/{id}/: une requête par relation imbriquée, quel que soit le nombre d'objets"""
+
+    def assertLessonQueries(self, lesson, count, count_304, user=None):
+        self.assertQueries(count, count_304, LessonViewSet.as_view({'get': 'retrieve'}),
+                           f'/api/lessons/{lesson.id}/', user, pk=lesson.id)
+
+    def test_constant(self):
+        lesson = Lesson.objects.get()
+        self.assertLessonQueries(lesson, 12, 4)
+
+        # Davantage de concepts, d'étapes, de quiz, de questions et de choix dans la même leçon
+        Concept.objects.create(lesson=lesson, title="Concept", definition="", syntax="", order=2)
+        SimulationStep.objects.create(simulation=lesson.simulations.get(), step_number=3, description="",
+                                      state_data={}, visual_data={})
+        quiz = Quiz.objects.create(lesson=lesson, title="Quiz 3", order=3)
+        for question_order in range(1, 6):
+            question = QuizQuestion.objects.create(quiz=quiz, question_text="Question", question_type='multiple',
+                                                   order=question_order, explanation="")
+            for choice_order in range(1, 5):
+                QuizChoice.objects.create(question=question, choice_text="Choix", is_correct=choice_order < 3,
+                                          order=choice_order)
+        grow_catalogue(self.user, modules=2, lessons=3)
+        self.assertLessonQueries(lesson, 12, 4)
+
+    def test_empty_relations(self):
+        """Les relations imbriquées d'une relation vide (étapes, questions, choix) ne sont pas chargées"""
+        lesson = Lesson.objects.create(module=Module.objects.get(), title="Leçon vide", description="", order=2)
+        self.assertLessonQueries(lesson, 9, 4)
+
+    def test_staff(self):
+        """Sans vérification de la progression du module"""
+        staff = User.objects.create_user(username='equipe', password=None, is_staff=True)
+        self.assertLessonQueries(Lesson.objects.get(), 11, 3, user=staff)
+
+
+SIMULATION_CODE = """s ← 0
+POUR i DE 1 A 20 FAIRE
+   s ← s + i
+FINPOUR
+ECRIRE(s)"""
+
+
+class SimulationStatesTests(TestCase):
+    """États complets reconstruits à partir des étapes encodées par différences"""
+
+    @classmethod
+    def setUpTestData(cls):
+        module = Module.objects.create(title="Module", description="", order=1)
+        lesson = Lesson.objects.create(module=module, title="Leçon", description="", order=1)
+        cls.simulation = Simulation.objects.create(lesson=lesson, title="Somme", description="",
+                                                   algorithm_code=SIMULATION_CODE, order=1)
+        interpreter = TracingInterpreter()
+        interpreter.execute(SIMULATION_CODE)
+        cls.trace = interpreter.trace
+        cls.steps = trace_to_steps(cls.trace)
+        SimulationStep.objects.bulk_create([SimulationStep(simulation=cls.simulation, **step) for step in cls.steps])
+
+        # États attendus, calculés sans pseudo_snapshots: variables modifiées cumulées
+        cls.expected = []
+        variables = {}
+        for step in cls.trace:
+            variables.update(step.get('changes', {}))
+            cls.expected.append(dict(variables))
+
+    def test_reconstruct(self):
+        states = [step['state_data'] for step in self.steps]
+        self.assertGreater(len(states), 2 * KEYFRAME_INTERVAL)
+        self.assertEqual(materialize(states), self.expected)
+        for index in range(len(states)):
+            self.assertEqual(reconstruct(states, index), self.expected[index])
+
+    def test_state_at(self):
+        # Image clé, étape qui la suit, milieu d'un intervalle, dernière étape
+        for step_number in (KEYFRAME_INTERVAL + 1, KEYFRAME_INTERVAL + 2, KEYFRAME_INTERVAL + 9, len(self.steps)):
+            with self.subTest(step_number=step_number):
+                state = self.simulation.state_at(step_number)
+                self.assertEqual(state['variables'], self.expected[step_number - 1])
+                self.assertEqual(state['current_line'], self.trace[step_number - 1]['line'])
+
+    def test_hand_written_step(self):
+        """Une étape écrite à la main est un état complet, y compris après des étapes générées"""
+        number = len(self.steps) + 1
+        SimulationStep.objects.create(simulation=self.simulation, step_number=number, description="",
+                                      state_data={'s': 0, 'fin': True}, visual_data={})
+        self.assertEqual(self.simulation.state_at(number)['variables'], {'s': 0, 'fin': True})
+
+    def test_serializer_sends_full_states(self):
+        """Le lecteur affiche chaque clé de state_data comme une variable"""
+        steps = SimulationSerializer(self.simulation).data['steps']
+        self.assertEqual([step['state_data'] for step in steps], self.expected)
+        self.assertEqual([step['visual_data']['code_line'] for step in steps],
+                         [step['line'] for step in self.trace])
@@ -15,6 +15,7 @@ from .admin_views import (
     all_lessons_list,
     users_stats_list,
     user_detailed_stats,
+    interpreter_cache_stats,
 )
 
 router = DefaultRouter()
@@ -43,8 +44,15 @@ urlpatterns = [
     # Modules
     path('modules/<int:module_id>/mark-complete/', mark_module_complete, name='mark-module-complete'),
 
+    # Simulations
+    path('simulations/<int:simulation_id>/steps/<int:step_number>/state/', simulation_state,
+         name='simulation-state'),
+
     # Interpréteur de pseudo-code
     path('interpreter/execute/', execute_interpreter, name='execute-interpreter'),
+    path('interpreter/execute/stream/', execute_interpreter_stream, name='execute-interpreter-stream'),
+    path('interpreter/sessions/', interpreter_session_start, name='interpreter-session-start'),
+    path('interpreter/sessions/<str:session_id>/', interpreter_session_input, name='interpreter-session-input'),
 
     # Dashboard et progression
     path('dashboard/stats/', dashboard_stats, name='dashboard-stats'),
@@ -65,4 +73,5 @@ urlpatterns = [
     path('admin/stats/', admin_stats, name='admin-stats'),
     path('admin/users/stats/', users_stats_list, name='admin-users-stats'),
     path('admin/users/<int:user_id>/stats/', user_detailed_stats, name='admin-user-detailed-stats'),
+    path('admin/interpreter/cache/', interpreter_cache_stats, name='admin-interpreter-cache'),
 ]
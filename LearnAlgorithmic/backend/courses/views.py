@@ -1,21 +1,26 @@
 from rest_framework import viewsets, status, generics
-from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.decorators import action, api_view, permission_classes, renderer_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.core.mail import send_mail
 from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.utils.http import urlsafe_base64_encode, urlsafe_base64_decode
 from django.utils.encoding import force_bytes, force_str
-from django.db.models import Avg, Count, Q
+from django.db.models import Avg, Count, Prefetch, Q, prefetch_related_objects
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
 from datetime import timedelta
 import logging
 from .models import *
 from .serializers import *
+from .content_cache import cached_payload, content_etag
+from .pseudo_sandbox import SandboxBusy
 
 logger = logging.getLogger(__name__)
 
@@ -243,34 +248,78 @@ def password_reset_confirm(request):
     })
 
 
+def user_progress_map(user):
+    """Progression de l'utilisateur par module: {module_id: UserProgress}, en une requête"""
+    return {progress.module_id: progress for progress in UserProgress.objects.filter(user=user)}
+
+
+def completed_lesson_ids(user):
+    """Identifiants des leçons complétées par l'utilisateur, en une requête"""
+    return set(LessonProgress.objects.filter(
+        user=user,
+        is_completed=True
+    ).values_list('lesson_id', flat=True))
+
+
+def conditional(request, etag, build):
+    """
+    Réponse 304 si l'en-tête If-None-Match du client contient `etag` (la
+    réponse n'est alors pas construite), sinon `build()` avec son ETag.
+    La réponse dépend de l'utilisateur: les caches partagés ne la gardent
+    pas et le navigateur la revalide à chaque visite.
+    """
+    response = get_conditional_response(request, etag=etag) or build()
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
 class ModuleViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet pour les modules"""
     queryset = Module.objects.all()
-    serializer_class = ModuleSerializer
+    serializer_class = ModuleListSerializer
     permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            # Une seule requête pour les leçons, quel que soit le nombre de modules
+            queryset = queryset.prefetch_related('lessons')
+        return queryset
     
     def list(self, request, *args, **kwargs):
         """Liste les modules avec l'état de progression de l'utilisateur"""
-        modules = self.get_queryset().order_by('order')
-        
-        # Récupérer ou créer la progression utilisateur
-        user_progress_qs = UserProgress.objects.filter(user=request.user)
+        # Progression de l'utilisateur par module (une seule requête)
+        progress_by_module = user_progress_map(request.user)
         
         # Si aucune progression, créer pour le premier module
-        if not user_progress_qs.exists():
+        if not progress_by_module:
             first_module = Module.objects.filter(order=1).first()
             if first_module:
-                UserProgress.objects.create(
+                progress = UserProgress.objects.create(
                     user=request.user,
                     module=first_module,
                     is_unlocked=True
                 )
-                user_progress_qs = UserProgress.objects.filter(user=request.user)
+                progress_by_module[first_module.id] = progress
+        
+        return conditional(request, content_etag(request.user, 'modules'),
+                           lambda: self.build_list(request, progress_by_module))
+    
+    def build_list(self, request, progress_by_module):
+        """Catalogue (en cache) complété par la progression de l'utilisateur"""
+        # Catalogue commun à tous les utilisateurs, en cache jusqu'à la prochaine modification du contenu
+        modules_payload = cached_payload(
+            'modules',
+            lambda: self.get_serializer(self.get_queryset().order_by('order'), many=True).data
+        )
+        completed_lessons_ids = completed_lesson_ids(request.user)
         
         modules_data = []
-        for module in modules:
-            module_serializer = self.get_serializer(module)
-            module_dict = module_serializer.data
+        for cached_module in modules_payload:
+            # Copie: la progression ne doit pas entrer dans la réponse en cache
+            module_dict = dict(cached_module)
             
             # Si l'utilisateur est admin/staff, tout est débloqué
             if request.user.is_staff or request.user.is_superuser:
@@ -279,7 +328,7 @@ class ModuleViewSet(viewsets.ReadOnlyModelViewSet):
                 completion_date = None
             else:
                 # Utilisateur normal
-                progress = user_progress_qs.filter(module=module).first()
+                progress = progress_by_module.get(module_dict['id'])
                 if progress:
                     is_unlocked = progress.is_unlocked
                     is_completed = progress.is_completed
@@ -293,19 +342,10 @@ class ModuleViewSet(viewsets.ReadOnlyModelViewSet):
             module_dict['is_completed'] = is_completed
             module_dict['completion_date'] = completion_date
             
-            # Calculer la progression des leçons
-            lessons = module.lessons.all()
-            total_lessons = lessons.count()
-            completed_lessons = 0
-            
-            for lesson in lessons:
-                lesson_progress = LessonProgress.objects.filter(
-                    user=request.user,
-                    lesson=lesson,
-                    is_completed=True
-                ).first()
-                if lesson_progress:
-                    completed_lessons += 1
+            # Calculer la progression des leçons (leçons résumées dans le catalogue)
+            lessons = module_dict['lessons']
+            total_lessons = len(lessons)
+            completed_lessons = sum(1 for lesson in lessons if lesson['id'] in completed_lessons_ids)
             
             module_dict['lessons_count'] = total_lessons  # Ajouté pour AdminDashboard
             module_dict['lessons_progress'] = {
@@ -336,17 +376,31 @@ class ModuleViewSet(viewsets.ReadOnlyModelViewSet):
                     'error': 'Ce module n\'est pas encore débloqué'
                 }, status=status.HTTP_403_FORBIDDEN)
         
-        lessons = module.lessons.all().order_by('order')
+        return conditional(request, content_etag(request.user, f'module-lessons:{module.id}'),
+                           lambda: self.build_lessons(request, module))
+    
+    def build_lessons(self, request, module):
+        """Leçons du module (en cache) complétées par la progression de l'utilisateur"""
+        # Progression de l'utilisateur par leçon du module (une seule requête)
+        progress_by_lesson = {
+            progress.lesson_id: progress
+            for progress in LessonProgress.objects.filter(
+                user=request.user,
+                lesson__module=module
+            ).select_related('lesson')
+        }
+        
+        lessons_payload = cached_payload(
+            f'module-lessons:{module.id}',
+            lambda: LessonListSerializer(module.lessons.all().order_by('order'), many=True).data
+        )
         lessons_data = []
         
-        for lesson in lessons:
-            lesson_dict = LessonSerializer(lesson).data
+        for cached_lesson in lessons_payload:
+            lesson_dict = dict(cached_lesson)
             
             # Ajouter la progression de la leçon
-            lesson_progress = LessonProgress.objects.filter(
-                user=request.user,
-                lesson=lesson
-            ).first()
+            lesson_progress = progress_by_lesson.get(lesson_dict['id'])
             
             if lesson_progress:
                 lesson_dict['progress'] = LessonProgressSerializer(lesson_progress).data
@@ -358,6 +412,23 @@ class ModuleViewSet(viewsets.ReadOnlyModelViewSet):
         return Response(lessons_data)
 
 
+def lesson_detail_prefetches():
+    """
+    Plan de chargement du détail d'une leçon: une requête par relation
+    imbriquée, dans l'ordre (Meta.ordering) de chaque modèle
+    """
+    return [
+        Prefetch('concepts', queryset=Concept.objects.all()),
+        Prefetch('examples', queryset=Example.objects.all()),
+        Prefetch('simulations', queryset=Simulation.objects.all()),
+        Prefetch('simulations__steps', queryset=SimulationStep.objects.all()),
+        Prefetch('quizzes', queryset=Quiz.objects.all()),
+        Prefetch('quizzes__questions', queryset=QuizQuestion.objects.all()),
+        Prefetch('quizzes__questions__choices', queryset=QuizChoice.objects.all()),
+        Prefetch('exercises', queryset=Exercise.objects.all()),
+    ]
+
+
 class LessonViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet pour les leçons"""
     queryset = Lesson.objects.all()
@@ -373,7 +444,7 @@ class LessonViewSet(viewsets.ReadOnlyModelViewSet):
             # Vérifier si le module parent est débloqué pour utilisateur normal
             progress = UserProgress.objects.filter(
                 user=request.user,
-                module=lesson.module
+                module_id=lesson.module_id
             ).first()
             
             if not progress or not progress.is_unlocked:
@@ -381,8 +452,13 @@ class LessonViewSet(viewsets.ReadOnlyModelViewSet):
                     'error': 'Ce module n\'est pas encore débloqué'
                 }, status=status.HTTP_403_FORBIDDEN)
         
-        serializer = self.get_serializer(lesson)
-        return Response(serializer.data)
+        def serialize():
+            # Nombre de requêtes constant, quel que soit le nombre de quiz, questions et étapes
+            prefetch_related_objects([lesson], *lesson_detail_prefetches())
+            return self.get_serializer(lesson).data
+        
+        return conditional(request, content_etag(request.user, f'lesson:{lesson.id}'),
+                           lambda: Response(cached_payload(f'lesson:{lesson.id}', serialize)))
 
 
 @api_view(['POST'])
@@ -533,7 +609,11 @@ def submit_exercise(request):
     logger.info(f"[EXERCISE SUBMIT] Failed attempts so far: {failed_attempts}")
 
     # Validation du code avec indication du nombre de tentatives
-    is_correct, feedback, score = validate_exercise_code(code_submitted, exercise, failed_attempts)
+    try:
+        is_correct, feedback, score = validate_exercise_code(code_submitted, exercise, failed_attempts)
+    except SandboxBusy as e:
+        # Pool d'exécution saturé: rien n'est enregistré, l'apprenant peut resoumettre
+        return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
     # Enregistrer la soumission
     submission = ExerciseSubmission.objects.create(
@@ -713,6 +793,9 @@ def validate_exercise_code(code, exercise, failed_attempts=0):
     - Score >= 50% OU 3 tentatives: Afficher la correction
     """
     from .pseudo_interpreter import validate_pseudo_code, PseudoInterpreter
+    from .pseudo_cache import get_program_cache
+    from .pseudo_limits import get_execution_limits
+    from .pseudo_sandbox import get_sandbox_pool
     import re
 
     score = 0
@@ -834,6 +917,7 @@ def validate_exercise_code(code, exercise, failed_attempts=0):
                 keyword_errors.append("Structure algorithmique insuffisante (utilisez ALGORITHME, DEBUT, FIN, declarations, etc.)")
 
     score += keyword_score
+    sandbox = get_sandbox_pool()
 
     # ===== PARTIE 2: Execution du pseudo-code (75% du score max) =====
     execution_max = 75
@@ -841,29 +925,49 @@ def validate_exercise_code(code, exercise, failed_attempts=0):
     if execution_tests:
         # --- Cas 1: Tests d'execution definis dans test_cases ---
         try:
-            _, exec_score_percent, exec_feedback = validate_pseudo_code(code, execution_tests)
+            grading = settings.PSEUDO_GRADING
+            if sandbox is not None:
+                _, exec_score_percent, exec_feedback = sandbox.validate(
+                    code, execution_tests, limits=get_execution_limits('grading'),
+                    workers=grading['TEST_CASE_WORKERS'], stop_early=grading['STOP_EARLY']
+                )
+            else:
+                # Dans le processus web, les cas restent séquentiels (GIL)
+                _, exec_score_percent, exec_feedback = validate_pseudo_code(
+                    code, execution_tests, backend=settings.PSEUDO_INTERPRETER_BACKEND,
+                    cache=get_program_cache(), limits=get_execution_limits('grading'),
+                    stop_early=grading['STOP_EARLY']
+                )
             execution_score = int((exec_score_percent / 100) * execution_max)
             score += execution_score
 
             for f in exec_feedback:
                 if "ECHEC" in f.upper() or "attendu" in f.lower() or "incorrecte" in f.lower():
                     execution_errors.append(f)
+        except SandboxBusy:
+            raise
         except Exception as e:
             execution_errors.append(f"Erreur lors de l'execution: {str(e)}")
 
     elif keyword_score > 0:
         # --- Cas 2: Pas de tests definis - execution generique ---
         try:
-            interpreter = PseudoInterpreter()
             uses_lire = 'LIRE' in code_upper
 
             # Determiner les entrees de test
+            test_inputs = []
             if uses_lire:
                 lire_count = len(re.findall(r'LIRE\s*\(', code_upper))
                 test_inputs = ["10"] * lire_count
-                success, output, error = interpreter.execute(code, test_inputs)
+
+            if sandbox is not None:
+                success, output, error = sandbox.execute(code, test_inputs,
+                                                         limits=get_execution_limits('grading'))[:3]
             else:
-                success, output, error = interpreter.execute(code)
+                interpreter = PseudoInterpreter(backend=settings.PSEUDO_INTERPRETER_BACKEND,
+                                                cache=get_program_cache(),
+                                                limits=get_execution_limits('grading'))
+                success, output, error = interpreter.execute(code, test_inputs)
 
             if success:
                 expected_output = exercise.expected_output
@@ -902,6 +1006,8 @@ def validate_exercise_code(code, exercise, failed_attempts=0):
                     execution_errors.append(f"Erreur d'execution: {error}")
                 else:
                     execution_errors.append("Le code ne s'execute pas correctement")
+        except SandboxBusy:
+            raise
         except Exception as e:
             execution_errors.append(f"Erreur: {str(e)}")
     else:
@@ -1204,14 +1310,42 @@ def dashboard_stats(request):
     })
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def simulation_state(request, simulation_id, step_number):
+    """État complet des variables à une étape d'une simulation (étapes encodées par différences)"""
+    try:
+        simulation = Simulation.objects.get(id=simulation_id)
+    except Simulation.DoesNotExist:
+        return Response({'error': 'Simulation non trouvée'}, status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        state = simulation.state_at(step_number)
+    except SimulationStep.DoesNotExist:
+        return Response({'error': 'Étape non trouvée'}, status=status.HTTP_404_NOT_FOUND)
+
+    return Response({'simulation_id': simulation.id, **state})
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def execute_interpreter(request):
-    """Exécuter du pseudo-code via l'interpréteur"""
+    """
+    Exécuter du pseudo-code via l'interpréteur. Avec `profile: true`, la
+    réponse contient aussi le profil d'exécution (passages et temps par
+    ligne et par fonction prédéfinie). `warnings` liste les diagnostics de
+    l'analyse statique (boucles sans fin, variables non déclarées), calculés
+    à la compilation, dans le processus qui exécute le code.
+    """
     from .pseudo_interpreter import PseudoInterpreter
+    from .pseudo_cache import get_program_cache
+    from .pseudo_limits import get_execution_limits
+    from .pseudo_profiler import ProfilingInterpreter
+    from .pseudo_sandbox import SandboxBusy, SandboxError, get_sandbox_pool
 
     code = request.data.get('code', '')
     inputs = request.data.get('inputs', [])
+    profile = bool(request.data.get('profile', False))
 
     if not code or not code.strip():
         return Response({
@@ -1222,24 +1356,52 @@ def execute_interpreter(request):
         }, status=status.HTTP_400_BAD_REQUEST)
 
     try:
-        interpreter = PseudoInterpreter()
-        success, output, error = interpreter.execute(code, inputs)
-
-        # Récupérer les variables après exécution
-        variables = {}
-        for name, value in interpreter.variables.items():
-            var_type = interpreter.variable_types.get(name, 'inconnu')
-            variables[name] = {
-                'value': str(value),
-                'type': var_type
-            }
-
-        return Response({
+        sandbox = get_sandbox_pool()
+        profile_data = None
+        if sandbox is not None:
+            try:
+                if profile:
+                    success, output, error, variables, diagnostics, profile_data = sandbox.profile(
+                        code, inputs, limits=get_execution_limits('execute'))
+                else:
+                    success, output, error, variables, diagnostics = sandbox.execute(
+                        code, inputs, limits=get_execution_limits('execute'))
+            except SandboxBusy as e:
+                return Response({
+                    'success': False,
+                    'output': '',
+                    'error': str(e),
+                    'variables': {}
+                }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            except SandboxError as e:
+                # Délai dépassé ou processus arrêté: erreur d'exécution du programme
+                success, output, error, variables, diagnostics = False, '', str(e), {}, []
+        elif profile:
+            interpreter = ProfilingInterpreter(backend=settings.PSEUDO_INTERPRETER_BACKEND,
+                                               limits=get_execution_limits('execute'))
+            success, output, error = interpreter.execute(code, inputs)
+            variables = interpreter.describe_variables()
+            diagnostics = interpreter.diagnostics
+            profile_data = interpreter.profile_data()
+        else:
+            interpreter = PseudoInterpreter(backend=settings.PSEUDO_INTERPRETER_BACKEND,
+                                            cache=get_program_cache(),
+                                            limits=get_execution_limits('execute'))
+            success, output, error = interpreter.execute(code, inputs)
+            # Récupérer les variables après exécution
+            variables = interpreter.describe_variables()
+            diagnostics = interpreter.diagnostics
+
+        data = {
             'success': success,
             'output': output or '',
             'error': error or '',
-            'variables': variables
-        })
+            'variables': variables,
+            'warnings': diagnostics,
+        }
+        if profile:
+            data['profile'] = profile_data
+        return Response(data)
     except Exception as e:
         return Response({
             'success': False,
@@ -1249,6 +1411,191 @@ def execute_interpreter(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _run_interactive_step(code, inputs, data=None):
+    """Étape d'une session interactive, dans le pool isolé s'il est activé"""
+    from .pseudo_cache import get_program_cache
+    from .pseudo_limits import get_execution_limits
+    from .pseudo_sandbox import SandboxError, get_sandbox_pool
+    from .pseudo_session import get_session_store, run_session_step
+
+    limits = get_execution_limits('execute')
+    max_state_bytes = get_session_store().max_state_bytes
+    sandbox = get_sandbox_pool()
+    if sandbox is None:
+        return run_session_step(code, inputs, data, cache=get_program_cache(), limits=limits,
+                                max_state_bytes=max_state_bytes)
+    try:
+        return sandbox.session_step(code, inputs, data, limits=limits, max_state_bytes=max_state_bytes)
+    except SandboxBusy:
+        raise
+    except SandboxError as e:
+        return {'status': 'done', 'success': False, 'output': '', 'error': str(e), 'variables': {}}, None
+
+
+def _interactive_response(request, result, state, session_id=None):
+    """Conserve l'état d'une session suspendue sur LIRE (ou la supprime) et répond"""
+    from .pseudo_session import get_session_store
+
+    store = get_session_store()
+    if state is not None:
+        if session_id is None:
+            session_id = store.create(request.user.id, state)
+        else:
+            store.save(session_id, request.user.id, state)
+        result['session_id'] = session_id
+    elif session_id is not None:
+        store.delete(session_id, request.user.id)
+    if result['status'] == 'expired':
+        return Response(result, status=status.HTTP_410_GONE)
+    return Response(result)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def interpreter_session_start(request):
+    """
+    Exécuter du pseudo-code de façon interactive: l'exécution s'arrête au
+    premier LIRE sans valeur (status 'input', avec session_id et la
+    variable attendue) au lieu d'inventer une valeur par défaut.
+    """
+    code = request.data.get('code', '')
+    inputs = request.data.get('inputs', [])
+
+    if not code or not code.strip():
+        return Response({
+            'status': 'done',
+            'success': False,
+            'output': '',
+            'error': 'Le code est vide.',
+            'variables': {}
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        result, state = _run_interactive_step(code, [str(value) for value in inputs])
+    except SandboxBusy as e:
+        return Response({
+            'status': 'done',
+            'success': False,
+            'output': '',
+            'error': str(e),
+            'variables': {}
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return _interactive_response(request, result, state)
+
+
+@api_view(['POST', 'DELETE'])
+@permission_classes([IsAuthenticated])
+def interpreter_session_input(request, session_id):
+    """Reprendre une session interactive avec la valeur lue (POST), ou l'abandonner (DELETE)"""
+    from .pseudo_session import SessionExpired, get_session_store
+
+    store = get_session_store()
+    if request.method == 'DELETE':
+        store.delete(session_id, request.user.id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    if 'value' not in request.data:
+        return Response({'error': 'value requis'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        data = store.load(session_id, request.user.id)
+    except SessionExpired as e:
+        return Response({
+            'status': 'expired',
+            'output': '',
+            'error': str(e),
+            'variables': {}
+        }, status=status.HTTP_410_GONE)
+
+    try:
+        result, state = _run_interactive_step(None, [str(request.data['value'])], data)
+    except SandboxBusy as e:
+        # La session reste disponible: la valeur pourra être renvoyée
+        return Response({
+            'status': 'input',
+            'output': '',
+            'error': str(e),
+            'variables': {}
+        }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return _interactive_response(request, result, state, session_id)
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Réponses au format server-sent events (erreurs: un seul événement 'done')"""
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        from .pseudo_stream import sse_event
+        return sse_event('done', data or {}).encode(self.charset)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+@renderer_classes([JSONRenderer, EventStreamRenderer])
+def execute_interpreter_stream(request):
+    """
+    Exécuter du pseudo-code en recevant la sortie au fil de l'eau
+    (server-sent events): un événement 'output' ({lines: [...]}) par lot
+    de lignes écrites, puis un événement 'done' ({success, error,
+    variables, lines}). La sortie est bornée par les limites 'stream'.
+    """
+    from .pseudo_cache import get_program_cache
+    from .pseudo_limits import get_execution_limits
+    from .pseudo_sandbox import SandboxError, get_sandbox_pool
+    from .pseudo_stream import sse_event, stream_in_process
+
+    code = request.data.get('code', '')
+    inputs = request.data.get('inputs', [])
+
+    if not code or not code.strip():
+        return Response({
+            'success': False,
+            'error': 'Le code est vide.',
+            'variables': {}
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    limits = get_execution_limits('stream')
+    sandbox = get_sandbox_pool()
+    if sandbox is not None:
+        try:
+            messages = sandbox.stream(code, inputs, limits=limits,
+                                      timeout=settings.PSEUDO_SANDBOX.get('STREAM_TIMEOUT'))
+        except SandboxBusy as e:
+            return Response({
+                'success': False,
+                'error': str(e),
+                'variables': {}
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    else:
+        messages = stream_in_process(code, inputs, backend=settings.PSEUDO_INTERPRETER_BACKEND,
+                                     cache=get_program_cache(), limits=limits)
+
+    def events():
+        lines = 0
+        try:
+            for kind, payload in messages:
+                if kind == 'lines':
+                    lines += len(payload)
+                    yield sse_event('output', {'lines': payload})
+                else:
+                    success, error, variables = payload
+                    yield sse_event('done', {'success': success, 'error': error or '',
+                                             'variables': variables, 'lines': lines})
+        except SandboxError as e:
+            # Délai dépassé ou processus arrêté: erreur d'exécution du programme
+            yield sse_event('done', {'success': False, 'error': str(e), 'variables': {}, 'lines': lines})
+        finally:
+            messages.close()
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream; charset=utf-8')
+    response['Cache-Control'] = 'no-cache'
+    # Pas de mise en tampon par un proxy nginx
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def user_progress_view(request):
@@ -1275,7 +1622,7 @@ def user_progress_view(request):
             })
         
         modules_progress.append({
-            'module': ModuleSerializer(module).data,
+            'module': ModuleListSerializer(module).data,
             'is_unlocked': progress.is_unlocked if progress else False,
             'is_completed': progress.is_completed if progress else False,
             'completion_date': progress.completion_date if progress else None,
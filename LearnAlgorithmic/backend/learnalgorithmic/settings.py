@@ -169,6 +169,120 @@ EMAIL_HOST_USER = os.environ.get('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.environ.get('EMAIL_HOST_PASSWORD', '')
 DEFAULT_FROM_EMAIL = os.environ.get('EMAIL_HOST_USER', 'noreply@learnalgorithmic.com')
 
+# Caches
+# 'course_content' : réponses du contenu des cours et leur version (voir courses/content_cache.py).
+# Partagé par les workers en production : fichiers si COURSE_CONTENT_CACHE_DIR est défini, sinon
+# base de données (table créée par `createcachetable` dans build.sh). Mémoire locale en développement.
+if os.environ.get('COURSE_CONTENT_CACHE_DIR'):
+    COURSE_CONTENT_CACHE_BACKEND = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['COURSE_CONTENT_CACHE_DIR'],
+    }
+elif DATABASE_URL:
+    COURSE_CONTENT_CACHE_BACKEND = {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'course_content_cache',
+    }
+else:
+    COURSE_CONTENT_CACHE_BACKEND = {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'course-content',
+    }
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'course_content': COURSE_CONTENT_CACHE_BACKEND,
+}
+
+# ENABLED : mise en cache des réponses; TIMEOUT : durée de vie d'une réponse (secondes),
+# les réponses d'une version remplacée ne sont plus lues.
+COURSE_CONTENT_CACHE = {
+    'ENABLED': os.environ.get('COURSE_CONTENT_CACHE', 'True') == 'True',
+    'ALIAS': 'course_content',
+    'TIMEOUT': 24 * 3600,
+}
+
+# Interpréteur de pseudo-code
+# 'tree' : parcours de l'arbre syntaxique, 'vm' : machine virtuelle à instructions
+PSEUDO_INTERPRETER_BACKEND = os.environ.get('PSEUDO_INTERPRETER_BACKEND', 'tree')
+
+# Cache des programmes compilés (par processus, LRU borné)
+# SHARED_CACHE_ALIAS : alias de CACHES partagé entre les workers (Redis, Memcached, base de données).
+# Vide : cache local uniquement.
+PSEUDO_PROGRAM_CACHE = {
+    'MAX_ENTRIES': int(os.environ.get('PSEUDO_PROGRAM_CACHE_ENTRIES', 256)),
+    'MAX_BYTES': int(os.environ.get('PSEUDO_PROGRAM_CACHE_BYTES', 8 * 1024 * 1024)),
+    'SHARED_CACHE_ALIAS': os.environ.get('PSEUDO_PROGRAM_CACHE_ALIAS', ''),
+    'TIMEOUT': 3600,
+}
+
+# Exécution isolée du code des apprenants (voir courses/pseudo_sandbox.py)
+# Processus interpréteurs pré-démarrés par worker web; délai par travail (le processus
+# bloqué est remplacé), plafond mémoire par processus, file d'attente bornée (503 au-delà).
+PSEUDO_SANDBOX = {
+    'ENABLED': os.environ.get('PSEUDO_SANDBOX', 'True') == 'True',
+    'WORKERS': int(os.environ.get('PSEUDO_SANDBOX_WORKERS', 2)),
+    'JOB_TIMEOUT': 5.0,
+    # Exécution en flux : le délai inclut la lecture de la sortie par le client
+    'STREAM_TIMEOUT': 15.0,
+    'MEMORY_LIMIT': int(os.environ.get('PSEUDO_SANDBOX_MEMORY', 256 * 1024 * 1024)),
+    'MAX_PENDING': 4,
+    'QUEUE_TIMEOUT': 2.0,
+    'MAX_JOBS_PER_WORKER': 500,
+}
+
+# Exécution interactive (LIRE attend la valeur de l'apprenant, voir courses/pseudo_session.py)
+# TTL : durée de vie d'une session suspendue (secondes). MAX_STATE_BYTES : état sérialisé
+# maximal d'une session; MAX_BYTES : total des sessions du processus (les plus anciennes
+# sont retirées). SHARED_CACHE_ALIAS : alias de CACHES partagé entre les workers; vide :
+# une session ne peut être reprise que par le worker qui l'a créée.
+PSEUDO_SESSIONS = {
+    'TTL': int(os.environ.get('PSEUDO_SESSION_TTL', 600)),
+    'MAX_STATE_BYTES': 256 * 1024,
+    'MAX_BYTES': int(os.environ.get('PSEUDO_SESSION_BYTES', 16 * 1024 * 1024)),
+    'SHARED_CACHE_ALIAS': os.environ.get('PSEUDO_SESSION_CACHE_ALIAS', ''),
+}
+
+# Correction des exercices par cas de test
+# TEST_CASE_WORKERS : cas d'une même soumission exécutés en parallèle (processus du pool isolé).
+# STOP_EARLY : arrêter dès que 50% de cas réussis est hors d'atteinte. Désactivé par défaut :
+# le pourcentage de cas réussis entre dans le score (crédit partiel), les cas abandonnés le baisseraient.
+PSEUDO_GRADING = {
+    'TEST_CASE_WORKERS': int(os.environ.get('PSEUDO_GRADING_WORKERS', 2)),
+    'STOP_EARLY': os.environ.get('PSEUDO_GRADING_STOP_EARLY', 'False') == 'True',
+}
+
+# Budgets d'exécution du pseudo-code, par point d'entrée (voir courses/pseudo_limits.py)
+# 'default' s'applique partout; 'execute' (bouton "Exécuter"), 'stream' (exécution avec
+# sortie en flux) et 'grading' (correction des exercices, un budget par cas de test)
+# le complètent. None : pas de limite.
+PSEUDO_EXECUTION_LIMITS = {
+    'default': {
+        'MAX_ITERATIONS': 10000,
+        'WALL_TIME': 2.0,
+        'CPU_TIME': 2.0,
+        'MAX_OUTPUT_BYTES': 1024 * 1024,
+        'MAX_STRING_LENGTH': 100000,
+        'MAX_INTEGER_DIGITS': 4300,
+        'MAX_ARRAY_LENGTH': 100000,
+        'MAX_CALL_DEPTH': 1000,
+    },
+    'execute': {
+        'WALL_TIME': float(os.environ.get('PSEUDO_EXECUTE_WALL_TIME', 2.0)),
+    },
+    'stream': {
+        'WALL_TIME': float(os.environ.get('PSEUDO_STREAM_WALL_TIME', 10.0)),
+        'MAX_OUTPUT_BYTES': 256 * 1024,
+    },
+    'grading': {
+        'WALL_TIME': float(os.environ.get('PSEUDO_GRADING_WALL_TIME', 1.0)),
+        'CPU_TIME': 1.0,
+        'MAX_OUTPUT_BYTES': 256 * 1024,
+    },
+}
+
 # Configuration du logging
 LOGGING = {
     'version': 1,
@@ -25,6 +25,26 @@ api.interceptors.request.use(
   (error) => Promise.reject(error)
 );
 
+// Nouveau token d'accès à partir du token de rafraîchissement (retour à la connexion en cas d'échec)
+const refreshAccessToken = async () => {
+  try {
+    const refreshToken = localStorage.getItem('refresh_token');
+    const response = await axios.post(`${API_BASE_URL}/auth/refresh/`, {
+      refresh: refreshToken,
+    });
+
+    const { access } = response.data;
+    localStorage.setItem('access_token', access);
+    return access;
+  } catch (refreshError) {
+    localStorage.removeItem('access_token');
+    localStorage.removeItem('refresh_token');
+    localStorage.removeItem('user');
+    window.location.href = '/login';
+    throw refreshError;
+  }
+};
+
 // Intercepteur pour gérer le rafraîchissement du token
 api.interceptors.response.use(
   (response) => response,
@@ -35,21 +55,10 @@ api.interceptors.response.use(
       originalRequest._retry = true;
 
       try {
-        const refreshToken = localStorage.getItem('refresh_token');
-        const response = await axios.post(`${API_BASE_URL}/auth/refresh/`, {
-          refresh: refreshToken,
-        });
-
-        const { access } = response.data;
-        localStorage.setItem('access_token', access);
-
+        const access = await refreshAccessToken();
         originalRequest.headers.Authorization = `Bearer ${access}`;
         return api(originalRequest);
       } catch (refreshError) {
-        localStorage.removeItem('access_token');
-        localStorage.removeItem('refresh_token');
-        localStorage.removeItem('user');
-        window.location.href = '/login';
         return Promise.reject(refreshError);
       }
     }
@@ -181,10 +190,85 @@ export const exerciseService = {
 
 // Services pour l'interpréteur de pseudo-code
 export const interpreterService = {
-  execute: async (code, inputs = []) => {
-    const response = await api.post('/interpreter/execute/', { code, inputs });
+  // profile : ajoute le profil d'exécution (temps par ligne et par fonction) à la réponse
+  execute: async (code, inputs = [], profile = false) => {
+    const response = await api.post('/interpreter/execute/', { code, inputs, ...(profile ? { profile } : {}) });
+    return response.data;
+  },
+
+  // Sortie au fil de l'eau (server-sent events) : onLines(lignes) à chaque lot,
+  // puis retourne le résultat final { success, error, variables, lines }.
+  // Code refusé (400) ou interpréteur occupé (503) : { success: false, error, variables, status }
+  executeStream: async (code, inputs = [], onLines = () => {}) => {
+    const post = (token) => fetch(`${API_BASE_URL}/interpreter/execute/stream/`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        Accept: 'text/event-stream',
+        ...(token ? { Authorization: `Bearer ${token}` } : {}),
+      },
+      body: JSON.stringify({ code, inputs }),
+    });
+
+    let response = await post(localStorage.getItem('access_token'));
+    // Token expiré : rafraîchi comme pour les requêtes axios, puis une seule nouvelle tentative
+    if (response.status === 401) {
+      response = await post(await refreshAccessToken());
+    }
+
+    // Les erreurs sont des réponses JSON, sans événements
+    const contentType = response.headers.get('Content-Type') || '';
+    if (!response.ok || !contentType.includes('text/event-stream')) {
+      let data = {};
+      try {
+        data = await response.json();
+      } catch (e) {
+        // Corps vide ou non JSON (proxy)
+      }
+      return {
+        success: false,
+        variables: {},
+        ...data,
+        error: data.error || data.detail || `Erreur ${response.status}`,
+        status: response.status,
+      };
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let result = null;
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      let end;
+      while ((end = buffer.indexOf('\n\n')) !== -1) {
+        const block = buffer.slice(0, end);
+        buffer = buffer.slice(end + 2);
+        const event = block.match(/^event: (.*)$/m)?.[1];
+        const data = JSON.parse(block.match(/^data: (.*)$/m)?.[1] || '{}');
+        if (event === 'output') onLines(data.lines);
+        else if (event === 'done') result = data;
+      }
+    }
+    return result || { success: false, error: 'Connexion interrompue', variables: {} };
+  },
+
+  // Exécution interactive : status 'input' (session_id, prompt) tant qu'un LIRE attend une valeur
+  startSession: async (code, inputs = []) => {
+    const response = await api.post('/interpreter/sessions/', { code, inputs });
     return response.data;
   },
+
+  sendInput: async (sessionId, value) => {
+    const response = await api.post(`/interpreter/sessions/${sessionId}/`, { value });
+    return response.data;
+  },
+
+  cancelSession: async (sessionId) => {
+    await api.delete(`/interpreter/sessions/${sessionId}/`);
+  },
 };
 
 // Services pour le dashboard